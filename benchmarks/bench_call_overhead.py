@@ -0,0 +1,106 @@
+import asyncio
+import multiprocessing
+import os
+import socket
+import time
+
+from pygrenton.cipher import GrentonCipher
+from pygrenton.clu_client import CluClient
+from pygrenton.gfeature import GFeature
+from pygrenton.interfaces import FeatureInterface
+from pygrenton.types import DataType
+
+CALLS = 2000
+REPEATS = 5
+CONCURRENCY = (1, 16)
+
+
+def _echo_clu(key: bytes, iv: bytes, ports) -> None:
+    # Answers every request at once. It runs in its own process, so it doesn't compete with the client
+    # for the GIL, but it answers one request at a time: the async results include its ~15 us per
+    # request whenever the client keeps it busy.
+    cipher = GrentonCipher(key, iv)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    ports.put(sock.getsockname()[1])
+
+    while True:
+        data, addr = sock.recvfrom(4096)
+        _, ip, req_id, _ = cipher.decrypt(data).decode().split(":", 3)
+        sock.sendto(cipher.encrypt(f"resp:{ip}:{req_id}:number:1.5".encode()), addr)
+
+
+def legacy_get_value(feature: GFeature, client: CluClient):
+    # the previous sync path: a loop round trip to a coroutine, which handed the call to a worker thread
+    async def get_value_async():
+        value = await asyncio.to_thread(client.get_value, feature.parent, feature.index)
+        return feature.data_type.convert_value(value)
+
+    return asyncio.get_event_loop().run_until_complete(get_value_async())
+
+async def legacy_get_value_async(feature: GFeature, client: CluClient):
+    value = await asyncio.to_thread(client.get_value, feature.parent, feature.index)
+    return feature.data_type.convert_value(value)
+
+
+def _best(func) -> tuple[float, float]:
+    # wall time, and the CPU time of the client alone, which the echo CLU doesn't add to
+    best = (float("inf"), float("inf"))
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        start_cpu = time.process_time()
+        func()
+        best = min(best, (time.perf_counter() - start, time.process_time() - start_cpu))
+
+    return best
+
+def _sync(call) -> tuple[float, float]:
+    def run():
+        for _ in range(CALLS):
+            call()
+
+    wall, cpu = _best(run)
+    return wall / CALLS, cpu / CALLS
+
+def _async(loop, call, concurrency: int) -> tuple[float, float]:
+    async def worker():
+        for _ in range(CALLS // concurrency):
+            await call()
+
+    async def run():
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+
+    wall, cpu = _best(lambda: loop.run_until_complete(run()))
+    calls = CALLS // concurrency * concurrency
+    return wall / calls, cpu / calls
+
+def main() -> None:
+    key = os.urandom(16)
+    iv = os.urandom(16)
+    ports = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_echo_clu, args=(key, iv, ports), daemon=True)
+    process.start()
+
+    client = CluClient("127.0.0.1", ports.get(), GrentonCipher(key, iv), client_ip="127.0.0.1")
+    feature = GFeature(client, "OBJ1", FeatureInterface("Value", 0, True, True, DataType.NUMBER, ""))
+
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+
+    results = {
+        "legacy sync": _sync(lambda: legacy_get_value(feature, client)),
+        "sync": _sync(feature.get_value),
+    }
+    for concurrency in CONCURRENCY:
+        results[f"legacy async x{concurrency}"] = _async(loop, lambda: legacy_get_value_async(feature, client), concurrency)
+        results[f"async x{concurrency}"] = _async(loop, feature.get_value_async, concurrency)
+
+    for name, (wall, cpu) in results.items():
+        print(f"{name:>18}: {wall * 1e6:8.1f} us/call, {cpu * 1e6:8.1f} us of client CPU/call")
+
+    client.close()
+    process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import os
+import time
+
+from cryptography.hazmat.backends import default_backend
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+from pygrenton.cipher import GrentonCipher
+
+MESSAGES = 20000
+REPEATS = 5
+
+
+class LegacyCipher:
+    # GrentonCipher as it was before contexts were reused
+
+    def __init__(self, key: bytes, iv: bytes) -> None:
+        self._padding = padding.PKCS7(128)
+        self._cipher = Cipher(algorithms.AES(key), modes.CBC(iv), backend=default_backend())
+
+    def encrypt(self, data: bytes) -> bytes:
+        encryptor = self._cipher.encryptor()
+        padder = self._padding.padder()
+        data = padder.update(data) + padder.finalize()
+        return encryptor.update(data) + encryptor.finalize()
+
+    def decrypt(self, data: bytes) -> bytes:
+        decryptor = self._cipher.decryptor()
+        unpadder = self._padding.unpadder()
+        data = decryptor.update(data) + decryptor.finalize()
+        return unpadder.update(data) + unpadder.finalize()
+
+
+def _rate(func, messages) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        func(messages)
+        best = min(best, time.perf_counter() - start)
+
+    return len(messages) / best
+
+def main() -> None:
+    key = os.urandom(16)
+    iv = os.urandom(16)
+
+    legacy = LegacyCipher(key, iv)
+    cipher = GrentonCipher(key, iv)
+
+    for size in (64, 256, 1000):
+        plain = [os.urandom(size) for _ in range(MESSAGES)]
+        encrypted = [legacy.encrypt(m) for m in plain]
+
+        results = {
+            "legacy encrypt": _rate(lambda ms: [legacy.encrypt(m) for m in ms], plain),
+            "encrypt": _rate(lambda ms: [cipher.encrypt(m) for m in ms], plain),
+            "encrypt_many": _rate(cipher.encrypt_many, plain),
+            "legacy decrypt": _rate(lambda ms: [legacy.decrypt(m) for m in ms], encrypted),
+            "decrypt": _rate(lambda ms: [cipher.decrypt(m) for m in ms], encrypted),
+            "decrypt_many": _rate(cipher.decrypt_many, encrypted),
+        }
+
+        print(f"{size} byte messages:")
+        for name, rate in results.items():
+            print(f"  {name:16} {rate:12,.0f} msg/s")
+
+if __name__ == "__main__":
+    main()
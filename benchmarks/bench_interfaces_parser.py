@@ -0,0 +1,189 @@
+import os
+import re
+import sys
+import time
+import xml.dom.minidom as md
+
+from pygrenton.interfaces import *
+from pygrenton.parsers.interfaces_parser import parse_interfaces
+
+REPEATS = 3
+DEFAULT_DIR = "pygrenton_cache/device-interfaces"
+
+VALUE_RANGE_TEMPLATE = re.compile(r"\d+\s*-\s*\d+")
+
+
+def legacy_parse_feature(elm) -> FeatureInterface:
+    name = elm.getAttribute("name")
+    index = int(elm.getAttribute("index"))
+    get = elm.getAttribute("get") == "true"
+    set = elm.getAttribute("set") == "true"
+    data_type = DataType(elm.getAttribute("type"))
+    unit = elm.getAttribute("unit")
+
+    value_range = None
+    vr = elm.getAttribute("range")
+    if VALUE_RANGE_TEMPLATE.match(vr):
+        value_range = tuple(int(x) for x in elm.getAttribute("range").split("-"))
+
+    enum = None
+    en = elm.getAttribute("enum")
+    if en != "":
+        if data_type == DataType.STRING:
+            enum = {s: None for s in elm.getAttribute("enum").split(",")}
+        elif data_type == DataType.NUMBER:
+            enum = {int(s): None for s in elm.getAttribute("enum").split(",")}
+
+        for node in elm.getElementsByTagName("enum"):
+            name = node.getAttribute("name")
+            value = node.getAttribute("value")
+            enum[value] = name
+
+    return FeatureInterface(name, index, get, set, data_type, unit, enum, value_range)
+
+def legacy_parse_parameter(elm) -> ParameterInterface:
+    name = elm.getAttribute("name")
+    data_type = DataType(elm.getAttribute("type"))
+    unit = elm.getAttribute("unit")
+
+    value_range = None
+    vr = elm.getAttribute("range")
+    if VALUE_RANGE_TEMPLATE.match(vr):
+        value_range = tuple(int(x) for x in elm.getAttribute("range").split("-"))
+
+    enum = None
+    en = elm.getAttribute("enum")
+    if en != "":
+        if data_type == DataType.STRING:
+            enum = [s for s in elm.getAttribute("enum").split(",")]
+        elif data_type == DataType.NUMBER:
+            enum = [int(s) for s in elm.getAttribute("enum").split(",")]
+
+    return ParameterInterface(name, data_type, unit, enum, value_range)
+
+def legacy_parse_method(elm) -> MethodInterface:
+    call = CallType(elm.getAttribute("call"))
+    index = int(elm.getAttribute("index"))
+    name = elm.getAttribute("name")
+    return_value = DataType(elm.getAttribute("return"))
+    params = [legacy_parse_parameter(par) for par in elm.getElementsByTagName("param")]
+
+    return MethodInterface(name, index, call, return_value, None, params)
+
+def legacy_parse_clu_object_xml(file) -> CluObjectInterface:
+    dom = md.parse(file)
+
+    obj = dom.getElementsByTagName("object")[0]
+    obj_class = int(obj.getAttribute("class"))
+    name = obj.getAttribute("name")
+    version = int(obj.getAttribute("version"))
+
+    features = [legacy_parse_feature(xml) for xml in dom.getElementsByTagName("feature")]
+    methods = [legacy_parse_method(xml) for xml in dom.getElementsByTagName("method")]
+
+    return CluObjectInterface(name, obj_class, version, features, methods)
+
+def legacy_parse_module_xml(file) -> ModuleInterface:
+    dom = md.parse(file)
+
+    mod = dom.getElementsByTagName("module")[0]
+    name = mod.getAttribute("name")
+    hw_type = int(mod.getAttribute("typeId"), 16)
+
+    fw = dom.getElementsByTagName("firmware")[0]
+    fw_type = int(fw.getAttribute("typeId"), 16)
+    fw_api_version = int(fw.getAttribute("version"), 16)
+
+    objects = {}
+    for xml in dom.getElementsByTagName("object"):
+        obj_class = int(xml.getAttribute("class"))
+        features = [legacy_parse_feature(x) for x in xml.getElementsByTagName("feature")]
+        methods = [legacy_parse_method(x) for x in xml.getElementsByTagName("method")]
+        objects[obj_class] = ModuleObjectInterface(
+            xml.getAttribute("name"), obj_class, ModuleObjectType(xml.getAttribute("type")), features, methods
+        )
+
+    return ModuleInterface(name, hw_type, fw_type, fw_api_version, objects)
+
+def legacy_parse_clu_xml(file, objects_repo: dict[str, list[CluObjectInterface]]) -> CluInterface:
+    dom = md.parse(file)
+
+    clu = dom.getElementsByTagName("CLU")[0]
+    name = clu.getAttribute("typeName")
+    hw_type = int(clu.getAttribute("hardwareType"), 16)
+    hw_version = int(clu.getAttribute("hardwareVersion"), 16)
+    fw_type = int(clu.getAttribute("firmwareType"), 16)
+    fw_version = int(clu.getAttribute("firmwareVersion"), 16)
+
+    features = [legacy_parse_feature(x) for x in dom.getElementsByTagName("feature")]
+    methods = [legacy_parse_method(x) for x in dom.getElementsByTagName("method")]
+
+    objects = {}
+    for obj in dom.getElementsByTagName("object"):
+        for obj_int in objects_repo.get(obj.getAttribute("name"), []):
+            if obj_int.version == int(obj.getAttribute("version")):
+                objects[obj_int.obj_class] = obj_int
+
+    return CluInterface(name, hw_type, hw_version, fw_type, fw_version, features, methods, objects)
+
+def legacy_parse_interfaces(dir):
+    clus: dict[int, list[CluInterface]] = {}
+    modules: dict[int, list[ModuleInterface]] = {}
+    objects: dict[str, list[CluObjectInterface]] = {}
+
+    for path in os.scandir(dir):
+        if path.is_file() and path.name.startswith("object_"):
+            with open(path, "r", encoding="utf-8") as file:
+                obj = legacy_parse_clu_object_xml(file)
+                objects.setdefault(obj.name, []).append(obj)
+
+    for path in os.scandir(dir):
+        if not path.is_file():
+            continue
+
+        with open(path, "r", encoding="utf-8") as file:
+            if path.name.startswith("clu_"):
+                clu = legacy_parse_clu_xml(file, objects)
+                clus.setdefault(clu.hw_type, []).append(clu)
+            elif path.name.startswith("module_"):
+                mod = legacy_parse_module_xml(file)
+                modules.setdefault(mod.hw_type, []).append(mod)
+
+    return clus, modules
+
+def _time(func) -> tuple[float, tuple]:
+    best = None
+    result = None
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best, result
+
+def _count(result: tuple) -> int:
+    clus, modules = result
+    return sum(len(v) for v in clus.values()) + sum(len(v) for v in modules.values())
+
+def main() -> None:
+    # expects an extracted device-interfaces catalogue, as downloaded by InterfaceManager
+    directory = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DIR
+    if not os.path.isdir(directory):
+        print(f"Interfaces catalogue not found: {directory}")
+        sys.exit(1)
+
+    files = sum(1 for path in os.scandir(directory) if path.is_file())
+    print(f"{files} files in {directory} (cpu count: {os.cpu_count()})")
+
+    results = {
+        "legacy minidom": _time(lambda: legacy_parse_interfaces(directory)),
+        "iterparse": _time(lambda: parse_interfaces(directory, workers=1)),
+        "iterparse, process pool": _time(lambda: parse_interfaces(directory)),
+    }
+
+    for name, (seconds, result) in results.items():
+        print(f"  {name:24} {seconds * 1000:9.1f} ms  ({_count(result)} interfaces)")
+
+if __name__ == "__main__":
+    main()
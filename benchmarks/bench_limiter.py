@@ -0,0 +1,130 @@
+import asyncio
+import heapq
+import multiprocessing
+import os
+import random
+import socket
+import threading
+import time
+
+from pygrenton.cipher import GrentonCipher
+from pygrenton.clu_client import CluClient
+from pygrenton.limiter import AdaptiveLimiter
+
+DURATION = 5
+CONCURRENCY = 48
+TIMEOUT = 0.25
+
+
+class LoadedClu:
+    # Serves `capacity` requests at a time, later ones queue up behind them. Requests arriving
+    # to a queue longer than `queue_size` are dropped, like datagrams a busy CLU never reads.
+
+    def __init__(self, cipher: GrentonCipher, capacity: int = 6, service_time: float = 0.005, queue_size: int = 12) -> None:
+        self._cipher = cipher
+        self._service_time = service_time
+        self._queue_size = queue_size
+        self._slots = threading.Semaphore(capacity)
+        self._lock = threading.Lock()
+        self._waiting = 0
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(("127.0.0.1", 0))
+        self.port = self._socket.getsockname()[1]
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            data, addr = self._socket.recvfrom(4096)
+            with self._lock:
+                if self._waiting >= self._queue_size:
+                    continue
+                self._waiting += 1
+
+            threading.Thread(target=self._serve, args=(data, addr), daemon=True).start()
+
+    def _serve(self, data: bytes, addr) -> None:
+        with self._slots:
+            with self._lock:
+                self._waiting -= 1
+            time.sleep(self._service_time)
+
+        _, ip, req_id, _ = self._cipher.decrypt(data).decode().split(":", 3)
+        self._socket.sendto(self._cipher.encrypt(f"resp:{ip}:{req_id}:number:1".encode()), addr)
+
+
+def _jittery_clu(key: bytes, iv: bytes, rtt: float, sigma: float, ports) -> None:
+    # Answers every request after a lognormal delay that doesn't depend on the load. It runs in its
+    # own process with a single thread, so the load of the client can't slow it down either.
+    cipher = GrentonCipher(key, iv)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    ports.put(sock.getsockname()[1])
+
+    due = []
+    while True:
+        now = time.monotonic()
+        while due and due[0][0] <= now:
+            _, _, resp, addr = heapq.heappop(due)
+            sock.sendto(resp, addr)
+
+        sock.settimeout(max(due[0][0] - now, 0) if due else None)
+        try:
+            data, addr = sock.recvfrom(4096)
+        except socket.timeout:
+            continue
+
+        _, ip, req_id, _ = cipher.decrypt(data).decode().split(":", 3)
+        resp = cipher.encrypt(f"resp:{ip}:{req_id}:number:1".encode())
+        heapq.heappush(due, (time.monotonic() + rtt * random.lognormvariate(0, sigma), req_id, resp, addr))
+
+
+async def _load(client: CluClient) -> tuple[int, int]:
+    done = 0
+    timeouts = 0
+    end = time.monotonic() + DURATION
+
+    async def worker():
+        nonlocal done, timeouts
+        while time.monotonic() < end:
+            try:
+                await client.get_value_async("OBJ1", 0)
+                done += 1
+            except asyncio.TimeoutError:
+                timeouts += 1
+
+    await asyncio.gather(*[worker() for _ in range(CONCURRENCY)])
+    return done, timeouts
+
+def _run(name: str, port: int, cipher: GrentonCipher, limiter: AdaptiveLimiter) -> None:
+    client = CluClient("127.0.0.1", port, cipher, TIMEOUT, client_ip="127.0.0.1", limiter=limiter)
+    done, timeouts = asyncio.run(_load(client))
+    stats = limiter.stats
+    print(
+        f"{name:>18}: {done / DURATION:7.1f} req/s, {timeouts:4d} timeouts, limit {stats.limit:2d}, "
+        f"{stats.decreases:4d} decreases, average queue wait {stats.average_queue_wait * 1e3:6.1f} ms"
+    )
+
+def main() -> None:
+    key = os.urandom(16)
+    iv = os.urandom(16)
+    cipher = GrentonCipher(key, iv)
+
+    print("overloaded CLU")
+    clu = LoadedClu(cipher)
+    _run("fixed 6", clu.port, cipher, AdaptiveLimiter(6, min_limit=6, max_limit=6))
+    _run("fixed 32", clu.port, cipher, AdaptiveLimiter(32, min_limit=32, max_limit=32))
+    _run("adaptive", clu.port, cipher, AdaptiveLimiter(6))
+
+    # with a window that is always full, jitter alone must not shrink it
+    print("unloaded CLU with RTT jitter")
+    for sigma in (0.3, 0.5):
+        ports = multiprocessing.Queue()
+        process = multiprocessing.Process(target=_jittery_clu, args=(key, iv, 0.02, sigma, ports), daemon=True)
+        process.start()
+        _run(f"adaptive, sigma {sigma}", ports.get(), cipher, AdaptiveLimiter(6))
+        process.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+import gc
+import io
+import tracemalloc
+
+from pygrenton.clu_client import ClientPage, FeatureEntry, UpdateContext
+from pygrenton.config_objects import CLUConfig, ModuleConfig
+from pygrenton.interfaces import *
+from pygrenton.object_index import ObjectIndex
+from pygrenton.parsers.config_parser import parse_clu_config
+from pygrenton.parsers.om_parser import OMEndpoints, parse_om
+
+OBJECTS = 5000
+MODULES = 100
+CLASSES = 20
+FEATURES = 12
+METHODS = 6
+
+
+def make_members(prefix: str) -> tuple[list[FeatureInterface], list[MethodInterface]]:
+    # names are built at runtime, like the parser produces them
+    features = [
+        FeatureInterface("".join((prefix, "Feature", str(i))), i, True, i % 2 == 0, DataType.NUMBER, "".join(("unit", str(i % 3))))
+        for i in range(FEATURES)
+    ]
+    methods = [
+        MethodInterface("".join((prefix, "Method", str(i))), i, CallType.EXECUTE, DataType.NUMBER, None,
+                        [ParameterInterface("".join(("value", str(i))), DataType.NUMBER, "")])
+        for i in range(METHODS)
+    ]
+    return features, methods
+
+class StaticInterfaces:
+    # stands in for InterfaceManager, every module has the same hardware type
+
+    def __init__(self) -> None:
+        clu_objects = {c: CluObjectInterface(f"clu_object_{c}", c, 1, *make_members("Clu")) for c in range(1, CLASSES + 1)}
+        self.clu = CluInterface("clu", 1, 1, 1, 1, *make_members("Clu"), clu_objects)
+        module_objects = {c: ModuleObjectInterface(f"module_object_{c}", c, ModuleObjectType.NONE, *make_members("Module")) for c in range(3, CLASSES + 3)}
+        self.module = ModuleInterface("module", 2, 1, 1, module_objects)
+
+    def get_clu_interface(self, hw_type: int, fw_type: int, api_version: int) -> CluInterface:
+        return self.clu
+
+    def get_module_interface(self, hw_type: int, fw_type: int, api_version: int) -> ModuleInterface:
+        return self.module
+
+def make_om() -> str:
+    lines = ["-- NAME_ clu=CLU1", "CLU1 = OBJECT:new(0, 0xC0A80002, 0)"]
+    for i in range(OBJECTS):
+        lines.append(f"-- NAME_ object_{i}=OBJ{i}")
+        if i % 4 == 0:
+            lines.append(f"OBJ{i} = OBJECT:new({i % CLASSES + 1}, 0)")
+        else:
+            lines.append(f"OBJ{i} = OBJECT:new({i % CLASSES + 3}, SN_{i % MODULES + 1}, {i % 8}, 0)")
+
+    return "\n".join(lines) + "\n"
+
+def make_config(om: str) -> tuple[CLUConfig, OMEndpoints]:
+    modules = {sn: ModuleConfig(sn, 2, 1, 1, 1, 1, "OK") for sn in range(1, MODULES + 1)}
+    return CLUConfig(1, "mac", 1, 1, 1, 1, 1, "OK", modules), parse_om(io.StringIO(om))
+
+def measure(func) -> tuple[int, object]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return after - before, result
+
+def touch_members(config) -> list:
+    wrappers = []
+    for obj in config.objects_by_id.values():
+        wrappers.extend(obj.features)
+        wrappers.extend(obj.methods)
+
+    return wrappers
+
+def make_client_state(config) -> list:
+    page = ClientPage(1)
+    updates = []
+    for obj in config.objects_by_id.values():
+        entry = FeatureEntry(obj.object_id, 0)
+        page.add_feature(entry)
+        updates.append(UpdateContext(obj.object_id, 0, 1.0))
+
+    return [page, updates]
+
+def main() -> None:
+    interfaces = StaticInterfaces()
+    om = make_om()
+    size, inputs = measure(lambda: make_config(om))
+    print(f"{OBJECTS} objects, {FEATURES} features and {METHODS} methods each")
+    print(f"  parsed om.lua and config.json {size / OBJECTS:10.1f} B/object")
+
+    size, config = measure(lambda: parse_clu_config(*inputs, interfaces, None))
+    # the configuration comes with its query index, which is measured on its own as well
+    serial_numbers = {obj.object_id: sn for sn, objects in inputs[1].module_objects.items() for obj in objects}
+    index_size, _ = measure(lambda: ObjectIndex(config.objects, serial_numbers))
+    print(f"  object graph without index    {(size - index_size) / OBJECTS:10.1f} B/object")
+    print(f"  object index                  {index_size / OBJECTS:10.1f} B/object")
+    print(f"  parsed configuration          {size / OBJECTS:10.1f} B/object")
+
+    size, wrappers = measure(lambda: touch_members(config))
+    print(f"  every feature and method used {size / OBJECTS:10.1f} B/object")
+
+    size, state = measure(lambda: make_client_state(config))
+    print(f"  subscribed feature and update {size / OBJECTS:10.1f} B/object")
+
+if __name__ == "__main__":
+    main()
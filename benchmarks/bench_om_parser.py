@@ -0,0 +1,98 @@
+import io
+import ipaddress
+import random
+import re
+import timeit
+
+from pygrenton.parsers.om_parser import CLU, CLUObject, ModuleObject, OMEndpoints, parse_om
+
+REPEATS = 5
+NUMBER = 5
+LINES = 20000
+
+LEGACY_NAME_FIELD = re.compile("-- NAME_.*")
+LEGACY_SPLIT_ARGS = re.compile("[ =,\n]+")
+LEGACY_OBJECT_CREATION = re.compile('.*[^"]OBJECT:new\\(.*?\\)[^"\n]*')
+
+
+def legacy_parse_om(file) -> OMEndpoints:
+    names = {}
+    module_objects = {}
+    clu_objects = []
+
+    this_clu = None
+    external_clus = []
+
+    for line in file:
+        # the legacy download cut the file here, so both parsers see the same lines
+        if "EventsFor" in line:
+            break
+
+        if re.match(LEGACY_NAME_FIELD, line):
+            spl = re.split(LEGACY_SPLIT_ARGS, line)[2:]
+            names[spl[1]] = spl[0]
+
+        elif re.match(LEGACY_OBJECT_CREATION, line):
+            obj_id = line.split()[0]
+            args = line[line.find("(")+1:line.rfind(")")].split(", ")
+            argcount = len(args)
+
+            if argcount == 2:
+                clu_objects.append(CLUObject(obj_id, int(args[0])))
+
+            elif argcount == 3:
+                ip_address = ipaddress.ip_address(int(args[1], 16))
+                if int(args[0]) == 1:
+                    external_clus.append(CLU(obj_id, ip_address))
+                else:
+                    this_clu = CLU(obj_id, ip_address)
+
+            elif argcount == 4:
+                obj_class = int(args[0])
+                if obj_class == 2:
+                    continue
+
+                parent_serial_number = int(args[1][3:])
+                index = int(args[2])
+                module_objects.setdefault(parent_serial_number, []).append(ModuleObject(obj_id, obj_class, parent_serial_number, index))
+
+    return OMEndpoints(this_clu, external_clus, names, clu_objects, module_objects)
+
+def make_om(lines: int) -> str:
+    # names and object creations of a large project, followed by the event handlers
+    rnd = random.Random(0)
+    result = [
+        "-- NAME_ main_clu=CLU220000001",
+        "CLU220000001 = OBJECT:new(0, 0xC0A80002, 0)",
+        "CLU220000002 = OBJECT:new(1, 0xC0A80003, 0)",
+    ]
+
+    objects = (lines - len(result)) // 3
+    for i in range(objects):
+        object_id = f"DOU{1000 + i}"
+        result.append(f"-- NAME_ {'room_' * rnd.randint(1, 6)}light_{i}={object_id}")
+        if i % 5 == 0:
+            result.append(f"{object_id} = OBJECT:new({rnd.randint(3, 60)}, 0)")
+        else:
+            result.append(f"{object_id} = OBJECT:new({rnd.randint(3, 60)}, SN_{100 + i % 50}, {i % 8}, 0)")
+
+    result.append("EventsFor = {}")
+    while len(result) < lines:
+        i = rnd.randrange(objects)
+        result.append(f'EventsFor["DOU{1000 + i}"] = {{ OnChange = function() DOU{1000 + i}:set(0, "{"x" * rnd.randint(0, 80)}") end }}')
+
+    return "\n".join(result) + "\n"
+
+def main() -> None:
+    om = make_om(LINES)
+    print(f"om.lua with {LINES} lines, {len(om)} bytes")
+
+    if legacy_parse_om(io.StringIO(om)) != parse_om(io.StringIO(om)):
+        raise AssertionError("parse_om differs from the legacy parser")
+
+    for name, func in (("legacy", legacy_parse_om), ("parse_om", parse_om)):
+        best = min(timeit.repeat(lambda: func(io.StringIO(om)), repeat=REPEATS, number=NUMBER)) / NUMBER
+        print(f"  {name:10} {best * 1000:8.2f} ms")
+
+if __name__ == "__main__":
+    main()
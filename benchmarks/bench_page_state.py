@@ -0,0 +1,71 @@
+import timeit
+
+from pygrenton.page_state import PageState
+
+REPEATS = 5
+NUMBER = 20000
+
+
+class LegacyPage:
+    # values kept as the parsed list, diffed with zip and filter on every update
+
+    def __init__(self, values: list) -> None:
+        self.states = list(values)
+
+    def update(self, values: list) -> list:
+        changed = [position for position, _, _ in filter(lambda x: x[1] != x[2], zip(range(len(values)), self.states, values))]
+        self.states = values
+        return changed
+
+def make_values(size: int, offset: float = 0) -> list:
+    values = []
+    for i in range(size):
+        if i % 4 == 3:
+            values.append(f"text {i}")
+        elif i % 8 == 5:
+            values.append(i % 16 == 5)
+        else:
+            values.append(i * 1.5 + offset)
+
+    return values
+
+def payload(values: list) -> str:
+    return ",".join(f'"{v}"' if isinstance(v, str) else str(v).lower() for v in values)
+
+def best(func) -> float:
+    return min(timeit.repeat(func, repeat=REPEATS, number=NUMBER)) / NUMBER * 1e6
+
+def main() -> None:
+    for size in (16, 38):
+        base = make_values(size)
+        one_changed = list(base)
+        one_changed[0] += 1
+
+        for name, values in (("unchanged", base), ("one changed", one_changed)):
+            # every run alternates between the base and the case, like consecutive pushes do
+            legacy = LegacyPage(base)
+            def run_legacy():
+                legacy.update(values)
+                legacy.update(base)
+
+            state = PageState()
+            state.reset(base, payload(base))
+            body, base_body = payload(values), payload(base)
+            def run_state():
+                state.update(values, body)
+                state.update(base, base_body)
+
+            # the client skips parsing and diffing of a payload equal to the previous one
+            def run_state_payload():
+                if body != state.payload:
+                    state.update(values, body)
+                if base_body != state.payload:
+                    state.update(base, base_body)
+
+            print(f"{size} values, {name}")
+            print(f"  legacy zip/filter     {best(run_legacy) / 2:8.2f} us/update")
+            print(f"  PageState.update      {best(run_state) / 2:8.2f} us/update")
+            print(f"  with payload check    {best(run_state_payload) / 2:8.2f} us/update")
+
+if __name__ == "__main__":
+    main()
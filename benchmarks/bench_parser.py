@@ -0,0 +1,130 @@
+import random
+import timeit
+
+from pygrenton.clu_client import _split_update_message
+from pygrenton.types import DataType
+from pygrenton.utils import parse_list, parse_values, value_converter
+
+REPEATS = 5
+NUMBER = 5000
+
+
+def legacy_find_n_character(string: str, char: str, n: int) -> int:
+    count = 0
+    for index, c in enumerate(string):
+        if c == char:
+            count += 1
+            if count == n:
+                return index
+
+    return -1
+
+def legacy_parse_list(msg: str, start: int = 0) -> tuple[int, list]:
+    values = []
+    i = start
+    prev_i = start
+    quote = False
+
+    def convert_type(data: str):
+        data = data.strip()
+        if data.startswith('"') and data.endswith('"'):
+            return data[1:-1]
+        elif data == "true":
+            return True
+        elif data == "false":
+            return False
+        elif data == "nil":
+            return None
+
+        return float(data)
+
+    def append_if_not_empty(m: str):
+        if m.strip() != "":
+            values.append(convert_type(m))
+
+    length = len(msg)
+    while i < length:
+        c = msg[i]
+        if c == ',' and not quote:
+            append_if_not_empty(msg[prev_i:i])
+            prev_i = i+1
+        elif c == '"':
+            quote = not quote
+        elif c == '{' and not quote:
+            i, sub_list = legacy_parse_list(msg, i+1)
+            prev_i = i + 1
+            values.append(sub_list)
+        elif c == '}' and not quote:
+            append_if_not_empty(msg[prev_i:i])
+            return i, values
+
+        i += 1
+
+    values.append(convert_type(msg[prev_i:]))
+    return i-1, values
+
+def legacy_parse_update_message(msg: str) -> tuple[int, list]:
+    index = legacy_find_n_character(msg, ":", 4)
+    msg = msg[index + 1:]
+
+    index = msg.find(":")
+    client_id = int(msg[:index])
+
+    msg = msg[index + 2:-1]
+    _, values = legacy_parse_list(msg)
+
+    return client_id, values
+
+def parse_update_message(msg: str, converters: list) -> tuple[int, list]:
+    client_id, body = _split_update_message(msg)
+    return client_id, parse_values(body, converters)
+
+def _random_page(size: int, strings: bool) -> tuple[str, list]:
+    # mostly analog values and states, with an occasional string, boolean or missing value
+    values = []
+    types = []
+    for _ in range(size):
+        kind = random.random()
+        if strings and kind < 0.1:
+            values.append(f'"text {random.randint(0, 99)}"')
+            types.append(DataType.STRING)
+        elif kind < 0.15:
+            values.append(random.choice(["true", "false", "nil"]))
+            types.append(None)
+        elif kind < 0.5:
+            values.append(str(random.randint(0, 1)))
+            types.append(DataType.NUMBER)
+        else:
+            values.append(f"{random.uniform(-50, 1000):.2f}")
+            types.append(DataType.NUMBER)
+
+    msg = f"resp:192.168.1.10:00000000:clientReport:3:{{{','.join(values)}}}"
+    return msg, types
+
+def _time(func) -> float:
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEATS)) / NUMBER * 1e6
+
+def main() -> None:
+    random.seed(0)
+
+    for size in (16, 64):
+        for strings in (False, True):
+            msg, types = _random_page(size, strings)
+            converters = [value_converter(t) for t in types]
+            assert legacy_parse_update_message(msg) == parse_update_message(msg, converters)
+
+            body = _split_update_message(msg)[1]
+            results = {
+                "legacy update message": _time(lambda: legacy_parse_update_message(msg)),
+                "update message": _time(lambda: parse_update_message(msg, [])),
+                "typed update message": _time(lambda: parse_update_message(msg, converters)),
+                "legacy parse_list": _time(lambda: legacy_parse_list(body)),
+                "parse_list": _time(lambda: parse_list(body)),
+            }
+
+            print(f"{size} entries{' with strings' if strings else ''}:")
+            for name, us in results.items():
+                print(f"  {name:22} {us:8.2f} us")
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,85 @@
 
 import asyncio
+import contextlib
+import hashlib
+import json
+import logging
 import os
 import threading
 import time
+from typing import Any
 
 import tftpy
+from tftpy.TftpPacketTypes import TftpPacketDAT
 
 from .cipher import GrentonCipher
-from .clu_client import CluClient
-from .exceptions import ConfigurationDownloadError, ConfigurationParserError
+from .clu_client import BatchCall, BatchResult, CluClient
+from .dispatcher import UpdateDispatcher
+from .exceptions import ConfigurationDownloadError, ConfigurationParserError, FeatureNotGettableError
+from .gfeature import GFeature
 from .gobject import GObject
+from .hub import CluHub
+from .interface_cache import library_version
 from .interface_manager import InterfaceManager
+from .limiter import AdaptiveLimiter, LimiterStats
 from .parsers.config_json_parser import parse_json
-from .parsers.config_parser import parse_clu_config, CluConfig
-from .parsers.om_parser import parse_om
+from .parsers.config_parser import parse_clu_config, restore_clu_config, snapshot_clu_config, CluConfig
+from .parsers.om_parser import OMEndpoints, OMParser, parse_om
+from .types import CallType
+from .utils import generate_id_hex
+
+_CONFIG_FILES = ("config.json", "om.lua")
+_CONFIG_MANIFEST = "manifest.json"
+_CONFIG_SNAPSHOT = "config-snapshot.json"
+_SNAPSHOT_SCHEMA = 2
 
 
 def verify(ipaddress: str, key: str, iv: str) -> int | None:
     try:
         cipher = GrentonCipher(key, iv)
         clu_client = CluClient(ipaddress, 1234, cipher)
-        
+    except:
+        return None
+
+    try:
         return clu_client.check_alive()
     except:
         return None
+    finally:
+        clu_client.close()
+
+class _OMDownload:
+    # Target of the om.lua transfer, blocks are parsed as they arrive and optionally written to the cache.
+    # Once the parser has seen all objects, the current block is shortened, which ends the transfer early.
+
+    def __init__(self, parser: OMParser, file=None) -> None:
+        self._parser = parser
+        self._file = file
+        self._next_block = 1
+        self.error: Exception | None = None
+
+    def write(self, data: bytes) -> None:
+        if self._file is not None:
+            self._file.write(data)
+
+    def packethook(self, pkt) -> None:
+        # duplicated blocks are dropped by tftpy, they must not be parsed twice
+        if not isinstance(pkt, TftpPacketDAT) or pkt.blocknumber != self._next_block:
+            return
+
+        self._next_block += 1
+        if self.error is not None:
+            return
+
+        try:
+            done = self._parser.feed(pkt.data)
+        except Exception as e:
+            # reported once the transfer is over, a failed parse must not look like a failed download
+            self.error = e
+            return
+
+        if done and len(pkt.data) > 0:
+            pkt.data = pkt.data[:-1]
 
 async def verify_async(ipaddress: str, key: str, iv: str) -> int | None:
     return await asyncio.to_thread(verify, ipaddress, key, iv)
@@ -44,7 +100,14 @@ class GrentonApi:
         timeout: float = 1,
         client_ip: str | None = None,
         client_port: int = 0,
-        max_connections: int = 6
+        max_connections: int = 6,
+        dispatcher: UpdateDispatcher | None = None,
+        max_state_age: float | None = None,
+        interface_manager: InterfaceManager | None = None,
+        force_download: bool = False,
+        cache_config: bool = True,
+        hub: CluHub | None = None,
+        limiter: AdaptiveLimiter | None = None
     ) -> None:
         self._ipaddress = ipaddress
         self._cache_dir = cache_dir
@@ -52,27 +115,54 @@ class GrentonApi:
             os.mkdir(cache_dir)
         
         self._cipher = GrentonCipher(key, iv)
-        self._clu_client = CluClient(ipaddress, 1234, self._cipher, timeout, client_ip=client_ip, client_port=client_port, max_connections=max_connections)
-        
-        clu_sn = self._clu_client.check_alive()
-        self._config_cache_dir = os.path.join(cache_dir, str(clu_sn))
-        if not os.path.exists(self._config_cache_dir):
-            os.mkdir(self._config_cache_dir)
+        self._clu_client = CluClient(ipaddress, 1234, self._cipher, timeout, client_ip=client_ip, client_port=client_port, max_connections=max_connections, dispatcher=dispatcher, max_state_age=max_state_age, hub=hub, limiter=limiter)
+        self._hub = hub
         
-        with self._interface_manager_lock:
-            if self._interface_manager is None:
-                GrentonApi._interface_manager = InterfaceManager(cache_dir)
+        try:
+            clu_sn = self._clu_client.check_alive()
+            self._config_cache_dir = os.path.join(cache_dir, str(clu_sn))
+            if not os.path.exists(self._config_cache_dir):
+                os.mkdir(self._config_cache_dir)
         
-        self._download_config()
-        self._parse_config()
+            if interface_manager is not None:
+                self._interface_manager = interface_manager
+            else:
+                with self._interface_manager_lock:
+                    if GrentonApi._interface_manager is None:
+                        GrentonApi._interface_manager = InterfaceManager(cache_dir)
         
+            self._cache_config = cache_config
+            # hashes of the cached configuration files, known once they match the configuration of the CLU
+            self._config_key: dict[str, str] | None = None
+
+            self.reload_config(force_download)
+        except BaseException:
+            # the client already runs its receiver and refresh threads
+            self._clu_client.close()
+            raise
+
+    def close(self) -> None:
+        self._clu_client.close()
+
+    def reload_config(self, force_download: bool = False) -> None:
+        # objects and their indices are replaced together, the previous configuration stays usable meanwhile
+        self._config_key = None
+        om = self._download_config(force_download)
+        self._parse_config(om)
+        if self._hub is not None:
+            self._hub.register_objects(self._clu_client, self._clu_config.objects_by_id.keys())
+
+    async def reload_config_async(self, force_download: bool = False) -> None:
+        await asyncio.to_thread(self.reload_config, force_download)
+
     @property
     def clu_config(self) -> CluConfig:
         return self._clu_config
         
     @property
     def objects(self) -> list[GObject]:
-        return list(self._clu_config.objects_by_id.values())
+        # a copy, the configuration and its index share the list
+        return list(self._clu_config.objects)
     
     @property
     def objects_by_id(self) -> dict[str, GObject]:
@@ -90,45 +180,190 @@ class GrentonApi:
     
     def get_object_by_name(self, name: str) -> GObject | None:
         return self._clu_config.objects_by_name.get(name, None)
+
+    def query_objects(
+        self,
+        serial_number: int | None = None,
+        name_prefix: str | None = None,
+        feature: str | None = None,
+        settable_feature: str | None = None,
+        gettable_feature: str | None = None,
+        interface_name: str | None = None
+    ) -> list[GObject]:
+        return self._clu_config.query(serial_number, name_prefix, feature, settable_feature, gettable_feature, interface_name)
         
+    @property
+    def limiter_stats(self) -> LimiterStats:
+        return self._clu_client.limiter_stats
+
     async def check_alive_async(self) -> int:
         return await self._clu_client.check_alive_async()
     
     def check_alive(self) -> int:
         return self._clu_client.check_alive()
         
+    def get_values(self, features: list[GFeature]) -> list:
+        values = self._clu_client.get_values(self._bulk_entries(features))
+        return [f.data_type.convert_value(v) for f, v in zip(features, values, strict=True)]
+
+    async def get_values_async(self, features: list[GFeature]) -> list:
+        values = await self._clu_client.get_values_async(self._bulk_entries(features))
+        return [f.data_type.convert_value(v) for f, v in zip(features, values, strict=True)]
+
+    def _bulk_entries(self, features: list[GFeature]) -> list[tuple[str, int]]:
+        for feature in features:
+            if not feature.is_gettable:
+                raise FeatureNotGettableError(feature.name)
+
+        return [(feature.parent, feature.index) for feature in features]
+
+    def execute_batch(self, calls: list[BatchCall]) -> list[BatchResult]:
+        return self._clu_client.execute_batch(calls)
+
+    async def execute_batch_async(self, calls: list[BatchCall]) -> list[BatchResult]:
+        return await self._clu_client.execute_batch_async(calls)
+
+    def set_values(self, values: list[tuple[GFeature, Any]]) -> list[BatchResult]:
+        return self._clu_client.execute_batch(self._set_calls(values))
+
+    async def set_values_async(self, values: list[tuple[GFeature, Any]]) -> list[BatchResult]:
+        return await self._clu_client.execute_batch_async(self._set_calls(values))
+
+    def _set_calls(self, values: list[tuple[GFeature, Any]]) -> list[BatchCall]:
+        calls = []
+        for feature, value in values:
+            feature.validate_value(value)
+            calls.append(BatchCall(feature.parent, feature.index, CallType.SET, (value,)))
+
+        return calls
+
     def register_update_handlers(self):
         self._clu_client.start_client_registration()
         
-    def _download_config(self) -> None:
-        
-        # a trick to speed up the download by ignoring rest of the content of the file
-        def skip_useless_part(data):
-            msg =  data.data.decode()
-            if msg.find("EventsFor") != -1:
-                data.data = data.data[:-1]
-        
+    def _download_config(self, force: bool = False) -> OMEndpoints | None:
+        # the token is claimed before downloading, so a project sent in the meantime is noticed next time
+        token = self._clu_client.claim_config_token(generate_id_hex(16))
+        if not force and self._config_cached(token):
+            return None
+
+        parser = OMParser()
         try:
             tftp_client = tftpy.TftpClient(self._ipaddress, 69, options={"tsize": 0})
             self._clu_client.send_request("req_start_ftp")
             time.sleep(0.01)
             tftp_client.download("a:\\CONFIG.JSON", os.path.join(self._config_cache_dir, "config.json"))
-            tftp_client.download("a:\\om.lua", os.path.join(self._config_cache_dir, "om.lua"), packethook=skip_useless_part)
+
+            om_path = os.path.join(self._config_cache_dir, "om.lua")
+            with open(om_path, "wb") if self._cache_config else contextlib.nullcontext() as f:
+                download = _OMDownload(parser, f)
+                tftp_client.download("a:\\om.lua", download, packethook=download.packethook)
+
             self._clu_client.send_request("req_tftp_stop")
         except:
             raise ConfigurationDownloadError
+
+        if download.error is not None:
+            raise ConfigurationParserError from download.error
+
+        if self._cache_config:
+            self._save_manifest(token)
+
+        try:
+            return parser.close()
+        except:
+            raise ConfigurationParserError
+
+    def _config_cached(self, token: str) -> bool:
+        try:
+            with open(os.path.join(self._config_cache_dir, _CONFIG_MANIFEST), "r") as f:
+                manifest = json.load(f)
+
+            hashes = self._config_hashes()
+            if manifest["token"] != token or manifest["files"] != hashes:
+                return False
+        except (IOError, ValueError, KeyError, TypeError):
+            return False
+
+        self._config_key = hashes
+        return True
+
+    def _config_hashes(self) -> dict[str, str]:
+        hashes = {}
+        for name in _CONFIG_FILES:
+            with open(os.path.join(self._config_cache_dir, name), "rb") as f:
+                hashes[name] = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+        return hashes
+
+    def _save_manifest(self, token: str) -> None:
+        try:
+            manifest = {"token": token, "files": self._config_hashes()}
+            with open(os.path.join(self._config_cache_dir, _CONFIG_MANIFEST), "w") as f:
+                json.dump(manifest, f)
+            self._config_key = manifest["files"]
+        except IOError as e:
+            logging.warning("Unable to save configuration manifest: %s", e)
         
-    def _parse_config(self) -> None:
+    def _parse_config(self, om: OMEndpoints | None = None) -> None:
+        # an unchanged configuration is rebuilt from its snapshot, without parsing the files again
+        if om is None:
+            config = self._load_snapshot()
+            if config is not None:
+                self._clu_config = config
+                return
+
         try:
             config_json = None
-            om = None
             with open(os.path.join(self._config_cache_dir, "config.json"), "r") as f:
                 config_json = parse_json(f)
-            with open(os.path.join(self._config_cache_dir, "om.lua"), "r") as f:
-                om = parse_om(f)
+            if om is None:
+                with open(os.path.join(self._config_cache_dir, "om.lua"), "r") as f:
+                    om = parse_om(f)
                 
             self._clu_config = parse_clu_config(config_json, om, self._interface_manager, self._clu_client)
         except:
             raise ConfigurationParserError
+
+        self._save_snapshot()
+
+    def _load_snapshot(self) -> CluConfig | None:
+        if self._config_key is None:
+            return None
+
+        try:
+            with open(os.path.join(self._config_cache_dir, _CONFIG_SNAPSHOT), "r") as f:
+                snapshot = json.load(f)
+
+            if snapshot.get("schema") != _SNAPSHOT_SCHEMA or snapshot.get("key") != self._config_key:
+                return None
+            # the objects are bound to the interfaces of the catalogue they were resolved with
+            if snapshot.get("interfaces") != self._snapshot_interfaces():
+                return None
+
+            return restore_clu_config(snapshot["config"], self._interface_manager, self._clu_client)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning("Unable to restore configuration snapshot, parsing configuration instead: %s", e)
+            return None
+
+    def _snapshot_interfaces(self) -> list:
+        return [getattr(self._interface_manager, "version", None), library_version()]
+
+    def _save_snapshot(self) -> None:
+        if self._config_key is None:
+            return
+
+        snapshot = {
+            "schema": _SNAPSHOT_SCHEMA,
+            "key": self._config_key,
+            "interfaces": self._snapshot_interfaces(),
+            "config": snapshot_clu_config(self._clu_config),
+        }
+        try:
+            with open(os.path.join(self._config_cache_dir, _CONFIG_SNAPSHOT), "w") as f:
+                json.dump(snapshot, f)
+        except IOError as e:
+            logging.warning("Unable to save configuration snapshot: %s", e)
             
         
\ No newline at end of file
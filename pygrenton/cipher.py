@@ -1,9 +1,26 @@
+import threading
 from base64 import b64decode
+from collections.abc import Iterable
 
 from cryptography.hazmat.backends import default_backend
-from cryptography.hazmat.primitives import padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
+_BLOCK_SIZE = 16
+_PADDING = [bytes((i,)) * i for i in range(_BLOCK_SIZE + 1)]
+
+
+def _to_int(block) -> int:
+    return int.from_bytes(block, "big")
+
+def _xor_block(block, mask: int) -> bytes:
+    return (_to_int(block) ^ mask).to_bytes(_BLOCK_SIZE, "big")
+
+class _ChainedContext:
+    __slots__ = ("context", "chain")
+
+    def __init__(self, context, chain: int) -> None:
+        self.context = context
+        self.chain = chain
 
 class GrentonCipher:
 
@@ -12,25 +29,110 @@ class GrentonCipher:
             self._key = b64decode(key)
         else:
             self._key = key
-            
+
         if isinstance(iv, str):
             self._iv = b64decode(iv)
         else:
             self._iv = iv
-            
-        self._padding = padding.PKCS7(128)
+
         self._cipher = Cipher(
             algorithms.AES(self._key), modes.CBC(self._iv), backend=default_backend()
         )
 
+        # Every message is encrypted with the same iv, but creating a new context per message is slow.
+        # Long-lived contexts keep chaining from the last block they processed instead, so the first
+        # block of each message is xored with (iv ^ last block) to cancel that chaining out.
+        # Contexts are kept per thread, so they never need a lock.
+        self._iv_int = _to_int(self._iv)
+        self._local = threading.local()
+
+    @staticmethod
+    def buffer_size(data_length: int) -> int:
+        # update_into needs one block of headroom on top of the padded output
+        return data_length - data_length % _BLOCK_SIZE + 2 * _BLOCK_SIZE
+
     def encrypt(self, data: bytes) -> bytes:
-        encryptor = self._cipher.encryptor()
-        padder = self._padding.padder()
-        data = padder.update(data) + padder.finalize()
-        return encryptor.update(data) + encryptor.finalize()
+        return self._encrypt(self._contexts()[0], data)
+
+    def encrypt_many(self, messages: Iterable[bytes]) -> list[bytes]:
+        ctx = self._contexts()[0]
+        return [self._encrypt(ctx, data) for data in messages]
+
+    def encrypt_into(self, data: bytes, buf: bytearray | memoryview) -> int:
+        if len(buf) < self.buffer_size(len(data)):
+            raise ValueError("Output buffer is too small.")
+
+        ctx = self._contexts()[0]
+        padded = ctx.context.update_into(self._pad(ctx, data), buf)
+        ctx.chain = _to_int(memoryview(buf)[padded - _BLOCK_SIZE:padded])
+
+        return padded
 
     def decrypt(self, data: bytes) -> bytes:
-        decryptor = self._cipher.decryptor()
-        unpadder = self._padding.unpadder()
-        data = decryptor.update(data) + decryptor.finalize()
-        return unpadder.update(data) + unpadder.finalize()
+        return self._decrypt(self._contexts()[1], data)
+
+    def decrypt_many(self, messages: Iterable[bytes]) -> list[bytes]:
+        ctx = self._contexts()[1]
+        return [self._decrypt(ctx, data) for data in messages]
+
+    def decrypt_into(self, data: bytes, buf: bytearray | memoryview) -> int:
+        length = len(data)
+        self._check_length(length)
+
+        out = memoryview(buf)
+        if len(out) < self.buffer_size(length):
+            raise ValueError("Output buffer is too small.")
+
+        ctx = self._contexts()[1]
+        ctx.context.update_into(data, out)
+        out[:_BLOCK_SIZE] = _xor_block(out[:_BLOCK_SIZE], self._iv_int ^ ctx.chain)
+        ctx.chain = _to_int(data[length - _BLOCK_SIZE:])
+
+        return length - self._check_padding(out, length)
+
+    def _contexts(self) -> tuple[_ChainedContext, _ChainedContext]:
+        try:
+            return self._local.contexts
+        except AttributeError:
+            contexts = (
+                _ChainedContext(self._cipher.encryptor(), self._iv_int),
+                _ChainedContext(self._cipher.decryptor(), self._iv_int),
+            )
+            self._local.contexts = contexts
+            return contexts
+
+    def _pad(self, ctx: _ChainedContext, data: bytes) -> bytearray:
+        block = bytearray(data)
+        block += _PADDING[_BLOCK_SIZE - len(data) % _BLOCK_SIZE]
+        block[:_BLOCK_SIZE] = _xor_block(block[:_BLOCK_SIZE], self._iv_int ^ ctx.chain)
+
+        return block
+
+    def _encrypt(self, ctx: _ChainedContext, data: bytes) -> bytes:
+        encrypted = ctx.context.update(self._pad(ctx, data))
+        ctx.chain = _to_int(encrypted[-_BLOCK_SIZE:])
+
+        return encrypted
+
+    def _decrypt(self, ctx: _ChainedContext, data: bytes) -> bytes:
+        length = len(data)
+        self._check_length(length)
+
+        decrypted = ctx.context.update(data)
+        decrypted = _xor_block(decrypted[:_BLOCK_SIZE], self._iv_int ^ ctx.chain) + decrypted[_BLOCK_SIZE:]
+        ctx.chain = _to_int(data[-_BLOCK_SIZE:])
+
+        return decrypted[:length - self._check_padding(decrypted, length)]
+
+    @staticmethod
+    def _check_length(length: int) -> None:
+        if length == 0 or length % _BLOCK_SIZE != 0:
+            raise ValueError("Encrypted data length must be a non-zero multiple of the block size.")
+
+    @staticmethod
+    def _check_padding(decrypted, length: int) -> int:
+        pad = decrypted[length - 1]
+        if pad < 1 or pad > _BLOCK_SIZE or decrypted[length - pad:length] != _PADDING[pad]:
+            raise ValueError("Invalid padding bytes.")
+
+        return pad
@@ -1,55 +1,305 @@
 import asyncio
 import logging
+import re
 import socket
 import threading
 import time
-from collections.abc import Callable, Iterable
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass, field
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 from .cipher import GrentonCipher
+from .dispatcher import ThreadPoolDispatcher, UpdateDispatcher
+from .limiter import AdaptiveLimiter, LimiterStats
+from .page_state import PageState
+from .scheduler import RefreshScheduler, RefreshStats
+from .exceptions import UnexpectedResponseError
+from .types import CallType, DataType
+from .transport import AsyncCluTransport, request_id
 from .utils import (
+    close_socket,
     extract_payload,
     find_n_character,
     generate_id_hex,
     get_host_ip,
-    parse_list,
+    parse_values,
+    value_converter,
 )
 
+if TYPE_CHECKING:
+    from .hub import CluHub
+
 _LOGGER = logging.getLogger(__name__)
 
 PAGE_REFRESH_DELAY = 0.1
-
-def _parse_update_message(msg: str) -> tuple[int, list]:
+MAX_PACKET_SIZE = 1024
+
+# rough upper bounds used to keep bulk requests and their responses within a single datagram
+_REQUEST_OVERHEAD = 48
+_RESPONSE_OVERHEAD = 48
+_BULK_VALUE_SIZE = 24
+# results of calls are mostly error messages, which would hardly say anything in 24 bytes
+_BATCH_VALUE_SIZE = 64
+_UPDATE_VALUE_SIZE = _BULK_VALUE_SIZE + 1
+# pushed values aren't cut by the CLU, so strings and values of unknown type get a larger share
+_UPDATE_STRING_SIZE = 64 + 1
+_NUMERIC_TYPES = frozenset((DataType.NUMBER, DataType.INTEGER, DataType.ENUM, DataType.TIMESTAMP))
+_MAX_CLIENT_ID_SIZE = 5
+
+_MISSING = object()
+# escapes of enc(), see _lua_encode_value
+_ESCAPED = re.compile("%(22|25)")
+_GARBAGE_COLLECTOR_JOB = "collectgarbage"
+_MAX_CONNECTIONS_LIMIT = 32
+
+# lives only as long as the Lua state of the CLU, which restarts whenever a project is sent
+_CONFIG_TOKEN = "PYGRENTON_CONFIG_TOKEN"
+
+def _lua_encode_value(max_size: int) -> str:
+    # Quotes would end the string in the response, so they and the escape character are sent as %22 and
+    # %25. Strings that would take more than max_size are cut and wrapped in a list, which no other value
+    # is, so the response keeps its size and the cut is recognised. A cut escape or UTF-8 character is dropped.
+    max_length = max_size - 4
+    return (
+        "local function enc(v) local t = type(v) "
+        "if t == 'string' then v = v:gsub('[%%\"]', {['%'] = '%25', ['\"'] = '%22'}) "
+        f"if #v <= {max_length + 2} then return '\"' .. v .. '\"' end "
+        f"return '{{\"' .. v:sub(1, {max_length}):gsub('%%%x?$', ''):gsub('[\\192-\\255][\\128-\\191]*$', '') .. '\"}}' "
+        "elseif t == 'number' or t == 'boolean' then return tostring(v) end "
+        "return 'nil' end "
+    )
+
+def _register_entry_size(entry: "FeatureEntry") -> int:
+    return len(entry.object_id) + len(str(entry.index)) + 4
+
+def _update_entry_size(entry: "FeatureEntry") -> int:
+    return _UPDATE_VALUE_SIZE if entry.data_type in _NUMERIC_TYPES else _UPDATE_STRING_SIZE
+
+def _split_update_message(msg: str) -> tuple[int, str]:
     index = find_n_character(msg, ":", 4)
     msg = msg[index + 1:]
 
     index = msg.find(":")
     client_id = int(msg[:index])
 
-    msg = msg[index + 2:-1]
-    _, values = parse_list(msg)
+    return client_id, msg[index + 2:-1]
+
+def _parse_lua_response(resp: str, ignore_type: bool) -> str|float|bool:
+    resp = extract_payload(resp)
+
+    if ignore_type:
+        return resp
+
+    i = resp.find(":")
+
+    resp_type = resp[:i]
+    value = resp[i+1:]
+
+    if resp_type == "number":
+        return float(value)
+    if resp_type == "string":
+        return value
+    if resp_type == "boolean":
+        return value == "true"
+    return None
+
+def _lua_escape(code: str) -> str:
+    # a raw line break ends a Lua string literal with a syntax error
+    return code.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n").replace("\r", "\\r")
+
+def _lua_chunk(code: str) -> str:
+    return f'(load("{_lua_escape(code)}")())'
+
+def _lua_literal(value: Any) -> str:
+    if value is None:
+        return "nil"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return f'"{_lua_escape(value)}"'
+    return str(value)
+
+def _bulk_get_payload(entries: list[str]) -> str:
+    return _lua_chunk(
+        _lua_encode_value(_BULK_VALUE_SIZE) +
+        f"local r = {{}} for i, e in ipairs({{{','.join(entries)}}}) do r[i] = enc(e[1]:get(e[2])) end "
+        "return '{' .. table.concat(r, ',') .. '}'"
+    )
+
+def _batch_payload(calls: list[str]) -> str:
+    # every call is {object, method, last argument index, index, args...}
+    return _lua_chunk(
+        _lua_encode_value(_BATCH_VALUE_SIZE) +
+        "local unpack = table.unpack or unpack local r = {} "
+        f"for _, c in ipairs({{{','.join(calls)}}}) do "
+        "local ok, v = pcall(c[1] and c[1][c[2]], c[1], unpack(c, 4, c[3])) "
+        "r[#r + 1] = tostring(ok) r[#r + 1] = enc(v) end "
+        "return '{' .. table.concat(r, ',') .. '}'"
+    )
+
+def _unescape_value(value: Any) -> Any:
+    if isinstance(value, str):
+        return _ESCAPED.sub(lambda match: chr(int(match[1], 16)), value) if "%" in value else value
+    if isinstance(value, list):
+        return [_unescape_value(item) for item in value]
+
+    return value
+
+def _parse_bulk_response(resp: str, count: int) -> list:
+    if not (resp.startswith("{") and resp.endswith("}")):
+        raise UnexpectedResponseError(resp)
+
+    try:
+        values = parse_values(resp[1:-1])
+    except ValueError as e:
+        raise UnexpectedResponseError(resp) from e
+
+    if len(values) != count:
+        raise UnexpectedResponseError(resp)
+
+    return [_unescape_value(value) for value in values]
+
+def _split_chunks(items: list[str], overhead: int, max_items: int) -> Iterator[list[str]]:
+    limit = MAX_PACKET_SIZE - _REQUEST_OVERHEAD - overhead
+
+    chunk = []
+    size = 0
+    for item in items:
+        # items are embedded in load(), which escapes every quote and backslash
+        isize = len(item) + item.count('"') + item.count("\\") + item.count("\n") + item.count("\r") + 1
+        if chunk and (size + isize > limit or len(chunk) >= max_items):
+            yield chunk
+            chunk = []
+            size = 0
+
+        chunk.append(item)
+        size += isize
+
+    if chunk:
+        yield chunk
+
+def _cut_values(values: list) -> list[int]:
+    return [i for i, value in enumerate(values) if isinstance(value, list)]
+
+def _merge_values(values: list, fetched: list) -> list:
+    fetched_iter = iter(fetched)
+    return [next(fetched_iter) if value is _MISSING else value for value in values]
+
+def _execute_payload(object_id: str, index: int, args: tuple) -> str:
+    args_str = ",".join(_lua_literal(arg) for arg in args) if len(args) > 0 else "0"
+    return f"{object_id}:execute({index},{args_str})"
+
+@dataclass
+class BatchCall:
+    object_id: str
+    index: int
+    call: CallType = CallType.EXECUTE
+    args: tuple = ()
 
-    return client_id, values
+    def to_lua(self) -> str:
+        args = self.args
+        if self.call == CallType.EXECUTE and len(args) == 0:
+            args = (0,)
+
+        items = [self.object_id, f'"{self.call.value}"', str(len(args) + 4), str(self.index)]
+        items.extend(_lua_literal(arg) for arg in args)
+        return "{" + ",".join(items) + "}"
 
 @dataclass
+class BatchResult:
+    success: bool
+    value: Any = None
+    truncated: bool = False
+
+def _split_get_chunks(entries: Iterable[tuple[str, int]]) -> list[list[str]]:
+    items = [f"{{{object_id},{index}}}" for object_id, index in entries]
+    max_items = (MAX_PACKET_SIZE - _RESPONSE_OVERHEAD) // (_BULK_VALUE_SIZE + 1)
+    return list(_split_chunks(items, len(_bulk_get_payload([])), max_items))
+
+def _split_batch_chunks(calls: Iterable[BatchCall]) -> list[list[str]]:
+    items = [call.to_lua() for call in calls]
+    max_items = (MAX_PACKET_SIZE - _RESPONSE_OVERHEAD) // (_BATCH_VALUE_SIZE + 7)
+    return list(_split_chunks(items, len(_batch_payload([])), max_items))
+
+def _parse_batch_response(resp: str, count: int) -> list[BatchResult]:
+    values = _parse_bulk_response(resp, 2 * count)
+
+    # a call can't be repeated to get the rest of a cut string, so its beginning is returned
+    results = []
+    for success, value in zip(values[::2], values[1::2], strict=True):
+        if isinstance(value, list):
+            results.append(BatchResult(success, value[0], truncated=True))
+        else:
+            results.append(BatchResult(success, value))
+
+    return results
+
+@dataclass(slots=True)
 class UpdateContext:
     object_id: str
     index: int
     value: Any
 
-@dataclass(eq=True, unsafe_hash=True)
+@dataclass(eq=True, unsafe_hash=True, slots=True)
 class FeatureEntry:
     object_id: str
     index: int
+    data_type: DataType | None = field(default=None, compare=False)
 
-@dataclass
+@dataclass(slots=True)
+class FeatureState:
+    value: Any
+    timestamp: float
+
+@dataclass(slots=True)
 class ClientPage:
     client_id: int
     features: list[FeatureEntry] = field(default_factory=list)
+    converters: list[Callable[[str], Any]] = field(default_factory=list)
     modified: bool = False
     last_mod: float = field(default_factory=time.time)
-    states: list[Any] = field(default_factory=list)
+    last_update: float | None = None
+    state: PageState = field(default_factory=PageState)
+    positions: dict[FeatureEntry, int] = field(default_factory=dict)
+    state_features: list[FeatureEntry] = field(default_factory=list)
+    register_size: int = 0
+    update_size: int = 0
+    revision: int = 0
+    # serializes registrations of the page, without blocking the update receiver
+    lock: threading.Lock = field(default_factory=threading.Lock, compare=False, repr=False)
+
+    def add_feature(self, entry: FeatureEntry) -> None:
+        self.positions[entry] = len(self.features)
+        self.features.append(entry)
+        self.converters.append(value_converter(entry.data_type))
+        self.register_size += _register_entry_size(entry)
+        self.update_size += _update_entry_size(entry)
+        self.revision += 1
+
+    def remove_feature(self, entry: FeatureEntry) -> None:
+        # entries are equal whatever their type, the size depends on the one that was added
+        entry = self.features.pop(self.positions[entry])
+        self.converters = [value_converter(fe.data_type) for fe in self.features]
+        self.positions = {fe: i for i, fe in enumerate(self.features)}
+        self.register_size -= _register_entry_size(entry)
+        self.update_size -= _update_entry_size(entry)
+        self.revision += 1
+
+    def get_state(self, entry: FeatureEntry, max_age: float | None = None) -> FeatureState | None:
+        # the state doesn't match the features until the page is registered again
+        timestamp = self.last_update
+        if self.modified or timestamp is None:
+            return None
+
+        if max_age is not None and time.time() - timestamp > max_age:
+            return None
+
+        position = self.positions.get(entry, None)
+        if position is None or position >= len(self.state):
+            return None
+
+        return FeatureState(self.state[position], timestamp)
 
     def create_payload(self, client_ip: str, client_port: int) -> str:
         features_str = "{" + ",".join([f"{{{fe.object_id},{fe.index}}}" for fe in self.features]) + "}"
@@ -58,6 +308,100 @@ class ClientPage:
     def __hash__(self) -> int:
         return hash(self.client_id)
 
+class PageAllocator:
+
+    def __init__(self, page_size: int | None, register_limit: int, update_limit: int) -> None:
+        self._page_size = page_size
+        self._register_limit = register_limit
+        self._update_limit = update_limit
+
+        self.pages: dict[int, ClientPage] = {}
+        self._open_pages: set[ClientPage] = set()
+
+        # ids of released pages are reused before new ones are handed out
+        self._free_ids: list[int] = []
+        self._next_id = 1
+
+    def fits(self, page: ClientPage, entry: FeatureEntry) -> bool:
+        if self._page_size is not None and len(page.features) >= self._page_size:
+            return False
+
+        return (
+            page.register_size + _register_entry_size(entry) <= self._register_limit
+            and page.update_size + _update_entry_size(entry) <= self._update_limit
+        )
+
+    def allocate(self, entry: FeatureEntry, preferred: Iterable[ClientPage] = ()) -> ClientPage:
+        # pages already being registered again cost no extra round trip
+        for page in preferred:
+            if self.fits(page, entry):
+                return self._use(page, entry)
+
+        # otherwise fill up the fullest page that still has room
+        best = None
+        for page in self._open_pages:
+            if self.fits(page, entry) and (best is None or len(page.features) > len(best.features)):
+                best = page
+
+        if best is not None:
+            best.modified = True
+            return self._use(best, entry)
+
+        return self._use(self._create_page(), entry)
+
+    def release(self, page: ClientPage) -> None:
+        self._open_pages.add(page)
+
+    def free(self, page: ClientPage) -> bool:
+        if len(page.features) > 0:
+            return False
+
+        self._open_pages.discard(page)
+        if self.pages.pop(page.client_id, None) is not None:
+            self._free_ids.append(page.client_id)
+
+        return True
+
+    def _use(self, page: ClientPage, entry: FeatureEntry) -> ClientPage:
+        # the caller adds the entry, after which the page might have no room left even for a number
+        count = len(page.features) + 1
+        if (
+            (self._page_size is not None and count >= self._page_size)
+            or page.update_size + _update_entry_size(entry) + _UPDATE_VALUE_SIZE > self._update_limit
+        ):
+            self._open_pages.discard(page)
+
+        return page
+
+    def _create_page(self) -> ClientPage:
+        if self._free_ids:
+            client_id = self._free_ids.pop()
+        else:
+            client_id = self._next_id
+            self._next_id += 1
+
+        page = ClientPage(client_id)
+
+        self.pages[client_id] = page
+        self._open_pages.add(page)
+
+        return page
+
+class StateStore:
+
+    def __init__(self, pages_index: dict[FeatureEntry, ClientPage]) -> None:
+        self._pages_index = pages_index
+
+    def __contains__(self, entry: FeatureEntry) -> bool:
+        return entry in self._pages_index
+
+    def get(self, entry: FeatureEntry, max_age: float | None = None) -> FeatureState | None:
+        page = self._pages_index.get(entry, None)
+        if page is None:
+            return None
+
+        return page.get_state(entry, max_age)
+
 class CluClient:
 
     def __init__(
@@ -70,36 +414,87 @@ class CluClient:
         client_ip: str | None = None,
         client_port: int = 0,
         max_connections: int = 4,
-        page_size: int = 16
+        page_size: int | None = None,
+        dispatcher: UpdateDispatcher | None = None,
+        max_state_age: float | None = None,
+        refresh_workers: int = 2,
+        refresh_jitter: float = 0.1,
+        hub: "CluHub | None" = None,
+        limiter: AdaptiveLimiter | None = None
     ) -> None:
         self._addr = (ip, port)
         self._timeout = timeout
         self._client_refresh_interval = client_refresh_interval
+        self._hub = hub
 
         if client_ip:
             self._local_ip = client_ip
+        elif hub is not None and hub.client_ip:
+            self._local_ip = hub.client_ip
         else:
             self._local_ip = get_host_ip(ip)
 
         self._cipher = cipher
-        self._page_size = page_size
 
-        self._request_semaphore = threading.Semaphore(max_connections)
+        # max_connections is where the window starts, the limiter adapts it to the load of the CLU
+        if limiter is not None:
+            self._limiter = limiter
+        else:
+            self._limiter = AdaptiveLimiter(max_connections, max_limit=max(max_connections, _MAX_CONNECTIONS_LIMIT))
+        self._async_transport: AsyncCluTransport | None = None
 
         self._client_pages_index: dict[FeatureEntry, ClientPage] = {}
-        self._client_pages: dict[int, ClientPage] = {}
-        self._free_client_pages: set[ClientPage] = set()
         self._handler_map: dict[FeatureEntry, Callable[[UpdateContext], None]] = {}
+        # only a dispatcher created here is closed with the client
+        self._owns_dispatcher = dispatcher is None and hub is None
+        if dispatcher is not None:
+            self._dispatcher = dispatcher
+        elif hub is not None:
+            self._dispatcher = hub.dispatcher
+        else:
+            self._dispatcher = ThreadPoolDispatcher()
 
-        self._update_receiver_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self._update_receiver_socket.bind((self._local_ip, client_port))
-        self._update_receiver_port = self._update_receiver_socket.getsockname()[1]
-        self._update_receiver_thread = threading.Thread(target=self._update_receiver, daemon=True)
-        self._update_receiver_thread.start()
+        # values pushed for subscribed features, used to answer reads without a round trip
+        self._state_store = StateStore(self._client_pages_index)
+        self._max_state_age = max_state_age
+
+        # a hub receives the updates of all its CLUs on one socket and routes them by source address
+        self._update_receiver_socket = None
+        if hub is not None:
+            self._update_receiver_port = hub.port
+        else:
+            self._update_receiver_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self._update_receiver_socket.bind((self._local_ip, client_port))
+            self._update_receiver_port = self._update_receiver_socket.getsockname()[1]
+
+        # pages are sized so both the registration request and the update datagram fit in one packet
+        register_header = len(ClientPage(0).create_payload(self._local_ip, self._update_receiver_port))
+        self._page_allocator = PageAllocator(
+            page_size,
+            MAX_PACKET_SIZE - _REQUEST_OVERHEAD - register_header - _MAX_CLIENT_ID_SIZE,
+            MAX_PACKET_SIZE - _RESPONSE_OVERHEAD - _MAX_CLIENT_ID_SIZE,
+        )
+        self._client_pages = self._page_allocator.pages
 
         self._client_registration_lock = threading.Lock()
-        self._client_refresh_thread = threading.Thread(target=self._refresh_client_pages, daemon=True)
-        self._client_refresh_thread.start()
+        # handlers can register or remove handlers themselves, so updates are dispatched after the
+        # registration lock is released, by one thread at a time to keep them in order
+        self._pending_updates: deque[tuple[FeatureEntry, Callable[[UpdateContext], None], UpdateContext]] = deque()
+        self._dispatching = False
+
+        self._closed = False
+        if hub is not None:
+            self._refresh_scheduler = hub.scheduler
+            hub.attach(self)
+        else:
+            self._update_receiver_thread = threading.Thread(target=self._update_receiver, daemon=True)
+            self._update_receiver_thread.start()
+
+            self._refresh_scheduler = RefreshScheduler(
+                client_refresh_interval, refresh_workers, refresh_jitter, PAGE_REFRESH_DELAY
+            )
+
+        self._refresh_scheduler.add(self._job_key(_GARBAGE_COLLECTOR_JOB), self.run_lua_garbage_collector)
 
     @property
     def clu_ip(self) -> str:
@@ -113,6 +508,47 @@ class CluClient:
     def client_ip(self) -> str:
         return self._local_ip
 
+    @property
+    def dispatcher(self) -> UpdateDispatcher:
+        return self._dispatcher
+
+    @property
+    def state_store(self) -> StateStore:
+        return self._state_store
+
+    @property
+    def limiter_stats(self) -> LimiterStats:
+        return self._limiter.stats
+
+    @property
+    def refresh_stats(self) -> dict[int, RefreshStats]:
+        return {
+            key[1]: stats for key, stats in self._refresh_scheduler.all_stats().items()
+            if key[0] == self._addr and key[1] != _GARBAGE_COLLECTOR_JOB
+        }
+
+    def close(self) -> None:
+        # the CLU drops the registered pages on its own once they are no longer refreshed
+        self._closed = True
+
+        if self._hub is not None:
+            # also removes the jobs of this client from the shared scheduler
+            self._hub.detach(self)
+        else:
+            self._refresh_scheduler.close()
+            close_socket(self._update_receiver_socket)
+
+        if self._owns_dispatcher:
+            self._dispatcher.close()
+
+        transport, self._async_transport = self._async_transport, None
+        if transport is not None:
+            transport.close()
+
+    def _job_key(self, job: int | str) -> tuple:
+        # the scheduler might be shared by the clients of a hub
+        return (self._addr, job)
+
     def send_request(self, msg: str, ignore_response: bool = False) -> str:
         sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         sock.settimeout(self._timeout)
@@ -120,214 +556,384 @@ class CluClient:
         payload = self._cipher.encrypt(msg.encode())
 
         try:
-            with self._request_semaphore:
+            with self._limiter.request(not ignore_response):
                 sock.sendto(payload, self._addr)
                 if not ignore_response:
-                    resp, _ = sock.recvfrom(1024)
+                    resp, _ = sock.recvfrom(MAX_PACKET_SIZE)
                     return self._cipher.decrypt(resp).decode()
         finally:
             sock.close()
 
-    async def send_request_async(self, msg: str):
-        return await asyncio.to_thread(self.send_request, msg)
+    async def send_request_async(self, msg: str, ignore_response: bool = False) -> str | None:
+        req_id = request_id(msg)
+        if req_id is None:
+            # responses to requests without an id can't be matched to their futures
+            return await asyncio.to_thread(self.send_request, msg, ignore_response)
+
+        return await self._get_async_transport().request(msg, req_id, self._timeout, ignore_response)
+
+    def get_values(self, entries: Iterable[tuple[str, int]]) -> list[str|float|bool|None]:
+        values, missing = self._get_cached_values(entries)
+
+        fetched = []
+        for chunk in _split_get_chunks(missing):
+            resp = self.send_lua_request(_bulk_get_payload(chunk), ignore_type=True)
+            fetched.extend(_parse_bulk_response(resp, len(chunk)))
+
+        # strings too long for a bulk response are read on their own
+        for i in _cut_values(fetched):
+            fetched[i] = self.send_lua_request(f"{missing[i][0]}:get({missing[i][1]})")
+
+        return _merge_values(values, fetched)
+
+    async def get_values_async(self, entries: Iterable[tuple[str, int]]) -> list[str|float|bool|None]:
+        values, missing = self._get_cached_values(entries)
+
+        chunks = _split_get_chunks(missing)
+        responses = await asyncio.gather(*[
+            self.send_lua_request_async(_bulk_get_payload(chunk), ignore_type=True) for chunk in chunks
+        ])
+
+        fetched = []
+        for chunk, resp in zip(chunks, responses, strict=True):
+            fetched.extend(_parse_bulk_response(resp, len(chunk)))
+
+        cut = _cut_values(fetched)
+        full = await asyncio.gather(*[
+            self.send_lua_request_async(f"{missing[i][0]}:get({missing[i][1]})") for i in cut
+        ])
+        for i, value in zip(cut, full, strict=True):
+            fetched[i] = value
+
+        return _merge_values(values, fetched)
+
+    def _get_cached_state(self, object_id: str, index: int) -> FeatureState | None:
+        if self._max_state_age is None:
+            return None
+
+        return self._state_store.get(FeatureEntry(object_id, index), self._max_state_age)
+
+    def _get_cached_values(self, entries: Iterable[tuple[str, int]]) -> tuple[list, list[tuple[str, int]]]:
+        values = []
+        missing = []
+        for object_id, index in entries:
+            state = self._get_cached_state(object_id, index)
+            if state is None:
+                values.append(_MISSING)
+                missing.append((object_id, index))
+            else:
+                values.append(state.value)
+
+        return values, missing
+
+    def execute_batch(self, calls: Iterable[BatchCall]) -> list[BatchResult]:
+        results = []
+        for chunk in _split_batch_chunks(calls):
+            resp = self.send_lua_request(_batch_payload(chunk), ignore_type=True)
+            results.extend(_parse_batch_response(resp, len(chunk)))
+
+        return results
+
+    async def execute_batch_async(self, calls: Iterable[BatchCall]) -> list[BatchResult]:
+        chunks = _split_batch_chunks(calls)
+        responses = await asyncio.gather(*[
+            self.send_lua_request_async(_batch_payload(chunk), ignore_type=True) for chunk in chunks
+        ])
+
+        results = []
+        for chunk, resp in zip(chunks, responses, strict=True):
+            results.extend(_parse_batch_response(resp, len(chunk)))
+
+        return results
+
+    def set_values(self, entries: Iterable[tuple[str, int, Any]]) -> list[BatchResult]:
+        return self.execute_batch(BatchCall(object_id, index, CallType.SET, (value,)) for object_id, index, value in entries)
+
+    async def set_values_async(self, entries: Iterable[tuple[str, int, Any]]) -> list[BatchResult]:
+        return await self.execute_batch_async(BatchCall(object_id, index, CallType.SET, (value,)) for object_id, index, value in entries)
 
     def check_alive(self) -> int:
         return int(self.send_lua_request("checkAlive()"), 16)
 
+    def claim_config_token(self, token: str) -> str:
+        # returns the token of the running configuration, the given one is stored when there is none yet
+        code = f"if {_CONFIG_TOKEN} == nil then {_CONFIG_TOKEN} = {_lua_literal(token)} end return {_CONFIG_TOKEN}"
+        return self.send_lua_request(_lua_chunk(code), ignore_type=True)
+
     async def check_alive_async(self) -> int:
-        return await asyncio.to_thread(self.check_alive)
+        return int(await self.send_lua_request_async("checkAlive()"), 16)
 
     def get_value(self, object_id: str, index: int):
+        state = self._get_cached_state(object_id, index)
+        if state is not None:
+            return state.value
+
         return self.send_lua_request(f"{object_id}:get({index})")
 
     async def get_value_async(self, object_id: str, index: int):
-        return await asyncio.to_thread(self.get_value, object_id, index)
+        state = self._get_cached_state(object_id, index)
+        if state is not None:
+            return state.value
+
+        return await self.send_lua_request_async(f"{object_id}:get({index})")
 
     def set_value(self, object_id: str, index: int, value: Any) -> None:
-        self.send_lua_request(f"{object_id}:set({index},{value})")
+        self.send_lua_request(f"{object_id}:set({index},{_lua_literal(value)})")
 
     async def set_value_async(self, object_id: str, index: int, value: Any) -> None:
-        await asyncio.to_thread(self.set_value, object_id, index, value)
+        await self.send_lua_request_async(f"{object_id}:set({index},{_lua_literal(value)})")
 
     def execute_method(self, object_id: str, index: int, *args: Any):
-        args = [f'"{arg}"' if isinstance(arg, str) else str(arg) for arg in args]
-        args_str = ",".join(args) if len(args) > 0 else "0"
-        return self.send_lua_request(f"{object_id}:execute({index},{args_str})")
+        return self.send_lua_request(_execute_payload(object_id, index, args))
 
     async def execute_method_async(self, object_id: str, index: int, *args: Any):
-        return await asyncio.to_thread(self.execute_method, object_id, index, *args)
+        return await self.send_lua_request_async(_execute_payload(object_id, index, args))
 
     # Client registration section
-    def register_value_change_handler(self, object_id: str, index: int|Iterable[int], handler: Callable[[UpdateContext], None]) -> None:
+    def register_value_change_handler(self, object_id: str, index: int|Iterable[int], handler: Callable[[UpdateContext], None], data_type: DataType | None = None) -> None:
         with self._client_registration_lock:
             pages = set()
+            added = []
+            replaced = {}
 
             if isinstance(index, int):
                 index = (index,)
 
             for idx in index:
-                fentry = FeatureEntry(object_id, idx)
+                fentry = FeatureEntry(object_id, idx, data_type)
                 if fentry in self._handler_map:
+                    replaced[fentry] = self._handler_map[fentry]
                     self._handler_map[fentry] = handler
-                    return
+                    continue
 
                 self._handler_map[fentry] = handler
 
-                if len(self._free_client_pages) > 0:
-                    page = self._free_client_pages.pop()
-                    if len(page.features) < self._page_size - 1:
-                        self._free_client_pages.add(page)
-                    page.modified = True
-
-                else:
-                    page = self._create_new_page()
-
-                page.features.append(fentry)
+                page = self._page_allocator.allocate(fentry, pages)
+                page.add_feature(fentry)
                 self._client_pages_index[fentry] = page
+                added.append(fentry)
 
                 pages.add(page)
+                self._refresh_scheduler.add(self._job_key(page.client_id), self._refresh_client_page(page.client_id))
 
+        try:
             for page in pages:
                 self._refresh_page(page)
+        except Exception:
+            # a failed registration leaves no handler behind, the pages go back to their previous features
+            with self._client_registration_lock:
+                self._handler_map.update(replaced)
+                pages = self._discard_features(added)
 
-    async def register_value_change_handler_async(self, object_id: str, index: int|Iterable[int], handler: Callable[[UpdateContext], None]) -> None:
-        await asyncio.to_thread(self.register_value_change_handler, object_id, index, handler)
+            for page in pages:
+                try:
+                    self._release_page(page)
+                except Exception:
+                    _LOGGER.exception("Registration of client page %d failed", page.client_id)
+            raise
+
+    async def register_value_change_handler_async(self, object_id: str, index: int|Iterable[int], handler: Callable[[UpdateContext], None], data_type: DataType | None = None) -> None:
+        await asyncio.to_thread(self.register_value_change_handler, object_id, index, handler, data_type)
 
     def remove_value_change_handler(self, object_id: str, index: int) -> None:
         with self._client_registration_lock:
-            fentry = FeatureEntry(object_id, index)
+            page, = self._discard_features([FeatureEntry(object_id, index)])
+
+        self._release_page(page)
+
+    async def remove_value_change_handler_async(self, object_id: str, index: int) -> None:
+        await asyncio.to_thread(self.remove_value_change_handler, object_id, index)
+
+    def _discard_features(self, entries: Iterable[FeatureEntry]) -> set[ClientPage]:
+        pages = set()
+        for fentry in entries:
             del self._handler_map[fentry]
 
             page = self._client_pages_index.pop(fentry)
-            page.features.remove(fentry)
+            page.remove_feature(fentry)
             page.modified = True
 
-            if len(page.features) == 0:
-                self._free_client_pages.remove(page)
-                self._client_pages.pop(page.client_id)
-            else:
-                self._free_client_pages.add(page)
+            self._page_allocator.release(page)
+            pages.add(page)
 
-            self._refresh_page(page)
+        return pages
 
-    async def remove_value_change_handler_async(self, object_id: str, index: int) -> None:
-        await asyncio.to_thread(self.remove_value_change_handler, object_id, index)
+    def _release_page(self, page: ClientPage) -> None:
+        self._refresh_page(page)
+
+        # the id is reused only once the CLU has seen the empty page
+        with self._client_registration_lock:
+            if self._page_allocator.free(page):
+                self._refresh_scheduler.remove(self._job_key(page.client_id))
 
     def send_lua_request(self, payload: str, ignore_response: bool = False, ignore_type: bool = False) -> str|float|bool:
-        req_id = generate_id_hex()
+        _, msg = self._build_lua_request(payload, ignore_response, ignore_type)
 
-        if not (ignore_type or ignore_response):
-            # basically remote code execution
-            payload = f'(load("result = {payload} return (type(result) .. \\":\\" .. tostring(result))")())'
+        resp = self.send_request(msg, ignore_response)
 
-        payload = f"req:{self._local_ip}:{req_id}:{payload}"
+        if ignore_response:
+            return None
+
+        return _parse_lua_response(resp, ignore_type)
+
+    async def send_lua_request_async(self, payload: str, ignore_response: bool = False, ignore_type: bool = False) -> str|float|bool:
+        transport = self._get_async_transport()
 
-        resp = self.send_request(payload, ignore_response)
+        req_id, msg = self._build_lua_request(payload, ignore_response, ignore_type)
+        while transport.is_pending(req_id):
+            req_id, msg = self._build_lua_request(payload, ignore_response, ignore_type)
+
+        resp = await transport.request(msg, req_id, self._timeout, ignore_response)
 
         if ignore_response:
             return None
 
-        resp = extract_payload(resp)
+        return _parse_lua_response(resp, ignore_type)
 
-        if ignore_type:
-            return resp
+    def _build_lua_request(self, payload: str, ignore_response: bool, ignore_type: bool) -> tuple[str, str]:
+        req_id = generate_id_hex()
 
-        i = resp.find(":")
+        if not (ignore_type or ignore_response):
+            # basically remote code execution
+            payload = _lua_chunk(f'result = {payload} return (type(result) .. ":" .. tostring(result))')
 
-        resp_type = resp[:i]
-        value = resp[i+1:]
+        return req_id, f"req:{self._local_ip}:{req_id}:{payload}"
 
-        if resp_type == "number":
-            return float(value)
-        if resp_type == "string":
-            return value
-        if resp_type == "boolean":
-            return value == "true"
-        return None
+    def _get_async_transport(self) -> AsyncCluTransport:
+        loop = asyncio.get_running_loop()
 
-    async def send_lua_request_async(self, payload: str, ignore_response: bool = False, ignore_type: bool = False) -> str|float|bool:
-        return await asyncio.to_thread(self.send_lua_request, payload, ignore_response, ignore_type)
+        transport = self._async_transport
+        if transport is not None and transport.loop is loop and not transport.is_closed:
+            return transport
+
+        if transport is not None:
+            transport.close()
+
+        transport = AsyncCluTransport(loop, self._addr, self._local_ip, self._cipher, self._limiter)
+        self._async_transport = transport
+
+        return transport
 
     def run_lua_garbage_collector(self) -> None:
         payload = 'collectgarbage("collect")'
         self.send_lua_request(payload, ignore_response=True, ignore_type=True)
 
-    def _refresh_client_pages(self) -> None:
-        while True:
-            with self._client_registration_lock:
-                try:
-                    for page in self._client_pages.values():
-                        self._refresh_page(page)
-                        time.sleep(PAGE_REFRESH_DELAY)
-                except Exception:
-                    _LOGGER.exception("Client page refresh failed")
-
-            self.run_lua_garbage_collector()
+    def _refresh_client_page(self, client_id: int) -> Callable[[], None]:
+        def refresh() -> None:
+            page = self._client_pages.get(client_id, None)
+            if page is not None:
+                self._refresh_page(page)
 
-            time.sleep(self._client_refresh_interval)
+        return refresh
 
     def _update_receiver(self) -> None:
 
-        while True:
+        while not self._closed:
             try:
-                encrypted, _ = self._update_receiver_socket.recvfrom(1024)
-                decrypted = self._cipher.decrypt(encrypted).decode("utf-8")
-
-                msg_time = time.time()
-                with self._client_registration_lock:
-                    self._handle_update_message(decrypted, msg_time)
+                encrypted, _ = self._update_receiver_socket.recvfrom(MAX_PACKET_SIZE)
+                if self._closed:
+                    return
+                self.receive_update(encrypted)
             except Exception:
+                if self._closed:
+                    return
                 _LOGGER.exception("Update receiver exception")
                 continue
 
-    def _handle_update_message(self, message: str, message_timestamp: float) -> None:
-        client_id, values = _parse_update_message(message)
+    def receive_update(self, encrypted: bytes) -> None:
+        decrypted = self._cipher.decrypt(encrypted).decode("utf-8")
+
+        msg_time = time.time()
+        with self._client_registration_lock:
+            self._handle_update_message(decrypted, msg_time)
+
+        self._dispatch_pending()
+
+    def _handle_update_message(self, message: str, message_timestamp: float, registration: bool = False) -> None:
+        client_id, body = _split_update_message(message)
         page = self._client_pages.get(client_id, None)
         if page is None:
             return
 
-        if page.modified:
-            page.states = values
-            page.modified = False
+        # until the registration response arrives, pushed values follow the old feature layout
+        if page.modified and not registration:
+            return
 
-            if page.last_mod > message_timestamp:
-                return
+        if not page.modified and body == page.state.payload:
+            # the same values as last time, nothing to parse
+            page.last_update = message_timestamp
+            return
 
+        values = parse_values(body, page.converters) if body else []
+
+        if page.modified:
+            # features that stayed on the page are only reported when their value changed
+            previous = dict(zip(page.state_features, page.state.values(), strict=False))
+
+            page.state.reset(values, body)
+            page.state_features = list(page.features)
+            page.modified = False
+            page.last_update = message_timestamp
             for entry, value in zip(page.features, values, strict=False):
-                self._procces_update(entry, value)
+                if previous.get(entry, _MISSING) != value:
+                    self._procces_update(entry, value)
 
         else:
-            for entry, _, new_value in filter(lambda x: x[1] != x[2], zip(page.features, page.states, values, strict=False)):
-                self._procces_update(entry, new_value)
-            page.states = values
+            changed = page.state.update(values, body)
+            page.last_update = message_timestamp
+
+            features = page.features
+            for position in changed:
+                if position < len(features):
+                    self._procces_update(features[position], values[position])
 
     def _procces_update(self, entry: FeatureEntry, value: Any) -> None:
         handler = self._handler_map[entry]
-        threading.Thread(target=handler, args=(UpdateContext(entry.object_id, entry.index, value),)).start()
+        self._pending_updates.append((entry, handler, UpdateContext(entry.object_id, entry.index, value)))
 
-    def _create_new_page(self) -> ClientPage:
-        used_ids = self._client_pages.keys()
+    def _dispatch_pending(self) -> None:
+        with self._client_registration_lock:
+            if self._dispatching:
+                # the thread already dispatching picks these up as well
+                return
+            self._dispatching = True
 
-        client_id = 1
-        while client_id in used_ids:
-            client_id += 1
+        while True:
+            with self._client_registration_lock:
+                if not self._pending_updates:
+                    self._dispatching = False
+                    return
+                entry, handler, context = self._pending_updates.popleft()
 
-        page = ClientPage(client_id)
+            # a full dispatcher queue blocks here, where the handlers can still take the lock
+            try:
+                self._dispatcher.dispatch(entry, handler, context)
+            except Exception:
+                _LOGGER.exception("Update dispatch failed")
 
-        self._client_pages[client_id] = page
-        self._free_client_pages.add(page)
+    def _register_page(self, page: ClientPage) -> None:
+        with self._client_registration_lock:
+            payload = page.create_payload(self._local_ip, self._update_receiver_port)
+            revision = page.revision
 
-        return page
+        resp = self.send_lua_request(payload, ignore_type=True)
 
-    def _register_page(self, page: ClientPage) -> None:
-        resp = self.send_lua_request(page.create_payload(self._local_ip, self._update_receiver_port), ignore_type=True)
-        i = resp.find(":")
-        self._handle_update_message(resp[i+1:], time.time())
+        with self._client_registration_lock:
+            # a newer layout is registered by whoever changed the page
+            if page.revision != revision:
+                return
+
+            i = resp.find(":")
+            self._handle_update_message(resp[i+1:], time.time(), registration=True)
 
     def _unregister_page(self, page: ClientPage) -> None:
         self.send_lua_request(f'SYSTEM:clientDestroy("{self._local_ip}",{self._update_receiver_port},{page.client_id})', ignore_response=True)
 
     def _refresh_page(self, page: ClientPage) -> None:
         # self._unregister_page(page)
-        self._register_page(page)
-        page.last_mod = time.time()
+        with page.lock:
+            self._register_page(page)
+            page.last_mod = time.time()
+
+        # outside of the page lock too, a handler may subscribe to a feature of the same page
+        self._dispatch_pending()
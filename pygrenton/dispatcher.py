@@ -0,0 +1,164 @@
+import abc
+import asyncio
+import contextlib
+import logging
+import queue
+import threading
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+def _run_handler(handler: Callable[[Any], None], context: Any) -> None:
+    try:
+        handler(context)
+    except Exception:
+        _LOGGER.exception("Value change handler failed")
+
+@dataclass
+class DispatcherMetrics:
+    queue_depth: int
+    max_queue_depth: int
+    dispatched: int
+    completed: int
+    dropped: int = 0
+
+class UpdateDispatcher(abc.ABC):
+
+    def __init__(self) -> None:
+        self._dispatched = 0
+        self._max_queue_depth = 0
+        self._dropped = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return 0
+
+    @property
+    def completed(self) -> int:
+        return self._dispatched
+
+    @property
+    def metrics(self) -> DispatcherMetrics:
+        return DispatcherMetrics(self.queue_depth, self._max_queue_depth, self._dispatched, self.completed, self._dropped)
+
+    def dispatch(self, key: Hashable, handler: Callable[[Any], None], context: Any) -> None:
+        self._dispatched += 1
+        self._submit(key, handler, context)
+
+        depth = self.queue_depth
+        if depth > self._max_queue_depth:
+            self._max_queue_depth = depth
+
+    # nothing to release unless the dispatcher runs workers of its own
+    def close(self) -> None:  # noqa: B027
+        pass
+
+    @abc.abstractmethod
+    def _submit(self, key: Hashable, handler: Callable[[Any], None], context: Any) -> None:
+        pass
+
+class InlineDispatcher(UpdateDispatcher):
+
+    def _submit(self, key: Hashable, handler: Callable[[Any], None], context: Any) -> None:
+        _run_handler(handler, context)
+
+class ThreadPoolDispatcher(UpdateDispatcher):
+
+    def __init__(self, workers: int = 4, queue_size: int = 1024) -> None:
+        super().__init__()
+
+        # every key always lands on the same worker, which keeps its updates in order
+        self._queues = [queue.Queue(queue_size) for _ in range(workers)]
+        self._completed = [0] * workers
+        self._workers: dict[int, int] = {}
+        self._stop = threading.Event()
+        self._threads = [
+            threading.Thread(target=self._worker, args=(i,), daemon=True) for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+    @property
+    def completed(self) -> int:
+        return sum(self._completed)
+
+    def close(self) -> None:
+        # a worker stops once its current handler returns, updates still queued are dropped. A full queue
+        # gets no stop marker, but its worker isn't waiting for one either.
+        self._stop.set()
+        for q in self._queues:
+            with contextlib.suppress(queue.Full):
+                q.put_nowait(None)
+
+    def _submit(self, key: Hashable, handler: Callable[[Any], None], context: Any) -> None:
+        if self._stop.is_set():
+            # nobody would take it from the queue
+            return
+
+        # blocks when the worker falls behind instead of growing without bounds
+        worker_id = hash(key) % len(self._queues)
+        q = self._queues[worker_id]
+        if self._workers.get(threading.get_ident()) != worker_id:
+            q.put((handler, context))
+            return
+
+        # a handler waiting for room in its own queue would wait forever
+        try:
+            q.put_nowait((handler, context))
+        except queue.Full:
+            self._dropped += 1
+            _LOGGER.warning("Update dropped, the queue of the worker dispatching it is full")
+
+    def _worker(self, worker_id: int) -> None:
+        self._workers[threading.get_ident()] = worker_id
+        q = self._queues[worker_id]
+        while not self._stop.is_set():
+            item = q.get()
+            if item is None:
+                break
+
+            _run_handler(*item)
+            self._completed[worker_id] += 1
+
+        # frees submitters still waiting for room in the queue
+        with contextlib.suppress(queue.Empty):
+            while True:
+                q.get_nowait()
+
+class AsyncioDispatcher(UpdateDispatcher):
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        super().__init__()
+        self._loop = loop
+        self._completed = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self._dispatched - self._completed
+
+    @property
+    def completed(self) -> int:
+        return self._completed
+
+    def _submit(self, key: Hashable, handler: Callable[[Any], None], context: Any) -> None:
+        self._loop.call_soon_threadsafe(self._run, handler, context)
+
+    def _run(self, handler: Callable[[Any], None], context: Any) -> None:
+        if not asyncio.iscoroutinefunction(handler):
+            _run_handler(handler, context)
+            self._completed += 1
+            return
+
+        task = self._loop.create_task(handler(context))
+        task.add_done_callback(self._task_done)
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._completed += 1
+        if not task.cancelled() and task.exception() is not None:
+            _LOGGER.error("Value change handler failed", exc_info=task.exception())
@@ -19,4 +19,16 @@ class ConfigurationDownloadError(Exception):
 class ConfigurationParserError(Exception):
     
     def __init__(self) -> None:
-        super().__init__("Unable to parse configuration.")
\ No newline at end of file
+        super().__init__("Unable to parse configuration.")
+
+class UnexpectedResponseError(Exception):
+
+    def __init__(self, response) -> None:
+        message = f"Unexpected response from CLU: \"{response}\"."
+        super().__init__(message)
+
+class UnknownObjectError(Exception):
+
+    def __init__(self, object_id) -> None:
+        message = f"Object \"{object_id}\" doesn't belong to any known CLU."
+        super().__init__(message)
@@ -1,6 +1,4 @@
 
-import asyncio
-
 from .clu_client import CluClient
 from .exceptions import FeatureNotGettableError, FeatureNotSettableError
 from .interfaces import FeatureInterface
@@ -8,7 +6,9 @@ from .types import DataType
 
 
 class GFeature:
-    
+
+    __slots__ = ("_clu_client", "_object_id", "_interface")
+
     def __init__(self, clu_client: CluClient, object_id: str, interface: FeatureInterface) -> None:
         self._clu_client = clu_client
         self._object_id = object_id
@@ -50,6 +50,12 @@ class GFeature:
     def value_range(self) -> tuple[int, int] | None:
         return self._interface.value_range
 
+    def get_value(self):
+        if not self.is_gettable:
+            raise FeatureNotGettableError(self.name)
+
+        return self.data_type.convert_value(self._clu_client.get_value(self._object_id, self.index))
+
     async def get_value_async(self):
         if not self.is_gettable:
             raise FeatureNotGettableError(self.name)
@@ -58,21 +64,19 @@ class GFeature:
         
         return self.data_type.convert_value(value)
 
-    def get_value(self):
-        return asyncio.get_event_loop().run_until_complete(self.get_value_async())
+    def get_value_mapped(self):
+        return self._map_value(self.get_value())
 
     async def get_value_mapped_async(self):
-        val = await self.get_value_async()
-        
+        return self._map_value(await self.get_value_async())
+
+    def _map_value(self, val):
         if self.enum is None or val not in self.enum.keys():
             return val
         
         return self.enum[val]
     
-    def get_value_mapped(self):
-        return asyncio.get_event_loop().run_until_complete(self.get_value_mapped_async())
-    
-    async def set_value_async(self, value):
+    def validate_value(self, value) -> None:
         if not self.is_settable:
             raise FeatureNotSettableError(self.name)
 
@@ -80,14 +84,17 @@ class GFeature:
             raise ValueError(f"Value: {value} is not in enum: {self.enum}")
         if self.value_range is not None and (value < self.value_range[0] or value > self.value_range[1]):
             raise ValueError(f"Value: {value} is not in value range: ({self.value_range[0]} - {self.value_range[1]})")
-    
-        await self._clu_client.set_value_async(self._object_id, self.index, value)
 
     def set_value(self, value) -> None:
-        asyncio.get_event_loop().run_until_complete(self.set_value_async(value))
+        self.validate_value(value)
+        self._clu_client.set_value(self._object_id, self.index, value)
+
+    async def set_value_async(self, value):
+        self.validate_value(value)
+        await self._clu_client.set_value_async(self._object_id, self.index, value)
         
     def register_handler(self, handler) -> None:
-        self._clu_client.register_value_change_handler(self._object_id, self.index, handler)
+        self._clu_client.register_value_change_handler(self._object_id, self.index, handler, self.data_type)
 
     def remove_handler(self) -> None:
         self._clu_client.remove_value_change_handler(self._object_id, self.index)
@@ -1,5 +1,4 @@
 
-import asyncio
 from typing import Any
 
 from .clu_client import CluClient
@@ -9,6 +8,8 @@ from .types import CallType, DataType
 
 class GMethod:
 
+    __slots__ = ("_clu_client", "_object_id", "_interface")
+
     def __init__(self, clu_client: CluClient, object_id: str, interface: MethodInterface) -> None:
         self._clu_client = clu_client
         self._object_id = object_id
@@ -42,7 +43,31 @@ class GMethod:
     def unit(self) -> str | None:
         return self._interface.unit
 
+    def execute_method(self, *args: Any):
+        self._validate_args(args)
+
+        if self.call_type == CallType.SET:
+            return self._clu_client.set_value(self._object_id, self.index, args[0])
+        if self.call_type == CallType.GET:
+            value = self._clu_client.get_value(self._object_id, self.index)
+        else:
+            value = self._clu_client.execute_method(self._object_id, self.index, *args)
+
+        return self.return_type.convert_value(value)
+
     async def execute_method_async(self, *args: Any):
+        self._validate_args(args)
+
+        if self.call_type == CallType.SET:
+            return await self._clu_client.set_value_async(self._object_id, self.index, args[0])
+        if self.call_type == CallType.GET:
+            value = await self._clu_client.get_value_async(self._object_id, self.index)
+        else:
+            value = await self._clu_client.execute_method_async(self._object_id, self.index, *args)
+
+        return self.return_type.convert_value(value)
+
+    def _validate_args(self, args: tuple) -> None:
         if len(args) != len(self.parameters):
             msg = f"Incorrect number of arguments: expected {len(self.parameters)}, provided {len(args)}"
             raise ValueError(msg)
@@ -53,16 +78,3 @@ class GMethod:
                     raise ValueError(f"\"{type(arg)}\" is incorrect type for argument \"{intr.name}\". Expected a number")
             elif intr.data_type == DataType.STRING and not isinstance(arg, str):
                 raise ValueError(f"\"{type(arg)}\" is incorrect type for argument \"{intr.name}\". Expected a string")
-
-        value = None
-        if self.call_type == CallType.SET:
-            return await self._clu_client.set_value_async(self._object_id, self.parameters, args[0])
-        if self.call_type == CallType.GET:
-            value = await self._clu_client.get_value_async(self._object_id, self.parameters)
-        else:
-            value = await self._clu_client.execute_method_async(self._object_id, self.index, *args)
-
-        return self.return_type.convert_value(value)
-
-    def execute_method(self, *args: Any):
-        return asyncio.get_event_loop().run_until_complete(self.execute_method_async(*args))
@@ -1,6 +1,4 @@
 
-import asyncio
-
 from .clu_client import CluClient
 from .gfeature import GFeature
 from .gmethod import GMethod
@@ -9,6 +7,8 @@ from .interfaces import CluInterface, CluObjectInterface, ModuleObjectInterface
 
 class GObject:
 
+    __slots__ = ("_clu_client", "_name", "_object_id", "_interface", "_obj_class", "_features", "_methods")
+
     def __init__(self, clu_client: CluClient, name: str, object_id: str, interface: CluInterface | CluObjectInterface | ModuleObjectInterface) -> None:
         self._clu_client = clu_client
         self._name = name
@@ -20,8 +20,9 @@ class GObject:
         else:
             self._obj_class = interface.obj_class
 
-        self._features = [GFeature(clu_client, object_id, fint) for fint in interface.features]
-        self._methods = [GMethod(clu_client, object_id, mint) for mint in interface.methods]
+        # wrappers are created on first access, lookups go through the index shared by the interface
+        self._features: list[GFeature | None] | None = None
+        self._methods: list[GMethod | None] | None = None
 
     @property
     def clu_client(self) -> CluClient:
@@ -39,76 +40,90 @@ class GObject:
     def object_class(self) -> int:
         return self._obj_class
 
+    @property
+    def interface(self) -> CluInterface | CluObjectInterface | ModuleObjectInterface:
+        return self._interface
+
     @property
     def object_class_name(self) -> str:
         return self._interface.obj_class
 
     @property
     def features(self) -> list[GFeature]:
-        return self._features
+        return [self._feature(position) for position in range(len(self._interface.features))]
 
     @property
     def methods(self) -> list[GMethod]:
-        return self._methods
+        return [self._method(position) for position in range(len(self._interface.methods))]
 
     def has_feature(self, key: int | str) -> bool:
         if isinstance(key, int):
-            return self.get_feature_by_index(key) is not None
+            return key in self._interface.members.feature_indices
         if isinstance(key, str):
-            return self.get_feature_by_name(key) is not None
+            return key in self._interface.members.feature_names
 
         raise TypeError("Key must either be an int or a string.")
 
     def get_feature_by_name(self, name: str) -> GFeature | None:
-        for feature in self._features:
-            if feature.name == name:
-                return feature
-
-        return None
+        position = self._interface.members.feature_names.get(name, None)
+        return self._feature(position) if position is not None else None
 
     def get_feature_by_index(self, index: int) -> GFeature | None:
-        for feature in self._features:
-            if feature.index == index:
-                return feature
-
-        return None
+        position = self._interface.members.feature_indices.get(index, None)
+        return self._feature(position) if position is not None else None
 
     def has_method(self, key: int | str) -> bool:
         if isinstance(key, int):
-            return self.get_method_by_index(key) is not None
+            return key in self._interface.members.method_indices
         if isinstance(key, str):
-            return self.get_method_by_name(key) is not None
+            return key in self._interface.members.method_names
 
         raise TypeError("Key must either be an int or a string.")
 
     def get_method_by_name(self, name: str) -> GMethod | None:
-        for method in self._methods:
-            if method.name == name:
-                return method
-
-        return None
+        position = self._interface.members.method_names.get(name, None)
+        return self._method(position) if position is not None else None
 
     def get_method_by_index(self, index: int) -> GMethod | None:
-        for method in self._methods:
-            if method.index == index:
-                return method
+        position = self._interface.members.method_indices.get(index, None)
+        return self._method(position) if position is not None else None
+
+    def _feature(self, position: int) -> GFeature:
+        features = self._features
+        if features is None:
+            features = self._features = [None] * len(self._interface.features)
+
+        feature = features[position]
+        if feature is None:
+            feature = features[position] = GFeature(self._clu_client, self._object_id, self._interface.features[position])
+
+        return feature
 
-        return None
+    def _method(self, position: int) -> GMethod:
+        methods = self._methods
+        if methods is None:
+            methods = self._methods = [None] * len(self._interface.methods)
+
+        method = methods[position]
+        if method is None:
+            method = methods[position] = GMethod(self._clu_client, self._object_id, self._interface.methods[position])
+
+        return method
+
+    def get_value(self, index: int):
+        return self._clu_client.get_value(self._object_id, index)
 
     async def get_value_async(self, index: int):
         return await self._clu_client.get_value_async(self._object_id, index)
 
-    def get_value(self, index: int):
-        return asyncio.get_event_loop().run_until_complete(self.get_value_async(index))
+    def set_value(self, index: int, value) -> None:
+        self._clu_client.set_value(self._object_id, index, value)
 
     async def set_value_async(self, index: int, value) -> None: 
         await self._clu_client.set_value_async(self._object_id, index, value)
 
-    def set_value(self, index: int, value) -> None:
-        asyncio.get_event_loop().run_until_complete(self.set_value_async(index, value))
+    def execute_method(self, index: int, *args):
+        return self._clu_client.execute_method(self._object_id, index, *args)
 
     async def execute_method_async(self, index: int, *args):
-        return await self._clu_client.execute_method_async(self._object_id, index, args)
-
-    def execute_method(self, index: int, *args):
-        return asyncio.get_event_loop().run_until_complete(self.execute_method_async(index, args))
\ No newline at end of file
+        return await self._clu_client.execute_method_async(self._object_id, index, *args)
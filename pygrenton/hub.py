@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import socket
+import threading
+from collections.abc import Iterable
+from typing import Any
+
+from .clu_client import MAX_PACKET_SIZE, PAGE_REFRESH_DELAY, BatchCall, BatchResult, CluClient
+from .dispatcher import ThreadPoolDispatcher, UpdateDispatcher
+from .exceptions import UnknownObjectError
+from .scheduler import RefreshScheduler
+from .utils import close_socket
+
+_LOGGER = logging.getLogger(__name__)
+
+def _merge(positions: list[tuple[int, int]], results: list[list]) -> list:
+    return [results[group][index] for group, index in positions]
+
+class CluHub:
+    # Shares one update socket, receiver thread, refresh scheduler and dispatcher between the
+    # clients of many CLUs. Pushed updates are routed by the address of the sending CLU, the
+    # client id inside the datagram is resolved by that CLU's client.
+
+    def __init__(
+        self,
+        client_ip: str = "",
+        client_port: int = 0,
+        dispatcher: UpdateDispatcher | None = None,
+        refresh_interval: float = 60,
+        refresh_workers: int = 4,
+        refresh_jitter: float = 0.1
+    ) -> None:
+        self._client_ip = client_ip
+        self._dispatcher = dispatcher if dispatcher is not None else ThreadPoolDispatcher()
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((client_ip, client_port))
+        self._port = self._socket.getsockname()[1]
+
+        self._lock = threading.Lock()
+        self._clients: dict[str, CluClient] = {}
+        self._owners: dict[str, CluClient] = {}
+
+        self._scheduler = RefreshScheduler(refresh_interval, refresh_workers, refresh_jitter, PAGE_REFRESH_DELAY)
+
+        self._closed = False
+        self._receiver_thread = threading.Thread(target=self._receiver, daemon=True)
+        self._receiver_thread.start()
+
+    @property
+    def client_ip(self) -> str:
+        return self._client_ip
+
+    @property
+    def port(self) -> int:
+        return self._port
+
+    @property
+    def dispatcher(self) -> UpdateDispatcher:
+        return self._dispatcher
+
+    @property
+    def scheduler(self) -> RefreshScheduler:
+        return self._scheduler
+
+    @property
+    def clients(self) -> list[CluClient]:
+        with self._lock:
+            return list(self._clients.values())
+
+    def attach(self, client: CluClient) -> None:
+        with self._lock:
+            if client.clu_ip in self._clients and self._clients[client.clu_ip] is not client:
+                raise ValueError(f"A client of CLU {client.clu_ip} is already attached.")
+
+            self._clients[client.clu_ip] = client
+
+    def detach(self, client: CluClient) -> None:
+        with self._lock:
+            if self._clients.get(client.clu_ip, None) is client:
+                del self._clients[client.clu_ip]
+            self._owners = {object_id: owner for object_id, owner in self._owners.items() if owner is not client}
+
+        for key in self._scheduler.all_stats():
+            if key[0] == (client.clu_ip, client.clu_port):
+                self._scheduler.remove(key)
+
+    def register_objects(self, client: CluClient, object_ids: Iterable[str]) -> None:
+        # replaces the objects previously owned by the client, e.g. after its configuration was reloaded
+        with self._lock:
+            owners = {object_id: owner for object_id, owner in self._owners.items() if owner is not client}
+            for object_id in object_ids:
+                owner = owners.get(object_id, None)
+                if owner is not None:
+                    _LOGGER.warning("Object %s exists on CLUs %s and %s, using the latter", object_id, owner.clu_ip, client.clu_ip)
+                owners[object_id] = client
+
+            self._owners = owners
+
+    def client_for(self, object_id: str) -> CluClient:
+        client = self._owners.get(object_id, None)
+        if client is None:
+            raise UnknownObjectError(object_id)
+
+        return client
+
+    def get_value(self, object_id: str, index: int):
+        return self.client_for(object_id).get_value(object_id, index)
+
+    async def get_value_async(self, object_id: str, index: int):
+        return await self.client_for(object_id).get_value_async(object_id, index)
+
+    def set_value(self, object_id: str, index: int, value: Any) -> None:
+        self.client_for(object_id).set_value(object_id, index, value)
+
+    async def set_value_async(self, object_id: str, index: int, value: Any) -> None:
+        await self.client_for(object_id).set_value_async(object_id, index, value)
+
+    def execute_method(self, object_id: str, index: int, *args: Any):
+        return self.client_for(object_id).execute_method(object_id, index, *args)
+
+    async def execute_method_async(self, object_id: str, index: int, *args: Any):
+        return await self.client_for(object_id).execute_method_async(object_id, index, *args)
+
+    def get_values(self, entries: Iterable[tuple[str, int]]) -> list:
+        groups, positions = self._group([(entry[0], entry) for entry in entries])
+        values = [client.get_values(group) for client, group in groups]
+        return _merge(positions, values)
+
+    async def get_values_async(self, entries: Iterable[tuple[str, int]]) -> list:
+        groups, positions = self._group([(entry[0], entry) for entry in entries])
+        values = await asyncio.gather(*[client.get_values_async(group) for client, group in groups])
+        return _merge(positions, values)
+
+    def execute_batch(self, calls: Iterable[BatchCall]) -> list[BatchResult]:
+        groups, positions = self._group([(call.object_id, call) for call in calls])
+        results = [client.execute_batch(group) for client, group in groups]
+        return _merge(positions, results)
+
+    async def execute_batch_async(self, calls: Iterable[BatchCall]) -> list[BatchResult]:
+        groups, positions = self._group([(call.object_id, call) for call in calls])
+        results = await asyncio.gather(*[client.execute_batch_async(group) for client, group in groups])
+        return _merge(positions, results)
+
+    def _group(self, items: list[tuple[str, Any]]) -> tuple[list[tuple[CluClient, list]], list[tuple[int, int]]]:
+        # every CLU gets its items in one call, positions lead the results back to the order of the items
+        groups: list[tuple[CluClient, list]] = []
+        group_of: dict[CluClient, int] = {}
+        positions = []
+        for object_id, item in items:
+            client = self.client_for(object_id)
+            group = group_of.get(client, None)
+            if group is None:
+                group = group_of[client] = len(groups)
+                groups.append((client, []))
+
+            positions.append((group, len(groups[group][1])))
+            groups[group][1].append(item)
+
+        return groups, positions
+
+    def close(self) -> None:
+        for client in self.clients:
+            client.close()
+
+        self._closed = True
+        self._scheduler.close()
+        self._dispatcher.close()
+        close_socket(self._socket)
+
+    def _receiver(self) -> None:
+        while not self._closed:
+            try:
+                encrypted, addr = self._socket.recvfrom(MAX_PACKET_SIZE)
+                if self._closed:
+                    return
+            except OSError:
+                if self._closed:
+                    return
+                _LOGGER.exception("Hub receiver exception")
+                continue
+
+            client = self._clients.get(addr[0], None)
+            if client is None:
+                _LOGGER.debug("Dropping update from unknown CLU %s", addr[0])
+                continue
+
+            try:
+                client.receive_update(encrypted)
+            except Exception:
+                _LOGGER.exception("Update receiver exception")
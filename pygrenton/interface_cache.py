@@ -0,0 +1,501 @@
+import functools
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+from importlib import metadata
+
+from .interfaces import (
+    CluInterface,
+    CluObjectInterface,
+    FeatureInterface,
+    MethodInterface,
+    ModuleInterface,
+    ModuleObjectInterface,
+    ParameterInterface,
+)
+from .types import CallType, DataType, ModuleObjectType
+
+# Layout (little endian):
+#   header    magic, schema, string count, record count and library version string id
+#   strings   string count + 1 offsets into the utf-8 blob that follows them
+#   records   record count (key string id, offset, length) triples, then the flat int64 table they point into
+# Interfaces are stored as flat sequences of integers, every string is a string id.
+_MAGIC = b"PGIC"
+_SCHEMA = 2
+_HEADER = struct.Struct("<4sHHIII")
+_OFFSET = struct.Struct("<I")
+_STRING_BOUNDS = struct.Struct("<II")
+
+_NONE = -1
+
+_CLU = 1
+_MODULE = 2
+_CLU_OBJECT = 3
+
+_INT = 0
+_STR = 1
+
+# sources of the parsed interfaces, relative to the package
+_PARSER_SOURCES = ("parsers/interfaces_parser.py", "interfaces.py", "interface_cache.py")
+
+@functools.cache
+def library_version() -> str:
+    # a source tree has no installed version, so the parser sources are part of it
+    try:
+        version = metadata.version("pygrenton")
+    except metadata.PackageNotFoundError:
+        version = "unknown"
+
+    digest = hashlib.blake2b(digest_size=8)
+    package = os.path.dirname(os.path.abspath(__file__))
+    for name in _PARSER_SOURCES:
+        try:
+            with open(os.path.join(package, name), "rb") as file:
+                digest.update(file.read())
+        except OSError:
+            return version
+
+    return f"{version}+{digest.hexdigest()}"
+
+class InterfaceCacheError(Exception):
+    pass
+
+class _Encoder:
+
+    def __init__(self, strings: list[str] = ()) -> None:
+        self.strings: dict[str, int] = {}
+        self.data = array("q")
+
+        # strings of copied records keep their ids
+        for value in strings:
+            self.strings.setdefault(value, len(self.strings))
+        if len(self.strings) != len(strings):
+            raise InterfaceCacheError("Duplicate strings in the string table.")
+
+    def string(self, value: str | None) -> int:
+        if value is None:
+            return _NONE
+
+        sid = self.strings.get(value, None)
+        if sid is None:
+            sid = len(self.strings)
+            self.strings[value] = sid
+
+        return sid
+
+    def put(self, *values: int) -> None:
+        self.data.extend(values)
+
+    def put_str(self, value: str | None) -> None:
+        self.data.append(self.string(value))
+
+    def put_key(self, value: int | str) -> None:
+        if isinstance(value, str):
+            self.put(_STR, self.string(value))
+        else:
+            self.put(_INT, value)
+
+    def put_range(self, value_range: tuple | None) -> None:
+        if value_range is None:
+            self.put(_NONE)
+            return
+
+        self.put(len(value_range), *value_range)
+
+    def put_features(self, features: list[FeatureInterface]) -> None:
+        self.put(len(features))
+        for feature in features:
+            self.put_str(feature.name)
+            self.put(feature.index, feature.get, feature.set)
+            self.put_str(feature.data_type.value)
+            self.put_str(feature.unit)
+            self.put_range(feature.value_range)
+
+            if feature.enum is None:
+                self.put(_NONE)
+                continue
+
+            self.put(len(feature.enum))
+            for key, name in feature.enum.items():
+                self.put_key(key)
+                self.put_str(name)
+
+    def put_methods(self, methods: list[MethodInterface]) -> None:
+        self.put(len(methods))
+        for method in methods:
+            self.put_str(method.name)
+            self.put(method.index)
+            self.put_str(method.call.value)
+            self.put_str(method.return_type.value)
+            self.put_str(method.unit)
+
+            self.put(len(method.parameters))
+            for param in method.parameters:
+                self.put_str(param.name)
+                self.put_str(param.data_type.value)
+                self.put_str(param.unit)
+                self.put_range(param.value_range)
+
+                if param.enum is None:
+                    self.put(_NONE)
+                    continue
+
+                self.put(len(param.enum))
+                for value in param.enum:
+                    self.put_key(value)
+
+    def put_clu_object(self, obj: CluObjectInterface) -> None:
+        self.put(_CLU_OBJECT)
+        self.put_str(obj.name)
+        self.put(obj.obj_class, obj.version)
+        self.put_features(obj.features)
+        self.put_methods(obj.methods)
+
+    def put_interface(self, interface) -> None:
+        if isinstance(interface, CluObjectInterface):
+            self.put_clu_object(interface)
+
+        elif isinstance(interface, CluInterface):
+            self.put(_CLU)
+            self.put_str(interface.name)
+            self.put(interface.hw_type, interface.hw_version, interface.fw_type, interface.fw_api_version)
+            self.put_features(interface.features)
+            self.put_methods(interface.methods)
+
+            self.put(len(interface.objects))
+            for obj in interface.objects.values():
+                self.put_clu_object(obj)
+
+        elif isinstance(interface, ModuleInterface):
+            self.put(_MODULE)
+            self.put_str(interface.name)
+            self.put(interface.hw_type, interface.fw_type, interface.fw_api_version)
+
+            self.put(len(interface.objects))
+            for obj in interface.objects.values():
+                self.put_str(obj.name)
+                self.put(obj.obj_class)
+                self.put_str(obj.obj_type.value)
+                self.put_features(obj.features)
+                self.put_methods(obj.methods)
+
+        else:
+            raise TypeError(f"Unsupported interface type: {type(interface).__name__}")
+
+class _Decoder:
+
+    def __init__(self, cache: "InterfaceCache", start: int, end: int) -> None:
+        self._cache = cache
+        self._data = cache._data
+        self._pos = start
+        self._end = end
+
+    def read_int(self) -> int:
+        if self._pos >= self._end:
+            raise InterfaceCacheError("Record out of bounds.")
+
+        value = self._data[self._pos]
+        self._pos += 1
+        return value
+
+    def peek(self) -> int:
+        if self._pos >= self._end:
+            raise InterfaceCacheError("Record out of bounds.")
+
+        return self._data[self._pos]
+
+    def read_count(self) -> int:
+        value = self.read_int()
+        if value < 0 or value > self._end - self._pos:
+            raise InterfaceCacheError("Invalid item count.")
+
+        return value
+
+    def read_str(self) -> str | None:
+        return self._cache._string(self.read_int())
+
+    def read_key(self) -> int | str:
+        kind = self.read_int()
+        return self.read_str() if kind == _STR else self.read_int()
+
+    def read_range(self) -> tuple | None:
+        length = self.read_int()
+        if length == _NONE:
+            return None
+
+        if length < 0 or length > self._end - self._pos:
+            raise InterfaceCacheError("Invalid value range.")
+
+        return tuple(self.read_int() for _ in range(length))
+
+    def features(self) -> list[FeatureInterface]:
+        features = []
+        for _ in range(self.read_count()):
+            name = self.read_str()
+            index = self.read_int()
+            get = bool(self.read_int())
+            set = bool(self.read_int())
+            data_type = DataType(self.read_str())
+            unit = self.read_str()
+            value_range = self.read_range()
+
+            enum = None
+            if self.peek() == _NONE:
+                self._pos += 1
+            else:
+                enum = {}
+                for _ in range(self.read_count()):
+                    key = self.read_key()
+                    enum[key] = self.read_str()
+
+            features.append(FeatureInterface(name, index, get, set, data_type, unit, enum, value_range))
+
+        return features
+
+    def methods(self) -> list[MethodInterface]:
+        methods = []
+        for _ in range(self.read_count()):
+            name = self.read_str()
+            index = self.read_int()
+            call = CallType(self.read_str())
+            return_type = DataType(self.read_str())
+            unit = self.read_str()
+
+            params = []
+            for _ in range(self.read_count()):
+                param_name = self.read_str()
+                data_type = DataType(self.read_str())
+                param_unit = self.read_str()
+                value_range = self.read_range()
+
+                enum = None
+                if self.peek() == _NONE:
+                    self._pos += 1
+                else:
+                    enum = [self.read_key() for _ in range(self.read_count())]
+
+                params.append(ParameterInterface(param_name, data_type, param_unit, enum, value_range))
+
+            methods.append(MethodInterface(name, index, call, return_type, unit, params))
+
+        return methods
+
+    def clu_object(self) -> CluObjectInterface:
+        if self.read_int() != _CLU_OBJECT:
+            raise InterfaceCacheError("Expected a CLU object record.")
+
+        return self.clu_object_body()
+
+    def clu_object_body(self) -> CluObjectInterface:
+        name = self.read_str()
+        obj_class = self.read_int()
+        version = self.read_int()
+        return CluObjectInterface(name, obj_class, version, self.features(), self.methods())
+
+    def interface(self):
+        kind = self.read_int()
+
+        if kind == _CLU_OBJECT:
+            return self.clu_object_body()
+
+        if kind == _CLU:
+            name = self.read_str()
+            hw_type, hw_version, fw_type, fw_api_version = self.read_int(), self.read_int(), self.read_int(), self.read_int()
+            features = self.features()
+            methods = self.methods()
+
+            objects = {}
+            for _ in range(self.read_count()):
+                obj = self.clu_object()
+                objects[obj.obj_class] = obj
+
+            return CluInterface(name, hw_type, hw_version, fw_type, fw_api_version, features, methods, objects)
+
+        if kind == _MODULE:
+            name = self.read_str()
+            hw_type, fw_type, fw_api_version = self.read_int(), self.read_int(), self.read_int()
+
+            objects = {}
+            for _ in range(self.read_count()):
+                obj_name = self.read_str()
+                obj_class = self.read_int()
+                obj_type = ModuleObjectType(self.read_str())
+                objects[obj_class] = ModuleObjectInterface(obj_name, obj_class, obj_type, self.features(), self.methods())
+
+            return ModuleInterface(name, hw_type, fw_type, fw_api_version, objects)
+
+        raise InterfaceCacheError(f"Unknown record kind: {kind}.")
+
+class InterfaceCache:
+    # Records are decoded only when requested, straight from the memory mapped file.
+    # Every offset and count is checked, so a corrupted or foreign file is rejected instead of trusted.
+
+    def __init__(self, path: str) -> None:
+        self._decoded: dict[str, object] = {}
+        self._string_cache: dict[int, str] = {}
+
+        with open(path, "rb") as file:
+            try:
+                self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise InterfaceCacheError("Empty cache file.") from e
+
+        try:
+            self._open()
+        except (InterfaceCacheError, struct.error, ValueError, TypeError, UnicodeDecodeError, IndexError) as e:
+            self.close()
+            raise InterfaceCacheError(str(e)) from e
+
+    def _open(self) -> None:
+        if sys.byteorder != "little":
+            raise InterfaceCacheError("Cache files are only read on little endian machines.")
+
+        mm = self._mmap
+        if len(mm) < _HEADER.size:
+            raise InterfaceCacheError("Truncated cache header.")
+
+        magic, schema, _, string_count, record_count, library_sid = _HEADER.unpack_from(mm)
+        if magic != _MAGIC or schema != _SCHEMA:
+            raise InterfaceCacheError("Unsupported cache format.")
+
+        self._string_count = string_count
+        self._offsets_start = _HEADER.size
+        self._strings_start = self._offsets_start + 4 * (string_count + 1)
+        if self._strings_start > len(mm):
+            raise InterfaceCacheError("Truncated string table.")
+
+        self._blob_size = _OFFSET.unpack_from(mm, self._offsets_start + 4 * string_count)[0]
+        strings_end = self._strings_start + self._blob_size
+        if strings_end > len(mm):
+            raise InterfaceCacheError("Truncated string table.")
+
+        if self._string(library_sid) != library_version():
+            raise InterfaceCacheError("Cache was written for another library version.")
+
+        data_start = (strings_end + 7) & ~7
+        if (len(mm) - data_start) % 8 != 0 or len(mm) - data_start < 24 * record_count:
+            raise InterfaceCacheError("Truncated record table.")
+
+        # the only view into the map, released in close()
+        self._data = memoryview(mm)[data_start:].cast("q")
+
+        data_size = len(self._data)
+        self._records: dict[str, tuple[int, int]] = {}
+        for i in range(record_count):
+            key_sid, offset, length = self._data[3 * i], self._data[3 * i + 1], self._data[3 * i + 2]
+            if offset < 3 * record_count or length < 0 or offset + length > data_size:
+                raise InterfaceCacheError("Invalid record bounds.")
+            self._records[self._string(key_sid)] = (offset, offset + length)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def keys(self) -> list[str]:
+        return list(self._records)
+
+    def get(self, key: str):
+        interface = self._decoded.get(key, None)
+        if interface is not None:
+            return interface
+
+        bounds = self._records.get(key, None)
+        if bounds is None:
+            return None
+
+        try:
+            interface = _Decoder(self, *bounds).interface()
+        except (ValueError, TypeError, UnicodeDecodeError, IndexError) as e:
+            raise InterfaceCacheError(f"Invalid record {key}: {e}") from e
+
+        self._decoded[key] = interface
+        return interface
+
+    def strings(self) -> list[str]:
+        return [self._string(sid) for sid in range(self._string_count)]
+
+    def raw_record(self, key: str) -> bytes:
+        start, end = self._records[key]
+        return self._data[start:end].tobytes()
+
+    def close(self) -> None:
+        data = self.__dict__.pop("_data", None)
+        if data is not None:
+            data.release()
+        self._mmap.close()
+
+    def _string(self, sid: int) -> str | None:
+        if sid == _NONE:
+            return None
+
+        value = self._string_cache.get(sid, None)
+        if value is None:
+            if sid < 0 or sid >= self._string_count:
+                raise InterfaceCacheError("Invalid string id.")
+
+            start, end = _STRING_BOUNDS.unpack_from(self._mmap, self._offsets_start + 4 * sid)
+            if start > end or end > self._blob_size:
+                raise InterfaceCacheError("Invalid string bounds.")
+
+            value = sys.intern(self._mmap[self._strings_start + start:self._strings_start + end].decode("utf-8"))
+            self._string_cache[sid] = value
+
+        return value
+
+def write_interface_cache(path: str, interfaces: dict[str, object], base: InterfaceCache | None = None) -> None:
+    # Every record of the base cache is copied as it is, without decoding it, and the interfaces are
+    # added to them. The base is closed once copied, as its file is about to be replaced.
+    records = []
+    if base is not None:
+        try:
+            encoder = _Encoder(base.strings())
+            for key in base.keys():
+                start = len(encoder.data)
+                encoder.data.frombytes(base.raw_record(key))
+                records.append((encoder.string(key), start, len(encoder.data) - start))
+        finally:
+            base.close()
+    else:
+        encoder = _Encoder()
+
+    library_sid = encoder.string(library_version())
+
+    # the directory is written in front of the records, with offsets relative to the table start
+    for key, interface in interfaces.items():
+        start = len(encoder.data)
+        encoder.put_interface(interface)
+        records.append((encoder.string(key), start, len(encoder.data) - start))
+
+    directory = array("q")
+    shift = 3 * len(records)
+    for key_sid, start, length in records:
+        directory.extend((key_sid, start + shift, length))
+
+    blobs = [s.encode("utf-8") for s in encoder.strings]
+    offsets = array("I", [0])
+    for blob in blobs:
+        offsets.append(offsets[-1] + len(blob))
+
+    if sys.byteorder != "little":
+        directory.byteswap()
+        encoder.data.byteswap()
+        offsets.byteswap()
+
+    header = _HEADER.pack(_MAGIC, _SCHEMA, 0, len(blobs), len(records), library_sid)
+    strings = offsets.tobytes() + b"".join(blobs)
+    padding = b"\0" * (-(len(header) + len(strings)) % 8)
+
+    # written next to the old cache and swapped in, so readers never see a partial file
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(header)
+        file.write(strings)
+        file.write(padding)
+        file.write(directory.tobytes())
+        file.write(encoder.data.tobytes())
+    os.replace(tmp_path, path)
@@ -1,26 +1,74 @@
 
+import hashlib
 import io
+import json
 import logging
-import pickle
+import os
 import re
+import threading
+import time
+from dataclasses import replace
 from zipfile import ZipFile
 
 import requests
 
-from .interfaces import CluInterface, ModuleInterface
-from .parsers.interfaces_parser import parse_interfaces
+from .interface_cache import InterfaceCache, InterfaceCacheError, library_version, write_interface_cache
+from .interfaces import CluInterface, CluObjectInterface, ModuleInterface
+from .parsers.interfaces_parser import (
+    link_clu_objects,
+    parse_clu_object_xml,
+    parse_clu_xml_unlinked,
+    parse_interface_files,
+    parse_module_xml,
+    read_clu_header,
+    read_clu_object_header,
+    read_module_header,
+)
 
 _OM_INTERFACES_ENDPOINT = "http://om.grenton.com/interfaces/v4/"
 _OM_NEWEST_INTERFACES = "device-interfaces.current"
 
-def _get_newest_verion() -> str:
-    resp = requests.get(_OM_INTERFACES_ENDPOINT + _OM_NEWEST_INTERFACES)
+_INDEX_FILE = "interfaces-index.json"
+_CACHE_FILE = "interfaces.cache"
+_CHECK_FILE = "interfaces-checked.txt"
+_INTERFACES_DIR = "device-interfaces"
+_INDEX_SCHEMA = 2
+
+_OBJECT_KIND = "object_"
+_CLU_KIND = "clu_"
+_MODULE_KIND = "module_"
+
+VERSION_CHECK_TTL = 24 * 60 * 60
+REQUEST_TIMEOUT = 10
+_MIN_REFRESH_DELAY = 60
+
+def _get_newest_verion(endpoint: str = _OM_INTERFACES_ENDPOINT, timeout: float = REQUEST_TIMEOUT) -> str | None:
+    try:
+        resp = requests.get(endpoint + _OM_NEWEST_INTERFACES, timeout=timeout)
+    except requests.RequestException as e:
+        logging.warning("Unable to check the latest version of interfaces: %s", e)
+        return None
+
     result = re.search(r"device.*zip", resp.text)
     if result is None:
         logging.error("Unable to get latest version of interface")
         return None
     return result.group(0)
 
+def _get_last_check(dir) -> float | None:
+    try:
+        with open(dir + "/" + _CHECK_FILE, "r") as check_file:
+            return float(check_file.readline())
+    except (IOError, ValueError):
+        return None
+
+def _save_last_check(dir, timestamp: float) -> None:
+    try:
+        with open(dir + "/" + _CHECK_FILE, "w") as check_file:
+            check_file.write(str(timestamp))
+    except IOError as e:
+        logging.error("Unable to save interfaces check time. Error message: %s", e.strerror)
+
 def _get_current_version(dir) -> str | None:
     try:
         version_file = open(dir + "/interfaces-version.txt", "r")
@@ -28,86 +76,399 @@ def _get_current_version(dir) -> str | None:
     except IOError:
         return None
     
-def _download_interfaces(version, directory) -> None:
-    resp = requests.get(_OM_INTERFACES_ENDPOINT + version)
-    
+def _fetch_interfaces(version, endpoint: str = _OM_INTERFACES_ENDPOINT, timeout: float = REQUEST_TIMEOUT) -> bytes | None:
+    try:
+        resp = requests.get(endpoint + version, timeout=timeout)
+    except requests.RequestException as e:
+        logging.error("Unable to download interfaces: %s", e)
+        return None
+
     if len(resp.content) == 0:
         logging.error("Unable to download interfaces.")
-        return
-    
+        return None
+
+    return resp.content
+
+def _install_interfaces(version, content: bytes, directory) -> None:
     try:
-        with ZipFile(io.BytesIO(resp.content)) as zip:
+        with ZipFile(io.BytesIO(content)) as zip:
             zip.extractall(directory)
-            
+            names = set(zip.namelist())
+
+        # files dropped from the catalogue would otherwise stay indexed forever
+        interfaces_dir = directory + "/" + _INTERFACES_DIR
+        if os.path.isdir(interfaces_dir):
+            for path in os.scandir(interfaces_dir):
+                if path.is_file() and _INTERFACES_DIR + "/" + path.name not in names:
+                    os.remove(path.path)
+
         with open(directory + "/interfaces-version.txt", "w") as version_file:
             version_file.write(version)
     except IOError as e:
         logging.error("Unable to save interfaces. Error message: %s", e.strerror)
-    
+
+def _file_kind(name: str) -> str | None:
+    for kind in (_OBJECT_KIND, _CLU_KIND, _MODULE_KIND):
+        if name.startswith(kind):
+            return kind
+
+    return None
+
+def _read_header(kind: str, file) -> list:
+    if kind == _OBJECT_KIND:
+        return list(read_clu_object_header(file))
+    if kind == _CLU_KIND:
+        return list(read_clu_header(file))
+    return list(read_module_header(file))
+
+def _build_index(directory: str, version: str | None, previous: dict | None = None) -> dict:
+    # Only the headers of every file are read, interfaces are parsed when they are requested.
+    # Files whose content hash didn't change since the previous index keep their entries.
+    files = {}
+    previous_files = previous["files"] if previous is not None else {}
+
+    if not os.path.isdir(directory):
+        logging.error("Interfaces are not available in %s", directory)
+        return _link_index({"schema": _INDEX_SCHEMA, "version": version, "files": files})
+
+    for path in os.scandir(directory):
+        kind = _file_kind(path.name)
+        if kind is None or not path.is_file():
+            continue
+
+        try:
+            with open(path, "rb") as file:
+                content = file.read()
+
+            content_hash = hashlib.blake2b(content, digest_size=16).hexdigest()
+            entry = previous_files.get(path.name, None)
+            if entry is None or entry[1] != content_hash:
+                entry = [kind, content_hash, _read_header(kind, io.BytesIO(content))]
+
+            files[path.name] = entry
+        except (IOError, ValueError, SyntaxError) as e:
+            logging.warning("Unable to index interface file %s: %s", path.name, e)
+
+    return _link_index({"schema": _INDEX_SCHEMA, "version": version, "files": files})
+
+def _link_index(index: dict) -> dict:
+    # lookup tables derived from the file entries, they are not saved
+    clus = {}
+    modules = {}
+    objects = {}
+
+    for filename, (kind, _, header) in index["files"].items():
+        if kind == _OBJECT_KIND:
+            name, obj_version = header
+            objects.setdefault(name, {})[obj_version] = filename
+        elif kind == _CLU_KIND:
+            hw_type, fw_type, fw_api_version, refs = header
+            clus.setdefault(hw_type, []).append((fw_type, fw_api_version, filename, [tuple(ref) for ref in refs]))
+        else:
+            hw_type, fw_type, fw_api_version = header
+            modules.setdefault(hw_type, []).append((fw_type, fw_api_version, filename))
+
+    for entries in (clus, modules):
+        for v in entries.values():
+            v.sort(key=lambda x: x[1])
+
+    index["clus"] = clus
+    index["modules"] = modules
+    index["objects"] = objects
+    return index
+
+def _find_entry(entries: dict[int, list], hw_type: int, fw_type: int, api_version: int) -> tuple | None:
+    candidates = entries.get(hw_type, None)
+    if not candidates:
+        return None
+
+    for entry in candidates:
+        if entry[1] == api_version and entry[0] == fw_type:
+            return entry
+
+    return candidates[-1]
+
 class InterfaceManager:
     #TODO: maybe create database for intefaces
-    _clus: dict[int, list[CluInterface]] = None
-    _modules: dict[int, list[ModuleInterface]] = None
 
-    def __init__(self, cache_dir: str) -> None:
+    def __init__(
+        self,
+        cache_dir: str,
+        endpoint: str = _OM_INTERFACES_ENDPOINT,
+        version_ttl: float | None = VERSION_CHECK_TTL,
+        offline: bool = False,
+        background_refresh: bool = False,
+        timeout: float = REQUEST_TIMEOUT
+    ) -> None:
         self._dir = cache_dir
+        self._interfaces_dir = cache_dir + "/" + _INTERFACES_DIR
+        self._endpoint = endpoint
+        self._version_ttl = version_ttl
+        self._timeout = timeout
+
+        # Interfaces parsed or decoded so far, by cache key. Keys contain the content hash of their
+        # file, so entries of unchanged files stay valid across interfaces versions. CLUs are kept
+        # without their objects, which are linked from the current index into _clus.
+        self._loaded: dict[str, CluInterface | ModuleInterface | CluObjectInterface] = {}
+        self._clus: dict[str, CluInterface] = {}
+        self._parsed_new = False
+        self._preloaded = False
+        self._lock = threading.Lock()
+        self._cache = None
 
         current_version = _get_current_version(cache_dir)
-        newest_version = _get_newest_verion()
-        
-        if current_version != newest_version and newest_version is not None:
-            _download_interfaces(newest_version, cache_dir)
-            self._parse_interfaces()
-            self._save_interface_cache()
-        else:
+
+        # without any local interfaces there is nothing to fall back on, so the first download always blocks
+        if not offline and (current_version is None or not background_refresh) and self._check_due():
+            self._update(current_version)
+            current_version = _get_current_version(cache_dir)
+
+        self._version = current_version
+        self._index = self._load_index(current_version)
+        self._cache = self._open_cache()
+
+        self._refresh_thread = None
+        if not offline and background_refresh:
+            self._refresh_thread = threading.Thread(target=self._background_refresh, daemon=True)
+            self._refresh_thread.start()
+
+    @property
+    def version(self) -> str | None:
+        return self._version
+
+    def check_for_update(self) -> bool:
+        with self._lock:
+            current_version = self._version
+            previous = self._index
+
+        if not self._update(current_version):
+            return False
+
+        version = _get_current_version(self._dir)
+        index = _build_index(self._interfaces_dir, version, previous)
+
+        with self._lock:
+            self._version = version
+            self._index = index
+            self._save_index(index)
+
+            # only interfaces of added or changed files have to be parsed again
+            keys = {self._key(filename) for filename in index["files"]}
+            self._loaded = {key: interface for key, interface in self._loaded.items() if key in keys}
+            self._clus = {}
+
+        if self._preloaded:
+            self.preload()
+
+        return True
+
+    def preload(self, workers: int | None = None) -> None:
+        # parses every interface missing from the cache across a process pool, later lookups only decode
+        with self._lock:
+            index = self._index
+            missing = [
+                filename for filename in index["files"]
+                if self._key(filename) not in self._loaded and (self._cache is None or self._key(filename) not in self._cache)
+            ]
+            self._preloaded = True
+
+        if len(missing) == 0:
+            return
+
+        parsed = parse_interface_files([self._interfaces_dir + "/" + f for f in missing], workers)
+
+        with self._lock:
+            if self._index is not index:
+                return
+
+            for filename in missing:
+                interface, _ = parsed[self._interfaces_dir + "/" + filename]
+                if interface is not None:
+                    self._loaded[self._key(filename)] = interface
+
+            self._parsed_new = True
+            self._save_cache()
+
+    def _check_due(self) -> bool:
+        if self._version_ttl is None:
+            return True
+
+        last_check = _get_last_check(self._dir)
+        return last_check is None or time.time() - last_check >= self._version_ttl
+
+    def _update(self, current_version: str | None) -> bool:
+        newest_version = _get_newest_verion(self._endpoint, self._timeout)
+        if newest_version is None:
+            return False
+
+        _save_last_check(self._dir, time.time())
+        if newest_version == current_version:
+            return False
+
+        content = _fetch_interfaces(newest_version, self._endpoint, self._timeout)
+        if content is None:
+            return False
+
+        # files are replaced in place, so lookups have to wait for the extraction
+        with self._lock:
+            _install_interfaces(newest_version, content, self._dir)
+
+        return True
+
+    def _background_refresh(self) -> None:
+        interval = self._version_ttl if self._version_ttl is not None else VERSION_CHECK_TTL
+        while True:
             try:
-                self._load_interface_cache()
-            except:
-                self._parse_interfaces()
+                if self._check_due():
+                    self.check_for_update()
+            except Exception:
+                logging.exception("Background interfaces refresh failed")
 
-    def get_clu_interface(self, hw_type: int, fw_type: int, api_version: int) -> CluInterface | None:
-        clu_list = self._clus[hw_type]
+            # failed checks are retried sooner than successful ones
+            last_check = _get_last_check(self._dir) or 0
+            time.sleep(max(interval - (time.time() - last_check), _MIN_REFRESH_DELAY))
 
-        if clu_list is None:
+    def get_clu_interface(self, hw_type: int, fw_type: int, api_version: int) -> CluInterface | None:
+        entry = _find_entry(self._index["clus"], hw_type, fw_type, api_version)
+        if entry is None:
             return None
-        
-        for clu in clu_list:
-            if clu.fw_api_version == api_version and clu.fw_type == fw_type:
-                return clu
-            
-        return clu_list[-1]
+
+        with self._lock:
+            return self._load_clu(entry)
 
     def get_module_interface(self, hw_type: int, fw_type: int, api_version: int) -> ModuleInterface | None:
-        mod_list = self._modules[hw_type]
+        entry = _find_entry(self._index["modules"], hw_type, fw_type, api_version)
+        if entry is None:
+            return None
+
+        with self._lock:
+            return self._load_file(entry[2], parse_module_xml)
+
+    def save_cache(self) -> None:
+        # lookups only parse, the cache is written once for a whole batch of them
+        with self._lock:
+            self._save_cache()
+
+    def _load_clu(self, entry: tuple) -> CluInterface:
+        filename, refs = entry[2], entry[3]
+        clu = self._clus.get(filename, None)
+        if clu is not None:
+            return clu
+
+        body = self._load_file(filename, lambda file: parse_clu_xml_unlinked(file)[0])
+        clu = link_clu_objects(replace(body, objects={}), refs, self._objects_repo(refs))
+        self._clus[filename] = clu
 
-        if mod_list is None:
+        return clu
+
+    def _objects_repo(self, refs: list) -> dict[str, list[CluObjectInterface]]:
+        objects_repo: dict[str, list[CluObjectInterface]] = {}
+        for name, version in refs:
+            obj_file = self._index["objects"].get(name, {}).get(version, None)
+            if obj_file is not None:
+                objects_repo.setdefault(name, []).append(self._load_file(obj_file, parse_clu_object_xml))
+
+        return objects_repo
+
+    def _key(self, filename: str) -> str:
+        return filename + ":" + self._index["files"][filename][1]
+
+    def _load_file(self, filename: str, parser):
+        key = self._key(filename)
+        interface = self._loaded.get(key, None)
+        if interface is not None:
+            return interface
+
+        if self._cache is not None:
+            try:
+                interface = self._cache.get(key)
+            except InterfaceCacheError as e:
+                logging.warning("Discarding invalid interface cache: %s", e)
+                self._cache.close()
+                self._cache = None
+
+        if interface is None:
+            with open(self._interfaces_dir + "/" + filename, "rb") as file:
+                interface = parser(file)
+            self._parsed_new = True
+
+        self._loaded[key] = interface
+        return interface
+
+    def _open_cache(self) -> InterfaceCache | None:
+        try:
+            return InterfaceCache(self._dir + "/" + _CACHE_FILE)
+        except FileNotFoundError:
             return None
-        
-        for mod in mod_list:
-            if mod.fw_api_version == api_version and mod.fw_type == fw_type:
-                return mod
-            
-        return mod_list[-1]
-    
-    def _parse_interfaces(self) -> None:
-        clus, modules = parse_interfaces(self._dir + "/device-interfaces")
-        self._clus = clus
-        self._modules = modules
-        self._save_interface_cache()
-    
-    def _save_list(self, list, filename) -> None:
-        with open(self._dir + '/' + filename, 'wb') as file:
-            pickle.dump(list, file)
-    
-    def _save_interface_cache(self) -> None:
-        self._save_list(self._clus, "clus.cache")
-        self._save_list(self._modules, "modules.cache")
-        
-    def _load_list(self, filename) -> list:
-        with open(self._dir + "/" + filename, "rb") as file:
-            return pickle.load(file)
-        
-    def _load_interface_cache(self) -> None:
-        self._clus = self._load_list("clus.cache")
-        self._modules = self._load_list("modules.cache")
-    
\ No newline at end of file
+        except (IOError, InterfaceCacheError) as e:
+            logging.info("Interface cache is not usable, it will be rebuilt: %s", e)
+            return None
+
+    def _save_cache(self) -> None:
+        # the cache only grows when interfaces had to be parsed from xml
+        if not self._parsed_new:
+            return
+
+        keys = {self._key(filename) for filename in self._index["files"]}
+        base = self._cache
+        self._cache = None
+
+        if base is None or all(key in keys for key in base.keys()):
+            # records already in the cache are copied without decoding them
+            interfaces = {key: interface for key, interface in self._loaded.items() if base is None or key not in base}
+        else:
+            # records of files that are no longer part of the catalogue are dropped, along with their strings
+            interfaces = {}
+            try:
+                for key in base.keys():
+                    if key in keys:
+                        interfaces[key] = base.get(key)
+            except InterfaceCacheError as e:
+                logging.warning("Discarding invalid interface cache: %s", e)
+                interfaces = {}
+            interfaces.update(self._loaded)
+
+            base.close()
+            base = None
+
+        try:
+            try:
+                write_interface_cache(self._dir + "/" + _CACHE_FILE, interfaces, base)
+            except InterfaceCacheError as e:
+                logging.warning("Discarding invalid interface cache: %s", e)
+                write_interface_cache(self._dir + "/" + _CACHE_FILE, self._loaded)
+        except IOError as e:
+            logging.error("Unable to save interface cache. Error message: %s", e.strerror)
+
+        self._parsed_new = False
+        self._cache = self._open_cache()
+
+    def _load_index(self, version: str | None) -> dict:
+        previous = None
+        try:
+            with open(self._dir + "/" + _INDEX_FILE, "r") as file:
+                previous = json.load(file)
+            # headers in the index come from the parser as well
+            if (
+                previous.get("schema") != _INDEX_SCHEMA
+                or previous.get("library") != library_version()
+                or not isinstance(previous.get("files"), dict)
+            ):
+                previous = None
+            elif previous.get("version") == version:
+                return _link_index(previous)
+        except (IOError, ValueError):
+            pass
+
+        index = _build_index(self._interfaces_dir, version, previous)
+        self._save_index(index)
+
+        return index
+
+    def _save_index(self, index: dict) -> None:
+        saved = {"schema": index["schema"], "library": library_version(), "version": index["version"], "files": index["files"]}
+        try:
+            with open(self._dir + "/" + _INDEX_FILE, "w") as file:
+                json.dump(saved, file)
+        except IOError as e:
+            logging.error("Unable to save interfaces index. Error message: %s", e.strerror)
@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 from .types import CallType, DataType, ModuleObjectType
 
 
-@dataclass
+@dataclass(slots=True)
 class FeatureInterface:
     name: str
     index: int
@@ -18,7 +18,7 @@ class FeatureInterface:
     enum: dict | None = None
     value_range: tuple[int, int] | None = None
 
-@dataclass
+@dataclass(slots=True)
 class ParameterInterface:
     name: str
     data_type: DataType
@@ -27,7 +27,7 @@ class ParameterInterface:
     enum: list | None = None
     value_range: tuple[int, int] | None = None
 
-@dataclass
+@dataclass(slots=True)
 class MethodInterface:
     name: str
     index: int
@@ -38,8 +38,42 @@ class MethodInterface:
 
     parameters: list[ParameterInterface] = field(default_factory=list)
 
-@dataclass
-class CluObjectInterface:
+@dataclass(slots=True)
+class MemberIndex:
+    # positions in the features and methods lists, the first member wins when keys repeat
+    feature_names: dict[str, int]
+    feature_indices: dict[int, int]
+    method_names: dict[str, int]
+    method_indices: dict[int, int]
+
+def _positions(members: list, key: str) -> dict:
+    positions = {}
+    for position, member in enumerate(members):
+        positions.setdefault(getattr(member, key), position)
+
+    return positions
+
+@dataclass(slots=True)
+class _IndexedInterface:
+    _members: MemberIndex | None = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def members(self) -> MemberIndex:
+        # built on first use and shared by every object of the interface
+        members = self._members
+        if members is None:
+            members = MemberIndex(
+                _positions(self.features, "name"),
+                _positions(self.features, "index"),
+                _positions(self.methods, "name"),
+                _positions(self.methods, "index"),
+            )
+            self._members = members
+
+        return members
+
+@dataclass(slots=True)
+class CluObjectInterface(_IndexedInterface):
     name: str
     obj_class: int
     version: int
@@ -47,8 +81,8 @@ class CluObjectInterface:
     features: list[FeatureInterface] = field(default_factory=list)
     methods: list[MethodInterface] = field(default_factory=list)
 
-@dataclass
-class ModuleObjectInterface:
+@dataclass(slots=True)
+class ModuleObjectInterface(_IndexedInterface):
     name: str
     obj_class: int
     obj_type: ModuleObjectType
@@ -56,7 +90,7 @@ class ModuleObjectInterface:
     features: list[FeatureInterface] = field(default_factory=list)
     methods: list[MethodInterface] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class ModuleInterface:
     name: str
     hw_type: int
@@ -65,8 +99,8 @@ class ModuleInterface:
 
     objects: dict[int, ModuleObjectInterface] = field(default_factory=dict)
 
-@dataclass
-class CluInterface:
+@dataclass(slots=True)
+class CluInterface(_IndexedInterface):
     name: str
     hw_type: int
     hw_version: int
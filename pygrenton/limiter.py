@@ -0,0 +1,266 @@
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Callable, Iterator
+from dataclasses import dataclass, replace
+
+_TIMEOUTS = (TimeoutError, asyncio.TimeoutError)
+# a small window is too few responses to tell congestion from jitter
+_MIN_SLOW_SAMPLES = 16
+
+@dataclass
+class LimiterStats:
+    limit: int = 0
+    in_flight: int = 0
+    queued: int = 0
+    requests: int = 0
+    timeouts: int = 0
+    decreases: int = 0
+    baseline_rtt: float | None = None
+    smoothed_rtt: float | None = None
+    last_queue_wait: float | None = None
+    max_queue_wait: float = 0
+    total_queue_wait: float = 0
+
+    @property
+    def average_queue_wait(self) -> float | None:
+        if self.requests == 0:
+            return None
+
+        return self.total_queue_wait / self.requests
+
+class AdaptiveLimiter:
+    # AIMD window over the requests in flight to one CLU, shared by the sync and async request paths.
+    # A full window grows by one request per round trip. A timeout cuts it, and so does a full window
+    # whose responses keep coming far slower than the baseline RTT. Each window is cut at most once.
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        backoff: float = 0.5,
+        rtt_tolerance: float = 2.0,
+        rtt_smoothing: float = 0.2,
+        baseline_smoothing: float = 0.05,
+        baseline_window: float = 10
+    ) -> None:
+        if not min_limit <= initial_limit <= max_limit:
+            raise ValueError(f"Initial limit {initial_limit} is not between {min_limit} and {max_limit}.")
+
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._backoff = backoff
+        self._rtt_tolerance = rtt_tolerance
+        self._rtt_smoothing = rtt_smoothing
+        self._baseline_smoothing = baseline_smoothing
+        self._baseline_window = baseline_window
+
+        self._lock = threading.Lock()
+        self._limit = float(initial_limit)
+        self._in_flight = 0
+        # callbacks granting a slot to a blocked thread or a waiting coroutine, in arrival order
+        self._waiters: deque[Callable[[], None]] = deque()
+        # requests started before the last decrease can't cause another one
+        self._last_decrease = 0.0
+        self._slow_samples = 0
+        self._cut_by_rtt = False
+        self._slow_rtt = 0.0
+        self._rtt_samples = 0
+        # (time, slowly smoothed RTT) with increasing RTTs, the first one is the minimum of the window
+        self._baseline_samples: deque[tuple[float, float]] = deque()
+        self._stats = LimiterStats(limit=initial_limit)
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def stats(self) -> LimiterStats:
+        with self._lock:
+            return replace(self._stats, limit=int(self._limit), in_flight=self._in_flight, queued=len(self._waiters))
+
+    @contextlib.contextmanager
+    def request(self, sample: bool = True) -> Iterator[None]:
+        start = self.acquire()
+        with self._releasing(start, sample):
+            yield
+
+    @contextlib.asynccontextmanager
+    async def request_async(self, sample: bool = True) -> AsyncIterator[None]:
+        start = await self.acquire_async()
+        with self._releasing(start, sample):
+            yield
+
+    def acquire(self) -> float:
+        queued_at = time.monotonic()
+        with self._lock:
+            if self._has_slot():
+                self._in_flight += 1
+                return self._started(queued_at)
+
+            granted = threading.Event()
+            self._waiters.append(granted.set)
+
+        granted.wait()
+        with self._lock:
+            return self._started(queued_at)
+
+    async def acquire_async(self) -> float:
+        loop = asyncio.get_running_loop()
+        queued_at = time.monotonic()
+        with self._lock:
+            if self._has_slot():
+                self._in_flight += 1
+                return self._started(queued_at)
+
+            future = loop.create_future()
+            waiter = self._future_waiter(loop, future)
+            self._waiters.append(waiter)
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            # a grant still on its way finds the future cancelled and releases the slot itself
+            with self._lock:
+                waiting = waiter in self._waiters
+                if waiting:
+                    self._waiters.remove(waiter)
+            if not waiting and future.done() and not future.cancelled():
+                # granted right before the cancellation
+                self._release_slot()
+            raise
+
+        with self._lock:
+            return self._started(queued_at)
+
+    def release(self, start: float, rtt: float | None = None, timeout: bool = False) -> None:
+        with self._lock:
+            if timeout:
+                self._stats.timeouts += 1
+                self._decrease(start)
+            elif rtt is not None:
+                self._on_rtt(start, rtt)
+
+        self._release_slot()
+
+    @contextlib.contextmanager
+    def _releasing(self, start: float, sample: bool) -> Iterator[None]:
+        # requests without a response give no round trip to learn from
+        try:
+            yield
+        except _TIMEOUTS:
+            self.release(start, timeout=True)
+            raise
+        except BaseException:
+            # other failures say nothing about the load of the CLU
+            self.release(start)
+            raise
+
+        self.release(start, time.monotonic() - start if sample else None)
+
+    def _future_waiter(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future) -> Callable[[], None]:
+        def grant() -> None:
+            if future.done():
+                self._release_slot()
+            else:
+                future.set_result(None)
+
+        def waiter() -> None:
+            try:
+                loop.call_soon_threadsafe(grant)
+            except RuntimeError:
+                # the loop is already closed, nobody will take the slot
+                self._release_slot()
+
+        return waiter
+
+    def _has_slot(self) -> bool:
+        return self._in_flight < int(self._limit) and not self._waiters
+
+    def _started(self, queued_at: float) -> float:
+        start = time.monotonic()
+        wait = start - queued_at
+
+        stats = self._stats
+        stats.requests += 1
+        stats.last_queue_wait = wait
+        stats.total_queue_wait += wait
+        stats.max_queue_wait = max(stats.max_queue_wait, wait)
+
+        return start
+
+    def _release_slot(self) -> None:
+        grants = []
+        with self._lock:
+            self._in_flight -= 1
+            while self._waiters and self._in_flight < int(self._limit):
+                self._in_flight += 1
+                grants.append(self._waiters.popleft())
+
+        for grant in grants:
+            grant()
+
+    def _on_rtt(self, start: float, rtt: float) -> None:
+        stats = self._stats
+        self._update_rtt(stats, rtt)
+
+        if start < self._last_decrease or self._in_flight < int(self._limit):
+            # sent with the window before the last cut, or with a window that isn't full: either way
+            # the RTT says nothing about the current limit
+            return
+
+        if stats.baseline_rtt is not None and stats.smoothed_rtt > stats.baseline_rtt * self._rtt_tolerance:
+            # a few slow or large requests are no congestion, a whole window of slow responses is
+            self._slow_samples += 1
+            if self._slow_samples < max(int(self._limit), _MIN_SLOW_SAMPLES):
+                return
+
+            if not self._cut_by_rtt:
+                self._cut_by_rtt = self._decrease(start)
+            else:
+                # the RTT didn't drop with the window, so it wasn't congestion: the baseline starts over
+                self._cut_by_rtt = False
+                self._slow_samples = 0
+                self._slow_rtt = stats.smoothed_rtt
+                self._baseline_samples.clear()
+                stats.baseline_rtt = None
+        else:
+            self._slow_samples = 0
+            self._cut_by_rtt = False
+            self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+
+    def _update_rtt(self, stats: LimiterStats, rtt: float) -> None:
+        if stats.smoothed_rtt is None:
+            stats.smoothed_rtt = self._slow_rtt = rtt
+        else:
+            stats.smoothed_rtt += self._rtt_smoothing * (rtt - stats.smoothed_rtt)
+            self._slow_rtt += self._baseline_smoothing * (rtt - self._slow_rtt)
+
+        # until the slow average has seen enough responses, it is mostly its first sample
+        self._rtt_samples += 1
+        if self._rtt_samples * self._baseline_smoothing < 1:
+            return
+
+        # the baseline is the lowest slowly smoothed RTT of the last seconds: jitter hardly moves it,
+        # and it follows a CLU that got slower for good once the window has passed
+        now = time.monotonic()
+        window = self._baseline_samples
+        while window and window[-1][1] >= self._slow_rtt:
+            window.pop()
+        window.append((now, self._slow_rtt))
+        while window[0][0] < now - self._baseline_window:
+            window.popleft()
+        stats.baseline_rtt = window[0][1]
+
+    def _decrease(self, start: float) -> bool:
+        if start < self._last_decrease:
+            return False
+
+        self._last_decrease = time.monotonic()
+        self._slow_samples = 0
+        self._limit = max(self._min_limit, self._limit * self._backoff)
+        self._stats.decreases += 1
+        return True
@@ -0,0 +1,153 @@
+import sys
+from bisect import bisect_left
+from collections.abc import Iterable
+
+from .gobject import GObject
+
+
+def _bitset(positions: Iterable[int], size: int) -> int:
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+
+    return int.from_bytes(bits, "little")
+
+def _bitsets(groups: dict, size: int) -> dict:
+    return {key: _bitset(positions, size) for key, positions in groups.items()}
+
+class ObjectIndex:
+    # Every filter maps to a bitset over the objects, so a query is a few integer ANDs. Objects are
+    # kept sorted by name, which makes every name prefix a contiguous range of positions.
+
+    def __init__(self, objects: Iterable[GObject], serial_numbers: dict[str, int]) -> None:
+        self._objects = sorted(objects, key=lambda obj: obj.name)
+        self._names = [obj.name for obj in self._objects]
+        size = len(self._objects)
+        self._all = (1 << size) - 1
+
+        by_serial = {}
+        by_interface = {}
+        features = {}
+        settable = {}
+        gettable = {}
+        for position, obj in enumerate(self._objects):
+            serial_number = serial_numbers.get(obj.object_id, None)
+            if serial_number is not None:
+                by_serial.setdefault(serial_number, []).append(position)
+
+            interface = obj.interface
+            by_interface.setdefault(interface.name, []).append(position)
+
+            # features come straight from the interface, so no wrappers are created
+            for feature in interface.features:
+                features.setdefault(feature.name, []).append(position)
+                if feature.set:
+                    settable.setdefault(feature.name, []).append(position)
+                if feature.get:
+                    gettable.setdefault(feature.name, []).append(position)
+
+        self._by_serial = _bitsets(by_serial, size)
+        self._by_interface = _bitsets(by_interface, size)
+        self._features = _bitsets(features, size)
+        self._settable = _bitsets(settable, size)
+        self._gettable = _bitsets(gettable, size)
+
+    def snapshot(self) -> dict:
+        # bitsets are stored as hex strings, JSON has no integers of this size
+        def hexed(bitsets: dict) -> dict:
+            return {key: format(bits, "x") for key, bits in bitsets.items()}
+
+        return {
+            "order": [obj.object_id for obj in self._objects],
+            "serial_numbers": hexed(self._by_serial),
+            "interfaces": hexed(self._by_interface),
+            "features": hexed(self._features),
+            "settable": hexed(self._settable),
+            "gettable": hexed(self._gettable),
+        }
+
+    @classmethod
+    def restore(cls, snapshot: dict, objects_by_id: dict[str, GObject]) -> "ObjectIndex":
+        def unhexed(bitsets: dict) -> dict:
+            return {key: int(bits, 16) for key, bits in bitsets.items()}
+
+        index = cls.__new__(cls)
+        index._objects = [objects_by_id[object_id] for object_id in snapshot["order"]]
+        index._names = [obj.name for obj in index._objects]
+        index._all = (1 << len(index._objects)) - 1
+
+        index._by_serial = {int(sn): bits for sn, bits in unhexed(snapshot["serial_numbers"]).items()}
+        index._by_interface = unhexed(snapshot["interfaces"])
+        index._features = unhexed(snapshot["features"])
+        index._settable = unhexed(snapshot["settable"])
+        index._gettable = unhexed(snapshot["gettable"])
+
+        return index
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    @property
+    def serial_numbers(self) -> list[int]:
+        return list(self._by_serial.keys())
+
+    @property
+    def interface_names(self) -> list[str]:
+        return list(self._by_interface.keys())
+
+    def query(
+        self,
+        serial_number: int | None = None,
+        name_prefix: str | None = None,
+        feature: str | None = None,
+        settable_feature: str | None = None,
+        gettable_feature: str | None = None,
+        interface_name: str | None = None
+    ) -> list[GObject]:
+        bits = self._all
+        if serial_number is not None:
+            bits &= self._by_serial.get(serial_number, 0)
+        if interface_name is not None:
+            bits &= self._by_interface.get(interface_name, 0)
+        if feature is not None:
+            bits &= self._features.get(feature, 0)
+        if settable_feature is not None:
+            bits &= self._settable.get(settable_feature, 0)
+        if gettable_feature is not None:
+            bits &= self._gettable.get(gettable_feature, 0)
+        if name_prefix is not None and bits:
+            bits &= self._prefix_range(name_prefix)
+
+        return self._select(bits)
+
+    def _prefix_range(self, prefix: str) -> int:
+        names = self._names
+        start = bisect_left(names, prefix)
+        if prefix == "" or prefix[-1] == chr(sys.maxunicode):
+            end = start
+            while end < len(names) and names[end].startswith(prefix):
+                end += 1
+        else:
+            # the smallest string greater than every string starting with the prefix
+            end = bisect_left(names, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+
+        return ((1 << end) - 1) ^ ((1 << start) - 1)
+
+    def _select(self, bits: int) -> list[GObject]:
+        objects = self._objects
+        if bits == self._all:
+            return list(objects)
+
+        result = []
+        position = 0
+        while bits:
+            # skip whole runs of unset bits at once
+            skip = (bits & -bits).bit_length() - 1
+            bits >>= skip
+            position += skip
+
+            result.append(objects[position])
+            bits >>= 1
+            position += 1
+
+        return result
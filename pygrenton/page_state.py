@@ -0,0 +1,101 @@
+from array import array
+from itertools import compress, repeat
+from operator import ne
+from typing import Any
+
+# kind of the value at every position of a page
+_NIL = 0
+_NUMBER = 1
+_OTHER = 2
+
+_KINDS = {float: _NUMBER, type(None): _NIL}
+_NUMBER_MASK = bytes.maketrans(bytes((_NIL, _NUMBER, _OTHER)), bytes((0, 1, 0)))
+_OTHER_MASK = bytes.maketrans(bytes((_NIL, _NUMBER, _OTHER)), bytes((0, 0, 1)))
+
+
+def _changed(old: Any, new: Any) -> bool:
+    # NaN never equals itself, but a NaN that stays NaN is no change
+    return old != new and not (old != old and new != new)
+
+class _Layout:
+    __slots__ = ("types", "kinds", "numbers", "others", "number_mask", "other_mask", "number_positions", "other_positions", "slots")
+
+    def __init__(self, types: tuple, values: list) -> None:
+        # the types are cheaper to compare than the kinds derived from them
+        self.types = types
+        self.kinds = kinds = bytes(map(_KINDS.get, types, repeat(_OTHER)))
+        self.number_mask = kinds.translate(_NUMBER_MASK)
+        self.other_mask = kinds.translate(_OTHER_MASK)
+        self.numbers = array("d", compress(values, self.number_mask))
+        self.others = list(compress(values, self.other_mask))
+
+        self.number_positions = list(compress(range(len(kinds)), self.number_mask))
+        self.other_positions = list(compress(range(len(kinds)), self.other_mask))
+
+        self.slots = array("l", [0]) * len(kinds)
+        for slot, position in enumerate(self.number_positions):
+            self.slots[position] = slot
+        for slot, position in enumerate(self.other_positions):
+            self.slots[position] = slot
+
+    def get(self, position: int) -> Any:
+        kind = self.kinds[position]
+        if kind == _NUMBER:
+            return self.numbers[self.slots[position]]
+        if kind == _OTHER:
+            return self.others[self.slots[position]]
+        return None
+
+class PageState:
+    # Numbers are kept unboxed in a double array, strings and booleans in a separate list,
+    # and the kinds string doubles as a validity mask for missing (nil) values. The payload the
+    # values were parsed from is kept as well, most pushed pages repeat the previous one.
+
+    def __init__(self) -> None:
+        self._layout = _Layout((), [])
+        self.payload: str | None = None
+
+    def __len__(self) -> int:
+        return len(self._layout.kinds)
+
+    def __getitem__(self, position: int) -> Any:
+        return self._layout.get(position)
+
+    def values(self) -> list:
+        layout = self._layout
+        return [layout.get(position) for position in range(len(layout.kinds))]
+
+    def reset(self, values: list, payload: str | None = None) -> None:
+        self._layout = _Layout(tuple(map(type, values)), values)
+        self.payload = payload
+
+    def update(self, values: list, payload: str | None = None) -> list[int]:
+        self.payload = payload
+        old = self._layout
+
+        types = tuple(map(type, values))
+        if types != old.types:
+            self._layout = _Layout(types, values)
+
+            old_values = [old.get(position) for position in range(min(len(old.kinds), len(values)))]
+            return list(compress(range(len(old_values)), map(_changed, old_values, values)))
+
+        # the layout stays, changed values are written in place, each of them at once
+        changed = []
+
+        numbers = list(compress(values, old.number_mask))
+        old_numbers = old.numbers.tolist()
+        if numbers != old_numbers:
+            for slot in compress(range(len(numbers)), map(ne, old_numbers, numbers)):
+                if _changed(old_numbers[slot], numbers[slot]):
+                    old.numbers[slot] = numbers[slot]
+                    changed.append(old.number_positions[slot])
+
+        others = list(compress(values, old.other_mask))
+        if others != old.others:
+            for slot in compress(range(len(others)), map(ne, old.others, others)):
+                old.others[slot] = others[slot]
+                changed.append(old.other_positions[slot])
+            changed.sort()
+
+        return changed
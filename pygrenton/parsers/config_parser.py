@@ -1,14 +1,16 @@
 
+import ipaddress
 import logging
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
 
 from ..clu_client import CluClient
-from ..config_objects import CLUConfig
+from ..config_objects import CLUConfig, ModuleConfig
 from ..gobject import GObject
 from ..interface_manager import InterfaceManager
-from ..interfaces import CluObjectInterface, ModuleObjectInterface
+from ..interfaces import CluInterface, CluObjectInterface, ModuleInterface, ModuleObjectInterface
+from ..object_index import ObjectIndex
 from ..types import ModuleObjectType
-from .om_parser import OMEndpoints
+from .om_parser import CLU, CLUObject, ModuleObject, OMEndpoints
 
 
 @dataclass
@@ -18,7 +20,21 @@ class CluConfig():
     
     objects_by_class: dict[int, list[GObject]]
     objects_by_id: dict[str, GObject]
-    objects_by_name: dict[str, GObject]    
+    objects_by_name: dict[str, GObject]
+
+    objects: list[GObject]
+    index: ObjectIndex
+
+    def query(
+        self,
+        serial_number: int | None = None,
+        name_prefix: str | None = None,
+        feature: str | None = None,
+        settable_feature: str | None = None,
+        gettable_feature: str | None = None,
+        interface_name: str | None = None
+    ) -> list[GObject]:
+        return self.index.query(serial_number, name_prefix, feature, settable_feature, gettable_feature, interface_name)
 
 def parse_clu_config(conf_json: CLUConfig, om: OMEndpoints, interface_manager: InterfaceManager, clu_client: CluClient) -> CluConfig:
     clu_interface = interface_manager.get_clu_interface(conf_json.hw_type, conf_json.fw_type, conf_json.fw_api_version)
@@ -26,6 +42,7 @@ def parse_clu_config(conf_json: CLUConfig, om: OMEndpoints, interface_manager: I
     objects_by_class: dict[int, list[GObject]] = {}
     objects_by_id: dict[str, GObject] = {}
     objects_by_name: dict[str, GObject] = {}
+    serial_numbers: dict[str, int] = {}
     
     def add_object(obj: GObject) -> None:
         if obj.object_class in objects_by_class.keys():
@@ -40,6 +57,9 @@ def parse_clu_config(conf_json: CLUConfig, om: OMEndpoints, interface_manager: I
     add_object(gclu)
 
     for sn, mod_objects in om.module_objects.items():
+        for obj in mod_objects:
+            serial_numbers[obj.object_id] = sn
+
         mod_conf = conf_json.modules[sn]
         mod_int = interface_manager.get_module_interface(mod_conf.hw_type, mod_conf.fw_type, mod_conf.fw_api_version)
         
@@ -74,4 +94,115 @@ def parse_clu_config(conf_json: CLUConfig, om: OMEndpoints, interface_manager: I
         gclu_obj = GObject(clu_client, obj_name, clu_obj.object_id, obj_int)
         add_object(gclu_obj)
 
-    return CluConfig(om, conf_json, objects_by_class, objects_by_id, objects_by_name)
+    # interfaces parsed for this configuration are cached at once, by managers that have a cache
+    save_cache = getattr(interface_manager, "save_cache", None)
+    if save_cache is not None:
+        save_cache()
+
+    objects = list(objects_by_id.values())
+    index = ObjectIndex(objects, serial_numbers)
+
+    return CluConfig(om, conf_json, objects_by_class, objects_by_id, objects_by_name, objects, index)
+
+def _clu_to_list(clu: CLU | None) -> list | None:
+    return [clu.object_id, str(clu.ipaddress)] if clu is not None else None
+
+def _clu_from_list(item: list | None) -> CLU | None:
+    return CLU(item[0], ipaddress.ip_address(item[1])) if item is not None else None
+
+def _interface_ref(obj: GObject, serial_numbers: dict[str, int]) -> list:
+    interface = obj.interface
+    if isinstance(interface, CluInterface):
+        return ["clu"]
+
+    serial_number = serial_numbers.get(obj.object_id, None)
+    if serial_number is not None:
+        return ["module", serial_number]
+
+    return ["clu_object"]
+
+def snapshot_clu_config(config: CluConfig) -> dict:
+    # The resolved objects are stored with a reference to the interface each of them was bound to,
+    # the parsed configuration files only for om_config and conf_json.
+    om = config.om_config
+    conf_json = config.conf_json
+
+    serial_numbers = {obj.object_id: sn for sn, objects in om.module_objects.items() for obj in objects}
+    objects = [
+        [obj.object_id, obj.name, obj.object_class, _interface_ref(obj, serial_numbers)]
+        for obj in config.objects
+    ]
+
+    return {
+        "conf_json": asdict(conf_json),
+        "om": {
+            "this_clu": _clu_to_list(om.this_clu),
+            "external_clus": [_clu_to_list(clu) for clu in om.external_clus],
+            "names": om.names,
+            "clu_objects": [[obj.object_id, obj.object_class] for obj in om.clu_objects],
+            "module_objects": {
+                sn: [[obj.object_id, obj.object_class, obj.object_index] for obj in objects]
+                for sn, objects in om.module_objects.items()
+            },
+        },
+        "objects": objects,
+        "index": config.index.snapshot(),
+    }
+
+def restore_clu_config(snapshot: dict, interface_manager: InterfaceManager, clu_client: CluClient) -> CluConfig:
+    conf = snapshot["conf_json"]
+    modules = {int(sn): ModuleConfig(**module) for sn, module in conf["modules"].items()}
+    conf_json = CLUConfig(**{**conf, "modules": modules})
+
+    om = snapshot["om"]
+    module_objects = {}
+    for sn, objects in om["module_objects"].items():
+        sn = int(sn)
+        module_objects[sn] = [ModuleObject(object_id, object_class, sn, index) for object_id, object_class, index in objects]
+
+    om_config = OMEndpoints(
+        _clu_from_list(om["this_clu"]),
+        [_clu_from_list(clu) for clu in om["external_clus"]],
+        om["names"],
+        [CLUObject(object_id, object_class) for object_id, object_class in om["clu_objects"]],
+        module_objects,
+    )
+
+    clu_interface = interface_manager.get_clu_interface(conf_json.hw_type, conf_json.fw_type, conf_json.fw_api_version)
+    module_interfaces: dict[int, ModuleInterface | None] = {}
+
+    def resolve(object_class: int, ref: list) -> CluInterface | CluObjectInterface | ModuleObjectInterface:
+        kind = ref[0]
+        if kind == "clu":
+            return clu_interface
+
+        if kind == "module":
+            sn = ref[1]
+            if sn not in module_interfaces:
+                mod_conf = conf_json.modules[sn]
+                module_interfaces[sn] = interface_manager.get_module_interface(mod_conf.hw_type, mod_conf.fw_type, mod_conf.fw_api_version)
+
+            mod_int = module_interfaces[sn]
+            if mod_int is None:
+                return ModuleObjectInterface("unknown", object_class, ModuleObjectType.NONE, [], [])
+            return mod_int.objects[object_class]
+
+        obj_int = clu_interface.objects.get(object_class, None)
+        if obj_int is None:
+            return CluObjectInterface("unknown", object_class, 0)
+        return obj_int
+
+    objects_by_class: dict[int, list[GObject]] = {}
+    objects_by_id: dict[str, GObject] = {}
+    objects_by_name: dict[str, GObject] = {}
+
+    for object_id, name, object_class, ref in snapshot["objects"]:
+        obj = GObject(clu_client, name, object_id, resolve(object_class, ref))
+        objects_by_class.setdefault(obj.object_class, []).append(obj)
+        objects_by_id[object_id] = obj
+        objects_by_name[name] = obj
+
+    objects = list(objects_by_id.values())
+    index = ObjectIndex.restore(snapshot["index"], objects_by_id)
+
+    return CluConfig(om_config, conf_json, objects_by_class, objects_by_id, objects_by_name, objects, index)
@@ -1,139 +1,192 @@
 
 import os
 import re
-import xml.dom.minidom as md
-from xml.dom.minidom import Element
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree.ElementTree import Element
 
 from ..interfaces import *
 
 VALUE_RANGE_TEMPLATE = re.compile(r"\d+\s*-\s*\d+")
 
-def _parse_feature(elm: Element) -> FeatureInterface:
-    name = elm.getAttribute("name")
-    index = int(elm.getAttribute("index"))
-    get = elm.getAttribute("get") == "true"
-    set = elm.getAttribute("set") == "true"
-    data_type = DataType(elm.getAttribute("type")) #TODO: make data type more generic
-    unit = elm.getAttribute("unit")
-
-    value_range = None
-    vr = elm.getAttribute("range")
+_CLU_OBJECT_FILE = "object_"
+_CLU_FILE = "clu_"
+_MODULE_FILE = "module_"
+
+def _parse_range(elm: Element) -> tuple | None:
+    vr = elm.get("range", "")
     if VALUE_RANGE_TEMPLATE.match(vr):
-        value_range = tuple(int(x) for x in elm.getAttribute("range").split("-"))
+        return tuple(int(x) for x in vr.split("-"))
+
+    return None
+
+# names and units repeat across most interfaces, interning keeps a single copy of each
+
+def _parse_feature(elm: Element) -> FeatureInterface:
+    name = sys.intern(elm.get("name", ""))
+    index = int(elm.get("index"))
+    get = elm.get("get") == "true"
+    set = elm.get("set") == "true"
+    data_type = DataType(elm.get("type", "")) #TODO: make data type more generic
+    unit = sys.intern(elm.get("unit", ""))
+
+    value_range = _parse_range(elm)
 
     enum = None
-    en = elm.getAttribute("enum")
+    en = elm.get("enum", "")
     if en != "":
         if data_type == DataType.STRING:
-            enum = {s: None for s in elm.getAttribute("enum").split(",")}
+            enum = {s: None for s in en.split(",")}
         elif data_type == DataType.NUMBER:
-            enum = {int(s): None for s in elm.getAttribute("enum").split(",")}
-            
-        for node in elm.getElementsByTagName("enum"):
-            name = node.getAttribute("name")
-            value = node.getAttribute("value")
-            enum[value] = name
+            enum = {int(s): None for s in en.split(",")}
+
+        for node in elm.iter("enum"):
+            enum[node.get("value", "")] = node.get("name", "")
 
     return FeatureInterface(name, index, get, set, data_type, unit, enum, value_range)
 
 def _parse_parameter(elm: Element) -> ParameterInterface:
-    name = elm.getAttribute("name")
-    data_type = DataType(elm.getAttribute("type"))
-    unit = elm.getAttribute("unit")
+    name = sys.intern(elm.get("name", ""))
+    data_type = DataType(elm.get("type", ""))
+    unit = sys.intern(elm.get("unit", ""))
 
-    value_range = None
-    vr = elm.getAttribute("range")
-    if VALUE_RANGE_TEMPLATE.match(vr):
-        value_range = tuple(int(x) for x in elm.getAttribute("range").split("-"))
+    value_range = _parse_range(elm)
 
     enum = None
-    en = elm.getAttribute("enum")
+    en = elm.get("enum", "")
     if en != "":
         if data_type == DataType.STRING:
-            enum = [s for s in elm.getAttribute("enum").split(",")]
+            enum = [s for s in en.split(",")]
         elif data_type == DataType.NUMBER:
-            enum = [int(s) for s in elm.getAttribute("enum").split(",")]
+            enum = [int(s) for s in en.split(",")]
 
     return ParameterInterface(name, data_type, unit, enum, value_range)
 
 def _parse_method(elm: Element) -> MethodInterface:
-    call = CallType(elm.getAttribute("call"))
-    index = int(elm.getAttribute("index"))
-    name = elm.getAttribute("name")
+    call = CallType(elm.get("call", ""))
+    index = int(elm.get("index"))
+    name = sys.intern(elm.get("name", ""))
 
     # make return type more generic
-    return_value = DataType(elm.getAttribute("return"))
+    return_value = DataType(elm.get("return", ""))
 
-    params = [_parse_parameter(par) for par in elm.getElementsByTagName("param")]
+    params = [_parse_parameter(par) for par in elm.iter("param")]
 
     return MethodInterface(name, index, call, return_value, None, params)
 
-def _parse_module_object(xml: Element) -> ModuleObjectInterface:
-
-    obj_class = int(xml.getAttribute("class"))
-    name = xml.getAttribute("name")
-    obj_type = ModuleObjectType(xml.getAttribute("type"))
+class _Members:
+    __slots__ = ("attrib", "features", "methods")
+
+    def __init__(self, attrib: dict) -> None:
+        self.attrib = attrib
+        self.features = []
+        self.methods = []
+
+def _iter_members(file, group_tag: str | None = None):
+    # Yields the root members first, then (tag, attributes) of every element, features and methods are
+    # parsed once their element ends and cleared right away. Members of a group_tag element are collected
+    # separately and yielded at its end, everything else belongs to the root.
+    root = _Members({})
+    stack = [root]
+    yield root
+
+    for event, elm in ET.iterparse(file, events=("start", "end")):
+        tag = elm.tag
+        if event == "start":
+            if tag == group_tag:
+                stack.append(_Members(elm.attrib))
+            yield tag, elm.attrib
+            continue
 
-    features = [_parse_feature(x) for x in xml.getElementsByTagName("feature")]
-    methods = [_parse_method(x) for x in xml.getElementsByTagName("method")]
+        if tag == "feature":
+            stack[-1].features.append(_parse_feature(elm))
+            elm.clear()
+        elif tag == "method":
+            stack[-1].methods.append(_parse_method(elm))
+            elm.clear()
+        elif tag == group_tag:
+            yield stack.pop()
+            elm.clear()
 
-    return ModuleObjectInterface(name, obj_class, obj_type, features, methods)
+def _parse_clu_object(file) -> CluObjectInterface:
+    members = _iter_members(file)
+    root = next(members)
 
-def parse_clu_object_xml(file) -> CluObjectInterface:
-    dom = md.parse(file)
+    obj = None
+    for item in members:
+        if obj is None and item[0] == "object":
+            obj = item[1]
 
-    obj = dom.getElementsByTagName("object")[0]
-    obj_class = int(obj.getAttribute("class"))
-    name = obj.getAttribute("name")
-    version = int(obj.getAttribute("version"))
+    if obj is None:
+        raise ValueError("Missing object element.")
 
-    features = [_parse_feature(xml) for xml in dom.getElementsByTagName("feature")]
-    methods = [_parse_method(xml) for xml in dom.getElementsByTagName("method")]
+    return CluObjectInterface(obj.get("name", ""), int(obj.get("class")), int(obj.get("version")), root.features, root.methods)
 
-    return CluObjectInterface(name, obj_class, version, features, methods)
+def parse_clu_object_xml(file) -> CluObjectInterface:
+    return _parse_clu_object(file)
 
 def parse_module_xml(file) -> ModuleInterface:
-    dom = md.parse(file)
-
-    mod = dom.getElementsByTagName("module")[0]
-    name = mod.getAttribute("name")
-    hw_type = int(mod.getAttribute("typeId"), 16)
-
-    fw = dom.getElementsByTagName("firmware")[0]
-    fw_type = int(fw.getAttribute("typeId"), 16)
-    fw_api_version = int(fw.getAttribute("version"), 16)
+    members = _iter_members(file, "object")
+    next(members)
 
+    mod = None
+    fw = None
     objects = {}
+    for item in members:
+        if isinstance(item, _Members):
+            obj_class = int(item.attrib.get("class"))
+            name = item.attrib.get("name", "")
+            obj_type = ModuleObjectType(item.attrib.get("type", ""))
+            objects[obj_class] = ModuleObjectInterface(name, obj_class, obj_type, item.features, item.methods)
+
+        elif item[0] == "module" and mod is None:
+            mod = item[1]
+        elif item[0] == "firmware" and fw is None:
+            fw = item[1]
+
+    if mod is None or fw is None:
+        raise ValueError("Missing module or firmware element.")
+
+    hw_type = int(mod.get("typeId"), 16)
+    fw_type = int(fw.get("typeId"), 16)
+    fw_api_version = int(fw.get("version"), 16)
+
+    return ModuleInterface(mod.get("name", ""), hw_type, fw_type, fw_api_version, objects)
+
+def parse_clu_xml_unlinked(file) -> tuple[CluInterface, list[tuple[str, int]]]:
+    members = _iter_members(file)
+    root = next(members)
+
+    clu = None
+    refs = []
+    for tag, attrib in members:
+        if tag == "CLU" and clu is None:
+            clu = attrib
+        elif tag == "object":
+            refs.append((attrib.get("name", ""), int(attrib.get("version"))))
+
+    if clu is None:
+        raise ValueError("Missing CLU element.")
+
+    name = clu.get("typeName", "")
+    hw_type = int(clu.get("hardwareType"), 16)
+    hw_version = int(clu.get("hardwareVersion"), 16)
+    fw_type = int(clu.get("firmwareType"), 16)
+    fw_version = int(clu.get("firmwareVersion"), 16)
+
+    return CluInterface(name, hw_type, hw_version, fw_type, fw_version, root.features, root.methods), refs
+
+def link_clu_objects(clu: CluInterface, refs: list[tuple[str, int]], objects_repo: dict[str, list[CluObjectInterface]]) -> CluInterface:
+    for obj_name, obj_version in refs:
+        for obj_int in objects_repo.get(obj_name, []):
+            if obj_int.version == obj_version:
+                clu.objects[obj_int.obj_class] = obj_int
 
-    for obj_xml in dom.getElementsByTagName("object"):
-        obj = _parse_module_object(obj_xml)
-        objects[obj.obj_class] = obj
-
-    return ModuleInterface(name, hw_type, fw_type, fw_api_version, objects)
+    return clu
 
 def parse_clu_xml(file, objects_repo: dict[str, list[CluObjectInterface]]) -> CluInterface:
-    dom = md.parse(file)
-
-    clu = dom.getElementsByTagName("CLU")[0]
-    name = clu.getAttribute("typeName")
-    hw_type = int(clu.getAttribute("hardwareType"), 16)
-    hw_version = int(clu.getAttribute("hardwareVersion"), 16)
-    fw_type = int(clu.getAttribute("firmwareType"), 16)
-    fw_version = int(clu.getAttribute("firmwareVersion"), 16)
-
-    features = [_parse_feature(x) for x in dom.getElementsByTagName("feature")]
-    methods = [_parse_method(x) for x in dom.getElementsByTagName("method")]
-
-    objects = {}
-    for obj in dom.getElementsByTagName("object"):
-        obj_name = obj.getAttribute("name")
-        obj_version = int(obj.getAttribute("version"))
-        
-        for obj_int in objects_repo[obj_name]:
-            if obj_int.version == obj_version:
-                objects[obj_int.obj_class] = obj_int
-
-    return CluInterface(name, hw_type, hw_version, fw_type, fw_version, features, methods, objects)
+    return link_clu_objects(*parse_clu_xml_unlinked(file), objects_repo)
 
 def _append_elm(dict: dict, key, val):
     if key in dict:
@@ -141,37 +194,58 @@ def _append_elm(dict: dict, key, val):
     else:
         dict[key] = [val]
 
-def parse_interfaces(dir):
+def _parse_path(path: str):
+    name = os.path.basename(path)
+    try:
+        with open(path, "rb") as file:
+            if name.startswith(_CLU_OBJECT_FILE):
+                return _parse_clu_object(file), None
+            if name.startswith(_CLU_FILE):
+                return parse_clu_xml_unlinked(file)
+            if name.startswith(_MODULE_FILE):
+                return parse_module_xml(file), None
+    except IOError:
+        pass
+
+    return None, None
+
+def parse_interface_files(paths: list[str], workers: int | None = None) -> dict[str, tuple]:
+    # CLUs come back unlinked, together with the (name, version) of the objects they reference
+    results = {}
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < 2:
+        for path in paths:
+            results[path] = _parse_path(path)
+        return results
+
+    with ProcessPoolExecutor(workers) as executor:
+        chunksize = max(1, len(paths) // (4 * workers))
+        for path, result in zip(paths, executor.map(_parse_path, paths, chunksize=chunksize)):
+            results[path] = result
+
+    return results
+
+def parse_interfaces(dir, workers: int | None = None):
 
     clus: dict[int, list[CluInterface]] = {}
     modules: dict[int, list[ModuleInterface]] = {}
     objects: dict[str, list[CluObjectInterface]] = {}
 
-    for path in os.scandir(dir):
-        if not path.is_file() or not path.name.startswith("object_"):
-            continue
-        
-        try:
-            with open(path, 'r', encoding="utf-8") as file:
-                obj = parse_clu_object_xml(file)
-                _append_elm(objects, obj.name, obj)
-        except IOError:
-            pass
-
-    for path in os.scandir(dir):
-        if path.is_file():
-            try:
-                with open(path, "r", encoding="utf-8") as file:
-                    if path.name.startswith("clu_"):
-                        clu = parse_clu_xml(file, objects)
-                        _append_elm(clus, clu.hw_type, clu)
-
-                    elif path.name.startswith("module_"):
-                        mod = parse_module_xml(file)
-                        _append_elm(modules, mod.hw_type, mod)
-
-            except IOError:
-                pass
+    paths = [path.path for path in os.scandir(dir) if path.is_file()]
+    parsed = parse_interface_files(paths, workers)
+
+    clu_refs = []
+    for path in paths:
+        interface, refs = parsed[path]
+        if isinstance(interface, CluObjectInterface):
+            _append_elm(objects, interface.name, interface)
+        elif isinstance(interface, CluInterface):
+            clu_refs.append((interface, refs))
+        elif isinstance(interface, ModuleInterface):
+            _append_elm(modules, interface.hw_type, interface)
+
+    for clu, refs in clu_refs:
+        _append_elm(clus, clu.hw_type, link_clu_objects(clu, refs, objects))
 
     for _, v in clus.items():
         v.sort(key=lambda x: x.fw_api_version)
@@ -180,3 +254,42 @@ def parse_interfaces(dir):
         v.sort(key=lambda x: x.fw_api_version)
 
     return clus, modules
+
+def _iter_start_elements(file):
+    for _, elm in ET.iterparse(file, events=("start",)):
+        yield elm
+
+def read_clu_object_header(file) -> tuple[str, int]:
+    for elm in _iter_start_elements(file):
+        if elm.tag == "object":
+            return elm.get("name", ""), int(elm.get("version"))
+
+    raise ValueError("Missing object element.")
+
+def read_module_header(file) -> tuple[int, int, int]:
+    hw_type = None
+    firmware = None
+    for elm in _iter_start_elements(file):
+        if elm.tag == "module" and hw_type is None:
+            hw_type = int(elm.get("typeId"), 16)
+        elif elm.tag == "firmware" and firmware is None:
+            firmware = (int(elm.get("typeId"), 16), int(elm.get("version"), 16))
+
+        if hw_type is not None and firmware is not None:
+            return hw_type, *firmware
+
+    raise ValueError("Missing module or firmware element.")
+
+def read_clu_header(file) -> tuple[int, int, int, list[tuple[str, int]]]:
+    header = None
+    objects = []
+    for elm in _iter_start_elements(file):
+        if elm.tag == "CLU" and header is None:
+            header = (int(elm.get("hardwareType"), 16), int(elm.get("firmwareType"), 16), int(elm.get("firmwareVersion"), 16))
+        elif elm.tag == "object":
+            objects.append((elm.get("name", ""), int(elm.get("version"))))
+
+    if header is None:
+        raise ValueError("Missing CLU element.")
+
+    return *header, objects
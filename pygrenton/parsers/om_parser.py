@@ -1,24 +1,26 @@
 
-import re
+import codecs
 import ipaddress
+import re
 from ipaddress import IPv4Address
 from dataclasses import dataclass, field
 
-_NAME_FIELD = re.compile("-- NAME_.*")
-_SPLIT_ARGS = re.compile("[ =,\n]+")
-_OBJECT_CREATION = re.compile('.*[^"]OBJECT:new\(.*?\)[^"\n]*')
+_NAME_FIELD = "-- NAME_"
+_NAME_ARGS = re.compile("-- NAME_[^ =,\n]*[ =,\n]+([^ =,\n]+)[ =,\n]+([^ =,\n]*)")
+_OBJECT_CREATION = "OBJECT:new("
+_END_OF_OBJECTS = "EventsFor"
 
-@dataclass
+@dataclass(slots=True)
 class CLU:
     object_id: str
     ipaddress: IPv4Address
 
-@dataclass
+@dataclass(slots=True)
 class CLUObject:
     object_id: str
     object_class: int
     
-@dataclass
+@dataclass(slots=True)
 class ModuleObject(CLUObject):
     parent_serial_number: int
     object_index: int
@@ -40,13 +42,24 @@ class OMEndpoints:
         return self.names[object_id]
 
 def _parse_name(line: str) -> tuple[str, str]:
-    spl = re.split(_SPLIT_ARGS, line)[2:]
+    match = _NAME_ARGS.match(line)
+    if match is None:
+        raise ValueError(f"Invalid name line: {line!r}")
 
-    name = spl[0]
-    object_id = spl[1]
+    name, object_id = match.groups()
 
     return object_id, name
 
+def _is_object_creation(line: str) -> bool:
+    # OBJECT:new( not at the start of the line nor right after a quote, closed somewhere later on
+    start = line.find(_OBJECT_CREATION, 1)
+    while start != -1:
+        if line[start - 1] != '"':
+            return line.find(")", start + len(_OBJECT_CREATION)) != -1
+        start = line.find(_OBJECT_CREATION, start + 1)
+
+    return False
+
 def _parse_object_creation(line: str) -> tuple[str, list[str]]:
     obj_id = line.split()[0]
     args = line[line.find("(")+1:line.rfind(")")].split(", ")
@@ -56,49 +69,91 @@ def _parse_object_creation(line: str) -> tuple[str, list[str]]:
 def _parse_ip_hex(hex_str: str) -> IPv4Address:
     return ipaddress.ip_address(int(hex_str, 16))
 
+class OMParser:
+    # Incremental parser, om.lua can be fed in arbitrary chunks of bytes as they arrive. Objects are
+    # created before the event handlers, so everything from the first EventsFor line on is ignored.
+
+    def __init__(self) -> None:
+        self.names: dict[str, str] = {}
+        self.module_objects: dict[int, list[ModuleObject]] = {}
+        self.clu_objects: list[CLUObject] = []
+
+        self.this_clu: CLU = None
+        self.external_clus: list[CLU] = []
+
+        self.done = False
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._partial = ""
+
+    def feed(self, data: bytes) -> bool:
+        if self.done:
+            return True
+
+        lines = (self._partial + self._decoder.decode(data)).split("\n")
+        self._partial = lines.pop()
+        for line in lines:
+            # same lines as reading the file in text mode would give
+            if not self.feed_line(line.rstrip("\r") + "\n"):
+                break
+
+        return self.done
+
+    def feed_line(self, line: str) -> bool:
+        if self.done:
+            return False
+
+        if _END_OF_OBJECTS in line:
+            self.done = True
+            return False
+
+        if line.startswith(_NAME_FIELD):
+            obj_id, name = _parse_name(line)
+            self.names[obj_id] = name
+
+        elif _is_object_creation(line):
+            self._add_object(*_parse_object_creation(line))
+
+        return True
+
+    def _add_object(self, obj_id: str, args: list[str]) -> None:
+        argcount = len(args)
+
+        if argcount == 2:
+            # parse clu object
+            self.clu_objects.append(CLUObject(obj_id, int(args[0])))
+
+        elif argcount == 3 :
+            # parse this clu or external clu
+            ip_address = _parse_ip_hex(args[1])
+
+            if int(args[0]) == 1:
+                self.external_clus.append(CLU(obj_id, ip_address))
+            else:
+                self.this_clu = CLU(obj_id, ip_address)
+
+        elif argcount == 4:
+            # parse module object
+            obj_class = int(args[0])
+            if obj_class == 2:
+                return
+
+            parent_serial_number = int(args[1][3:])
+            index = int(args[2])
+
+            self.module_objects.setdefault(parent_serial_number, []).append(ModuleObject(obj_id, obj_class, parent_serial_number, index))
+
+    def close(self) -> OMEndpoints:
+        rest = self._partial + self._decoder.decode(b"", final=True)
+        self._partial = ""
+        if rest:
+            self.feed_line(rest.rstrip("\r"))
+
+        return OMEndpoints(self.this_clu, self.external_clus, self.names, self.clu_objects, self.module_objects)
+
 def parse_om(file) -> OMEndpoints:
-    names: dict[str, str] = {}
-    module_objects: dict[int, list[ModuleObject]] = {}
-    clu_objects: list[CLUObject] = []
-    
-    this_clu: CLU = None
-    external_clus: list[CLU] = []
-            
+    parser = OMParser()
     for line in file:
-        if re.match(_NAME_FIELD, line):
-            obj_id, name = _parse_name(line)
-            names[obj_id] = name
-
-        elif re.match(_OBJECT_CREATION, line):
-            obj_id, args = _parse_object_creation(line)
-            argcount = len(args)
-            
-            if argcount == 2:
-                # parse clu object
-                clu_objects.append(CLUObject(obj_id, int(args[0])))
-
-            elif argcount == 3 :
-                # parse this clu or external clu
-                ip_address = _parse_ip_hex(args[1])
-                
-                if int(args[0]) == 1:
-                    external_clus.append(CLU(obj_id, ip_address))
-                else:
-                    this_clu = CLU(obj_id, ip_address)
-                
-            elif argcount == 4:
-                # parse module object
-                obj_class = int(args[0])
-                if obj_class == 2:
-                    continue
-                
-                parent_serial_number = int(args[1][3:])
-                index = int(args[2])
-                
-                if parent_serial_number in module_objects.keys():
-                    module_objects[parent_serial_number].append(ModuleObject(obj_id, obj_class, parent_serial_number, index))
-                else:
-                    module_objects[parent_serial_number] = [ModuleObject(obj_id, obj_class, parent_serial_number, index)]
-
-    return OMEndpoints(this_clu, external_clus, names, clu_objects, module_objects)
-           
\ No newline at end of file
+        if not parser.feed_line(line):
+            break
+
+    return parser.close()
@@ -0,0 +1,138 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+
+_LOGGER = logging.getLogger(__name__)
+
+@dataclass
+class RefreshStats:
+    refreshes: int = 0
+    failures: int = 0
+    last_latency: float | None = None
+    max_latency: float = 0
+    total_latency: float = 0
+
+    @property
+    def average_latency(self) -> float | None:
+        if self.refreshes == 0:
+            return None
+
+        return self.total_latency / self.refreshes
+
+class RefreshScheduler:
+
+    def __init__(self, interval: float, workers: int = 2, jitter: float = 0.1, min_delay: float = 0) -> None:
+        self._interval = interval
+        self._jitter = jitter
+        self._min_delay = min_delay
+
+        # a job re-added under the same key gets a new generation, stale queue entries are skipped
+        self._jobs: dict[Hashable, tuple[int, Callable[[], None]]] = {}
+        self._stats: dict[Hashable, RefreshStats] = {}
+        self._queue: list[tuple[float, int, Hashable, int]] = []
+        self._counter = itertools.count()
+
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="clu-refresh")
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, key: Hashable, job: Callable[[], None], delay: float | None = None) -> None:
+        with self._condition:
+            if key in self._jobs:
+                return
+
+            generation = next(self._counter)
+            self._jobs[key] = (generation, job)
+            self._stats[key] = RefreshStats()
+            self._push(key, generation, self._next_delay() if delay is None else delay)
+
+    def remove(self, key: Hashable) -> None:
+        with self._condition:
+            self._jobs.pop(key, None)
+            self._stats.pop(key, None)
+
+    def stats(self, key: Hashable) -> RefreshStats | None:
+        with self._condition:
+            stats = self._stats.get(key, None)
+            return replace(stats) if stats is not None else None
+
+    def all_stats(self) -> dict[Hashable, RefreshStats]:
+        with self._condition:
+            return {key: replace(stats) for key, stats in self._stats.items()}
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+
+        self._executor.shutdown(wait=False)
+
+    def _next_delay(self) -> float:
+        return self._interval * (1 + random.uniform(-self._jitter, self._jitter))
+
+    def _push(self, key: Hashable, generation: int, delay: float) -> None:
+        heapq.heappush(self._queue, (time.monotonic() + delay, next(self._counter), key, generation))
+        self._condition.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if self._closed:
+                    return
+
+                if len(self._queue) == 0:
+                    self._condition.wait()
+                    continue
+
+                due, _, key, generation = self._queue[0]
+                now = time.monotonic()
+                if due > now:
+                    self._condition.wait(due - now)
+                    continue
+
+                heapq.heappop(self._queue)
+                current = self._jobs.get(key, None)
+                if current is None or current[0] != generation:
+                    continue
+
+                self._executor.submit(self._execute, key, generation, current[1])
+
+            # keeps jobs that became due together from hitting the CLU at once
+            if self._min_delay > 0:
+                time.sleep(self._min_delay)
+
+    def _execute(self, key: Hashable, generation: int, job: Callable[[], None]) -> None:
+        start = time.perf_counter()
+        try:
+            job()
+            failed = False
+        except Exception:
+            _LOGGER.exception("Scheduled refresh of %s failed", key)
+            failed = True
+        latency = time.perf_counter() - start
+
+        with self._condition:
+            current = self._jobs.get(key, None)
+            if current is None or current[0] != generation:
+                return
+
+            stats = self._stats[key]
+            if failed:
+                stats.failures += 1
+            else:
+                stats.refreshes += 1
+                stats.last_latency = latency
+                stats.total_latency += latency
+                stats.max_latency = max(stats.max_latency, latency)
+
+            # the next run is planned only after this one finished, so a job never overlaps itself
+            self._push(key, generation, self._next_delay())
@@ -0,0 +1,161 @@
+import asyncio
+import contextlib
+import logging
+import threading
+import time
+
+from .cipher import GrentonCipher
+from .limiter import AdaptiveLimiter
+
+_LOGGER = logging.getLogger(__name__)
+# how long a close from another thread waits for the loop to get to it
+_CLOSE_TIMEOUT = 1
+
+def request_id(msg: str) -> str | None:
+    # both requests and responses look like "<req|resp>:<ip>:<req_id>:<payload>"
+    parts = msg.split(":", 3)
+    if len(parts) < 4:
+        return None
+
+    return parts[2]
+
+def _expire(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_exception(TimeoutError())
+
+class AsyncCluTransport(asyncio.DatagramProtocol):
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        addr: tuple[str, int],
+        local_ip: str,
+        cipher: GrentonCipher,
+        limiter: AdaptiveLimiter | None = None
+    ) -> None:
+        self._loop = loop
+        self._addr = addr
+        self._local_ip = local_ip
+        self._cipher = cipher
+
+        self._limiter = limiter if limiter is not None else AdaptiveLimiter()
+        self._waiters: dict[str, asyncio.Future[str]] = {}
+
+        self._transport: asyncio.DatagramTransport | None = None
+        self._opening: asyncio.Task | None = None
+        self._closed = False
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
+
+    @property
+    def is_closed(self) -> bool:
+        return self._closed
+
+    def is_pending(self, req_id: str) -> bool:
+        return req_id in self._waiters
+
+    async def request(self, msg: str, req_id: str, timeout: float, ignore_response: bool = False) -> str | None:
+        if self._transport is None:
+            await self._ensure_open()
+
+        payload = self._cipher.encrypt(msg.encode())
+
+        # the limiter is driven by hand and the timeout is a plain timer: a context manager and
+        # wait_for cost more per request than the rest of the round trip
+        start = await self._limiter.acquire_async()
+        if ignore_response:
+            try:
+                self._transport.sendto(payload, self._addr)
+            finally:
+                self._limiter.release(start)
+            return None
+
+        future = self._loop.create_future()
+        self._waiters[req_id] = future
+        timer = self._loop.call_later(timeout, _expire, future)
+        try:
+            self._transport.sendto(payload, self._addr)
+            resp = await future
+        except TimeoutError:
+            self._limiter.release(start, timeout=True)
+            raise
+        except BaseException:
+            self._limiter.release(start)
+            raise
+        finally:
+            timer.cancel()
+            self._waiters.pop(req_id, None)
+
+        self._limiter.release(start, time.monotonic() - start)
+        return resp
+
+    def close(self) -> None:
+        self._closed = True
+        if self._transport is None:
+            return
+
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+
+        if on_loop or not self._loop.is_running():
+            # nothing else touches the endpoint meanwhile, the loop might be already closed though
+            with contextlib.suppress(RuntimeError):
+                self._transport.close()
+            return
+
+        # the endpoint isn't thread safe, the loop running in another thread closes it
+        closed = threading.Event()
+        def close_on_loop() -> None:
+            self._transport.close()
+            closed.set()
+
+        try:
+            self._loop.call_soon_threadsafe(close_on_loop)
+        except RuntimeError:
+            # the loop was closed in the meantime
+            return
+        closed.wait(_CLOSE_TIMEOUT)
+
+    async def _ensure_open(self) -> None:
+        if self._opening is None:
+            self._opening = self._loop.create_task(self._open())
+
+        try:
+            await self._opening
+        except Exception:
+            self._opening = None
+            raise
+
+    async def _open(self) -> None:
+        await self._loop.create_datagram_endpoint(lambda: self, local_addr=(self._local_ip, 0))
+
+    def connection_made(self, transport: asyncio.DatagramTransport) -> None:
+        self._transport = transport
+
+    def connection_lost(self, exc: Exception | None) -> None:
+        self._closed = True
+        for future in self._waiters.values():
+            if not future.done():
+                future.set_exception(exc or ConnectionError("CLU transport closed."))
+
+    def error_received(self, exc: Exception) -> None:
+        _LOGGER.debug("CLU transport error: %s", exc)
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        if addr[0] != self._addr[0]:
+            return
+
+        try:
+            msg = self._cipher.decrypt(data).decode()
+        except Exception:
+            _LOGGER.debug("Unable to decrypt datagram from %s", addr)
+            return
+
+        req_id = request_id(msg)
+        future = self._waiters.get(req_id)
+        if future is not None and not future.done():
+            future.set_result(msg)
@@ -1,6 +1,12 @@
 
-import socket
+import contextlib
 import random
+import re
+import socket
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from .types import DataType
 
 def get_host_ip(clu_ip: str) -> str:
     _, _, ips = socket.gethostbyname_ex(socket.gethostname())
@@ -18,66 +24,158 @@ def get_host_ip(clu_ip: str) -> str:
     #TODO: throw exception when no ip is found
     return ""
 
+def close_socket(sock: socket.socket) -> None:
+    # closing alone doesn't wake a thread blocked in recvfrom
+    with contextlib.suppress(OSError):
+        sock.shutdown(socket.SHUT_RDWR)
+    sock.close()
+
 def find_n_character(string: str, char: str, n: int) -> int:
-    count = 0
-    for index, c in enumerate(string):
-        if c == char:
-            count += 1
-            if count == n:
-                return index
-            
-    return -1
+    index = -1
+    for _ in range(n):
+        index = string.find(char, index + 1)
+        if index == -1:
+            return -1
+
+    return index
 
 def extract_payload(resp: str) -> str:
-    index = find_n_character(resp, ':', 3)
-    if index == -1:
+    parts = resp.split(":", 3)
+    if len(parts) < 4:
         return resp
-         
-    return resp[index + 1:]
+
+    return parts[3]
         
 def generate_id_hex(lenght=8) -> str:
-    return ''.join(random.choices("01234567890abcdef", k=lenght))
+    return f"{random.getrandbits(4 * lenght):0{lenght}x}"
+
+# an item is everything up to the next structural character, quoted strings may contain any of them
+_LIST_TOKEN = re.compile(r'((?:[^,{}"]|"[^"]*(?:"|$))*)([,{}]|$)')
+
+def _convert_value(data: str):
+    data = data.strip()
+    if data.startswith('"') and data.endswith('"'):
+        return data[1:-1]
+    if data == "true":
+        return True
+    if data == "false":
+        return False
+    if data == "nil":
+        return None
+
+    return float(data)
+
+def _convert_number(data: str):
+    try:
+        return float(data)
+    except ValueError:
+        return _convert_value(data)
+
+def _convert_string(data: str):
+    if data.startswith('"') and data.endswith('"') and len(data) > 1:
+        return data[1:-1]
+
+    return _convert_value(data)
+
+_CONVERTERS = {
+    DataType.NUMBER: _convert_number,
+    DataType.INTEGER: _convert_number,
+    DataType.ENUM: _convert_number,
+    DataType.TIMESTAMP: _convert_number,
+    DataType.STRING: _convert_string,
+}
 
 def parse_list(msg: str, start: int = 0) -> tuple[int, list]:
+    if start == 0 and "{" not in msg and "}" not in msg:
+        return len(msg) - 1, parse_values(msg)
+
     values = []
-    i = start
-    prev_i = start
-    quote = False
-    
-    def convert_type(data: str):
-        data = data.strip()
-        if data.startswith('"') and data.endswith('"'):
-            return data[1:-1]
-        elif data == "true":
-            return True
-        elif data == "false":
-            return False
-        elif data == "nil":
-            return None
-        
-        return float(data)
-    
-    def append_if_not_empty(m: str):
-        if m.strip() != "":
-            values.append(convert_type(m))
-    
-    length = len(msg)
-    while i < length:
-        c = msg[i]
-        if c == ',' and not quote:
-            append_if_not_empty(msg[prev_i:i])
-            prev_i = i+1 
-        elif c == '"':
-            quote = not quote
-        elif c == '{' and not quote:
-            i, sub_list = parse_list(msg, i+1)
-            prev_i = i + 1
-            values.append(sub_list)   
-        elif c == '}' and not quote:
-            append_if_not_empty(msg[prev_i:i])
-            return i, values
-        
-        i += 1
-    
-    values.append(convert_type(msg[prev_i:]))
-    return i-1, values
\ No newline at end of file
+    stack = []
+    after_list = False
+
+    pos = start
+    while True:
+        match = _LIST_TOKEN.match(msg, pos)
+        item, delimiter = match.groups()
+        pos = match.end()
+
+        if delimiter == ",":
+            if item.strip() != "":
+                values.append(_convert_value(item))
+            after_list = False
+
+        elif delimiter == "{":
+            # anything between the previous delimiter and the opening brace is ignored
+            stack.append(values)
+            values = []
+
+        elif delimiter == "}":
+            if item.strip() != "":
+                values.append(_convert_value(item))
+
+            if not stack:
+                return pos - 1, values
+
+            sub_list = values
+            values = stack.pop()
+            values.append(sub_list)
+            after_list = True
+
+        else:
+            if stack:
+                raise ValueError("Unterminated list.")
+
+            if not (after_list and item.strip() == ""):
+                values.append(_convert_value(item))
+
+            return len(msg) - 1, values
+
+def _split_items(msg: str) -> list[str]:
+    if '"' not in msg:
+        return msg.split(",")
+
+    # even parts are outside of quotes, so only they can contain separators
+    parts = msg.split('"')
+    last = len(parts) - 1
+
+    items = [""]
+    for i, part in enumerate(parts):
+        if i % 2 == 0:
+            pieces = part.split(",")
+            items[-1] += pieces[0]
+            items.extend(pieces[1:])
+        elif i == last:
+            items[-1] += '"' + part
+        else:
+            items[-1] += '"' + part + '"'
+
+    return items
+
+def _convert_items(items: list[str], converters: Sequence) -> list:
+    values = []
+    last = len(items) - 1
+    for i, item in enumerate(items):
+        if i < last and item.strip() == "":
+            continue
+
+        values.append(converters[i](item) if i < len(converters) else _convert_value(item))
+
+    return values
+
+def value_converter(data_type: DataType | None) -> Callable[[str], Any]:
+    return _CONVERTERS.get(data_type, _convert_value)
+
+def parse_values(msg: str, converters: Sequence[Callable[[str], Any]] = ()) -> list:
+    if "{" in msg or "}" in msg:
+        return parse_list(msg)[1]
+
+    items = _split_items(msg)
+
+    try:
+        if len(converters) >= len(items):
+            return [convert(item) for convert, item in zip(converters, items)]
+
+        return [_convert_value(item) for item in items]
+    except ValueError:
+        # empty items are skipped, except the last one
+        return _convert_items(items, converters)
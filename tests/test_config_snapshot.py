@@ -0,0 +1,96 @@
+import ipaddress
+import json
+
+import pytest
+
+from pygrenton.config_objects import CLUConfig, ModuleConfig
+from pygrenton.interfaces import (
+    CluInterface,
+    CluObjectInterface,
+    FeatureInterface,
+    ModuleInterface,
+    ModuleObjectInterface,
+)
+from pygrenton.parsers.config_parser import parse_clu_config, restore_clu_config, snapshot_clu_config
+from pygrenton.parsers.om_parser import CLU, CLUObject, ModuleObject, OMEndpoints
+from pygrenton.types import DataType, ModuleObjectType
+
+FEATURES = [
+    FeatureInterface("Value", 0, True, False, DataType.NUMBER, ""),
+    FeatureInterface("Label", 1, True, True, DataType.STRING, ""),
+]
+
+
+class InterfaceManagerStub:
+    # module hardware type 99 has no interface, CLU object class 9 neither
+
+    def __init__(self) -> None:
+        self.clu = CluInterface("CLU", 19, 1, 2, 3, FEATURES, [], {5: CluObjectInterface("Timer", 5, 1, FEATURES[:1])})
+        self.module = ModuleInterface("DOUT", 7, 2, 3, {1: ModuleObjectInterface("Output", 1, ModuleObjectType.NONE, FEATURES)})
+        self.lookups = 0
+
+    def get_clu_interface(self, hw_type, fw_type, api_version):
+        self.lookups += 1
+        return self.clu
+
+    def get_module_interface(self, hw_type, fw_type, api_version):
+        self.lookups += 1
+        return self.module if hw_type == 7 else None
+
+@pytest.fixture
+def config():
+    modules = {
+        100: ModuleConfig(100, 7, 1, 2, 3, 4, "OK"),
+        101: ModuleConfig(101, 99, 1, 2, 3, 4, "OK"),
+    }
+    conf_json = CLUConfig(1234, "aa:bb", 19, 1, 2, 3, 4, "OK", modules)
+
+    om = OMEndpoints(
+        CLU("CLU1234", ipaddress.ip_address("192.168.1.10")),
+        [CLU("CLU5678", ipaddress.ip_address("192.168.1.11"))],
+        {"CLU1234": "clu", "DOU0001": "lamp", "DOU0002": "fan", "DOU0003": "unknown_module", "TIM0001": "timer"},
+        [CLUObject("TIM0001", 5), CLUObject("UNK0001", 9)],
+        {
+            100: [ModuleObject("DOU0001", 1, 100, 0), ModuleObject("DOU0002", 1, 100, 1)],
+            101: [ModuleObject("DOU0003", 1, 101, 0)],
+        },
+    )
+
+    return parse_clu_config(conf_json, om, InterfaceManagerStub(), None)
+
+def describe(config) -> list:
+    return [(obj.object_id, obj.name, obj.object_class, obj.interface) for obj in config.objects]
+
+def test_restore(config):
+    snapshot = json.loads(json.dumps(snapshot_clu_config(config)))
+    restored = restore_clu_config(snapshot, InterfaceManagerStub(), None)
+
+    assert describe(restored) == describe(config)
+    assert restored.om_config == config.om_config
+    assert restored.conf_json == config.conf_json
+    assert restored.objects_by_name.keys() == config.objects_by_name.keys()
+    assert {key: len(objects) for key, objects in restored.objects_by_class.items()} == {
+        key: len(objects) for key, objects in config.objects_by_class.items()
+    }
+
+@pytest.mark.parametrize("query", [
+    {},
+    {"serial_number": 100},
+    {"serial_number": 101},
+    {"name_prefix": "f"},
+    {"feature": "Label"},
+    {"settable_feature": "Label", "serial_number": 100},
+    {"interface_name": "unknown"},
+])
+def test_restored_index(config, query):
+    snapshot = json.loads(json.dumps(snapshot_clu_config(config)))
+    restored = restore_clu_config(snapshot, InterfaceManagerStub(), None)
+
+    assert [obj.object_id for obj in restored.query(**query)] == [obj.object_id for obj in config.query(**query)]
+
+def test_interfaces_are_looked_up_once(config):
+    interface_manager = InterfaceManagerStub()
+    restore_clu_config(json.loads(json.dumps(snapshot_clu_config(config))), interface_manager, None)
+
+    # the CLU and both modules
+    assert interface_manager.lookups == 3
@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from pygrenton import interface_cache
+from pygrenton.interface_cache import InterfaceCache, InterfaceCacheError, write_interface_cache
+from pygrenton.interfaces import (
+    CluInterface,
+    CluObjectInterface,
+    FeatureInterface,
+    MethodInterface,
+    ModuleInterface,
+    ModuleObjectInterface,
+    ParameterInterface,
+)
+from pygrenton.types import CallType, DataType, ModuleObjectType
+
+
+def make_interfaces() -> dict:
+    features = [
+        FeatureInterface("Value", 0, True, False, DataType.NUMBER, "°C", value_range=(-40, 125)),
+        FeatureInterface("Mode", 1, True, True, DataType.ENUM, "", enum={0: "off", 1: "on", "x": "ąę"}),
+        FeatureInterface("Label", 2, True, True, DataType.STRING, ""),
+    ]
+    methods = [
+        MethodInterface("SetMode", 1, CallType.EXECUTE, DataType.VOID, None, [
+            ParameterInterface("mode", DataType.NUMBER, "", enum=[0, 1], value_range=(0, 1)),
+        ]),
+        MethodInterface("Switch", 0, CallType.EXECUTE, DataType.NUMBER, "s"),
+    ]
+    timer = CluObjectInterface("Timer", 5, 3, features[:1], methods[:1])
+
+    return {
+        "clu.xml:aa": CluInterface("CLU", 19, 1, 2, 3, features, methods, {5: timer}),
+        "module.xml:bb": ModuleInterface("DOUT", 7, 2, 3, {
+            1: ModuleObjectInterface("Output", 1, ModuleObjectType.NONE, features, methods),
+            2: ModuleObjectInterface("Empty", 2, ModuleObjectType.NONE),
+        }),
+        "object.xml:cc": timer,
+    }
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "interfaces.cache")
+
+def test_round_trip(path):
+    interfaces = make_interfaces()
+    write_interface_cache(path, interfaces)
+
+    cache = InterfaceCache(path)
+    try:
+        assert sorted(cache.keys()) == sorted(interfaces)
+        for key, interface in interfaces.items():
+            assert cache.get(key) == interface
+        assert cache.get("missing.xml:dd") is None
+    finally:
+        cache.close()
+
+def test_records_are_copied_from_a_base(path):
+    interfaces = make_interfaces()
+    write_interface_cache(path, {"clu.xml:aa": interfaces["clu.xml:aa"]})
+
+    write_interface_cache(path, {"module.xml:bb": interfaces["module.xml:bb"]}, InterfaceCache(path))
+
+    cache = InterfaceCache(path)
+    try:
+        assert cache.get("clu.xml:aa") == interfaces["clu.xml:aa"]
+        assert cache.get("module.xml:bb") == interfaces["module.xml:bb"]
+    finally:
+        cache.close()
+
+def test_other_library_version_invalidates(path, monkeypatch):
+    write_interface_cache(path, make_interfaces())
+
+    monkeypatch.setattr(interface_cache, "library_version", lambda: "0.0.0+other")
+    with pytest.raises(InterfaceCacheError):
+        InterfaceCache(path)
+
+def test_library_version_covers_parser_sources():
+    version = interface_cache.library_version()
+
+    # a changed parser is a new version even without a new release
+    assert "+" in version
+    assert version == interface_cache.library_version()
+
+@pytest.mark.parametrize("size", [0, 4, 20, 100])
+def test_truncated_file(path, size):
+    write_interface_cache(path, make_interfaces())
+    with open(path, "rb") as file:
+        data = file.read()
+    with open(path, "wb") as file:
+        file.write(data[:size])
+
+    with pytest.raises(InterfaceCacheError):
+        InterfaceCache(path)
+
+def test_corrupted_record(path):
+    write_interface_cache(path, make_interfaces())
+    with open(path, "r+b") as file:
+        file.seek(-64, os.SEEK_END)
+        file.write(b"\x7f" * 64)
+
+    with pytest.raises(InterfaceCacheError):
+        cache = InterfaceCache(path)
+        try:
+            for key in cache.keys():
+                cache.get(key)
+        finally:
+            cache.close()
@@ -0,0 +1,65 @@
+import pytest
+
+from pygrenton.clu_client import _BULK_VALUE_SIZE, _bulk_get_payload, _lua_encode_value, _parse_bulk_response
+
+lupa = pytest.importorskip("lupa")
+
+
+@pytest.fixture
+def lua():
+    return lupa.LuaRuntime()
+
+def encode(lua, value, max_size: int = _BULK_VALUE_SIZE) -> str:
+    return lua.execute(_lua_encode_value(max_size) + "return enc(...)", value)
+
+@pytest.mark.parametrize("value, expected", [
+    (1.5, "1.5"),
+    (True, "true"),
+    (False, "false"),
+    (None, "nil"),
+    ("text", '"text"'),
+    ('say "hi"', '"say %22hi%22"'),
+    ("100%", '"100%25"'),
+    ("%22", '"%2522"'),
+])
+def test_encode_value(lua, value, expected):
+    assert encode(lua, value) == expected
+
+@pytest.mark.parametrize("value", ['"', '""', "%", "%25", 'a "quoted", {braced} value', "{1,2}", "ąę,ść"])
+def test_encode_round_trip(lua, value):
+    assert _parse_bulk_response("{" + encode(lua, value, 64) + "}", 1) == [value]
+
+def test_encode_keeps_strings_that_fit(lua):
+    value = "x" * (_BULK_VALUE_SIZE - 2)
+
+    encoded = encode(lua, value)
+    assert len(encoded) == _BULK_VALUE_SIZE
+    assert _parse_bulk_response("{" + encoded + "}", 1) == [value]
+
+@pytest.mark.parametrize("value", [
+    "x" * 100,
+    '"' * 100,
+    "a" + "%" * 50,
+    "ż" * 50,
+    "a" + "€" * 50,
+])
+def test_encode_cuts_long_strings(lua, value):
+    encoded = encode(lua, value)
+    assert len(encoded.encode()) <= _BULK_VALUE_SIZE
+
+    # a cut string comes back as a list holding a prefix of it, without a partial escape or character
+    [cut] = _parse_bulk_response("{" + encoded + "}", 1)
+    assert isinstance(cut, list) and len(cut) == 1
+    assert cut[0] and value.startswith(cut[0])
+
+def test_bulk_get_payload(lua):
+    lua.execute(
+        "local function obj(values) return {get = function(self, i) return values[i + 1] end} end "
+        "CLU = obj({1, 'say \"hi\"', true}) "
+        "DOUT = obj({nil, string.rep('%', 40)})"
+    )
+    payload = _bulk_get_payload(["{CLU,0}", "{CLU,1}", "{CLU,2}", "{DOUT,0}", "{DOUT,1}"])
+
+    values = _parse_bulk_response(lua.execute("return " + payload), 5)
+    assert values[:4] == [1.0, 'say "hi"', True, None]
+    assert isinstance(values[4], list) and set(values[4][0]) == {"%"}
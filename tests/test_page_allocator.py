@@ -0,0 +1,112 @@
+import pytest
+
+from pygrenton.clu_client import (
+    _REQUEST_OVERHEAD,
+    _UPDATE_STRING_SIZE,
+    _UPDATE_VALUE_SIZE,
+    MAX_PACKET_SIZE,
+    ClientPage,
+    FeatureEntry,
+    PageAllocator,
+)
+from pygrenton.types import DataType
+
+UPDATE_LIMIT = 500
+
+
+def add(allocator: PageAllocator, entries: list[FeatureEntry]) -> None:
+    for entry in entries:
+        allocator.allocate(entry).add_feature(entry)
+
+def numbers(count: int, prefix: str = "DOU") -> list[FeatureEntry]:
+    return [FeatureEntry(f"{prefix}{i}", 0, DataType.NUMBER) for i in range(count)]
+
+def strings(count: int) -> list[FeatureEntry]:
+    return [FeatureEntry(f"TXT{i}", 0, DataType.STRING) for i in range(count)]
+
+def test_page_size():
+    allocator = PageAllocator(3, 10000, 10000)
+    add(allocator, numbers(10))
+
+    assert sorted(len(page.features) for page in allocator.pages.values()) == [1, 3, 3, 3]
+
+@pytest.mark.parametrize("entries, per_page", [
+    (numbers(100), UPDATE_LIMIT // _UPDATE_VALUE_SIZE),
+    (strings(30), UPDATE_LIMIT // _UPDATE_STRING_SIZE),
+])
+def test_update_limit(entries, per_page):
+    allocator = PageAllocator(None, 10000, UPDATE_LIMIT)
+    add(allocator, entries)
+
+    for page in allocator.pages.values():
+        assert page.update_size <= UPDATE_LIMIT
+        assert len(page.features) <= per_page
+    assert len(allocator.pages) == -(-len(entries) // per_page)
+
+def test_strings_take_a_larger_share():
+    allocator = PageAllocator(None, 10000, UPDATE_LIMIT)
+    add(allocator, strings(3) + numbers(30))
+
+    for page in allocator.pages.values():
+        assert page.update_size <= UPDATE_LIMIT
+        assert page.update_size == sum(
+            _UPDATE_STRING_SIZE if entry.data_type == DataType.STRING else _UPDATE_VALUE_SIZE for entry in page.features
+        )
+
+def test_register_limit():
+    allocator = PageAllocator(None, 200, 10000)
+    add(allocator, numbers(50, prefix="LONG_OBJECT_NAME_"))
+
+    for page in allocator.pages.values():
+        assert page.register_size <= 200
+        assert len(page.create_payload("192.168.1.10", 1234)) <= 200 + len(ClientPage(0).create_payload("192.168.1.10", 1234))
+
+def test_register_payload_fits_in_a_packet():
+    header = len(ClientPage(0).create_payload("192.168.100.100", 65535))
+    allocator = PageAllocator(None, MAX_PACKET_SIZE - _REQUEST_OVERHEAD - header - 5, 10000)
+    add(allocator, [FeatureEntry(f"x{i:04}", i % 100, DataType.NUMBER) for i in range(2000)])
+
+    for page in allocator.pages.values():
+        assert len(page.create_payload("192.168.100.100", 65535)) <= MAX_PACKET_SIZE - _REQUEST_OVERHEAD
+
+def test_full_pages_are_not_offered():
+    allocator = PageAllocator(None, 10000, UPDATE_LIMIT)
+    add(allocator, numbers(UPDATE_LIMIT // _UPDATE_VALUE_SIZE))
+    [page] = allocator.pages.values()
+
+    entry = FeatureEntry("DOU_NEXT", 0, DataType.NUMBER)
+    assert not allocator.fits(page, entry)
+    assert allocator.allocate(entry, preferred=[page]) is not page
+
+def test_preferred_page():
+    allocator = PageAllocator(None, 10000, 10000)
+    add(allocator, numbers(2))
+
+    # a page being registered anyway is used before the fullest open one
+    other = ClientPage(99)
+    assert allocator.allocate(FeatureEntry("DOU_B", 0, DataType.NUMBER), preferred=[other]) is other
+
+def test_remove_feature_uses_the_added_type():
+    page = ClientPage(1)
+    page.add_feature(FeatureEntry("TXT", 0, DataType.STRING))
+    page.add_feature(FeatureEntry("DOU", 0, DataType.NUMBER))
+
+    # entries compare equal whatever their type, removal must free what was taken
+    page.remove_feature(FeatureEntry("TXT", 0))
+    assert page.update_size == _UPDATE_VALUE_SIZE
+    page.remove_feature(FeatureEntry("DOU", 0))
+    assert page.update_size == 0 and page.register_size == 0
+
+def test_free_reuses_page_ids():
+    allocator = PageAllocator(1, 10000, 10000)
+    add(allocator, numbers(3))
+    page = allocator.pages[2]
+
+    assert not allocator.free(page)
+
+    page.remove_feature(page.features[0])
+    assert allocator.free(page)
+    assert 2 not in allocator.pages
+
+    entry = FeatureEntry("DOU_NEW", 0, DataType.NUMBER)
+    assert allocator.allocate(entry).client_id == 2
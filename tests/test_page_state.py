@@ -0,0 +1,87 @@
+import math
+
+import pytest
+
+from pygrenton.page_state import PageState
+
+NAN = math.nan
+
+
+def make_state(values: list) -> PageState:
+    state = PageState()
+    state.reset(values)
+    return state
+
+def test_reset_keeps_values():
+    values = [1.0, "text", True, None, 2.5]
+    state = make_state(values)
+
+    assert len(state) == len(values)
+    assert state.values() == values
+    assert [state[position] for position in range(len(values))] == values
+
+def test_unchanged():
+    values = [1.0, "text", True, None]
+    state = make_state(values)
+
+    assert state.update(list(values)) == []
+    assert state.values() == values
+
+@pytest.mark.parametrize("position, value", [(0, 2.0), (1, "other"), (2, False), (4, -0.5)])
+def test_one_changed(position, value):
+    values = [1.0, "text", True, None, 0.5]
+    state = make_state(values)
+
+    new = list(values)
+    new[position] = value
+    assert state.update(new) == [position]
+    assert state.values() == new
+
+def test_changes_are_sorted():
+    state = make_state([1.0, "a", 2.0, "b", 3.0])
+
+    assert state.update([9.0, "x", 2.0, "y", 8.0]) == [0, 1, 3, 4]
+
+@pytest.mark.parametrize("old, new, changed", [
+    # a value changing kind replaces the layout
+    ([1.0, "a"], ["1", "a"], [0]),
+    ([1.0, None], [1.0, 2.0], [1]),
+    ([None, True], [None, 2.0], [1]),
+    # True == 1.0 in python, a boolean replacing a number is still no change of value
+    ([1.0], [True], []),
+])
+def test_kind_changes(old, new, changed):
+    state = make_state(old)
+
+    assert state.update(new) == changed
+    assert state.values() == new
+
+def test_size_changes():
+    state = make_state([1.0, 2.0, 3.0])
+
+    # only positions present before and after are reported
+    assert state.update([1.0, 5.0]) == [1]
+    assert state.values() == [1.0, 5.0]
+    assert state.update([1.0, 5.0, 6.0, 7.0]) == []
+    assert state.values() == [1.0, 5.0, 6.0, 7.0]
+
+def test_nan_that_stays_nan_is_no_change():
+    state = make_state([NAN, 1.0])
+
+    assert state.update([NAN, 1.0]) == []
+    assert state.update([NAN, 2.0]) == [1]
+
+@pytest.mark.parametrize("old, new", [([NAN], [1.0]), ([1.0], [NAN]), ([NAN], ["nan"]), ([None], [NAN])])
+def test_nan_changes(old, new):
+    state = make_state(old)
+
+    assert state.update(new) == [0]
+    assert (state[0] != state[0]) == (new[0] != new[0])
+
+def test_payload():
+    state = PageState()
+    state.reset([1.0], "1")
+    assert state.payload == "1"
+
+    state.update([2.0], "2")
+    assert state.payload == "2"
@@ -0,0 +1,67 @@
+import pytest
+
+from pygrenton.types import DataType
+from pygrenton.utils import parse_list, parse_values, value_converter
+
+
+def to_lua(value) -> str:
+    # the way the CLU writes values into a response
+    if value is None:
+        return "nil"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return f'"{value}"'
+    if isinstance(value, list):
+        return "{" + ",".join(to_lua(item) for item in value) + "}"
+    return repr(value)
+
+@pytest.mark.parametrize("values", [
+    [1.0],
+    [1.0, -2.5, 1e-3, 12345678.0],
+    [True, False, None],
+    ["", "text", "a,b", "{braces}", "with space "],
+    [1.0, "a", True, None, "b,c", 0.0],
+])
+def test_parse_values_round_trip(values):
+    assert parse_values(",".join(to_lua(value) for value in values)) == values
+
+@pytest.mark.parametrize("values", [
+    [[1.0, 2.0]],
+    [1.0, [2.0, "x"], 3.0],
+    [[1.0, [2.0, ["deep", None]]], "a,{b}"],
+    [[], 1.0],
+    [["cut"], 1.0, ["cut, too"]],
+])
+def test_parse_values_nested_round_trip(values):
+    assert parse_values(",".join(to_lua(value) for value in values)) == values
+
+def test_parse_list_returns_end_of_list():
+    msg = 'prefix{1,{2,"}"},3}suffix'
+    end, values = parse_list(msg, msg.index("{") + 1)
+
+    assert values == [1.0, [2.0, "}"], 3.0]
+    assert msg[end] == "}"
+    assert msg[end + 1:] == "suffix"
+
+def test_parse_list_unterminated():
+    with pytest.raises(ValueError):
+        parse_list("{1,{2,3}")
+
+def test_parse_values_skips_empty_items():
+    assert parse_values("1,,2") == [1.0, 2.0]
+    assert parse_values("{1,},2") == [[1.0], 2.0]
+
+def test_parse_values_converters():
+    converters = [value_converter(DataType.NUMBER), value_converter(DataType.STRING), value_converter(None)]
+
+    assert parse_values('1.5,"a",nil', converters) == [1.5, "a", None]
+    assert parse_values('nil,"",2', converters) == [None, "", 2.0]
+    assert parse_values('1,"a,b"', converters) == [1.0, "a,b"]
+
+def test_parse_values_converters_round_trip():
+    values = [2.0, "x,y", True, None, "z"]
+    types = [DataType.NUMBER, DataType.STRING, None, DataType.NUMBER, DataType.STRING]
+    converters = [value_converter(data_type) for data_type in types]
+
+    assert parse_values(",".join(to_lua(value) for value in values), converters) == values